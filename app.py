@@ -13,9 +13,11 @@ from modules.ui import (
     render_detail_page,
     render_contribute_page,
     render_ai_builder_page,
+    render_trends_page,
+    render_dashboard_page,
     render_footer
 )
-from modules.data import get_bigquery_client
+from modules.data import get_bigquery_client, start_prewarming, start_telemetry
 
 
 # Page config - must be first Streamlit command
@@ -37,6 +39,8 @@ def main():
     - Detail page: Query parameters + execution + results
     - Contribute page: Query contribution flow (Story 3.1)
     - AI Builder page: Natural language query generation (Story 4.1)
+    - Trends page: Technology Trend Analysis (DQ01) from the in-memory cube
+    - Dashboard page: Several catalog queries run concurrently
     """
     # Initialize session state for navigation
     init_session_state()
@@ -46,6 +50,12 @@ def main():
     if client is None:
         st.stop()
 
+    # Prewarm popular results at startup and on a schedule (once per process)
+    start_prewarming(client)
+
+    # Collect per-job cost and cache telemetry from INFORMATION_SCHEMA
+    start_telemetry(client)
+
     # Route based on current_page session state
     current_page = st.session_state.get('current_page', 'landing')
 
@@ -60,6 +70,10 @@ def main():
         render_contribute_page()
     elif current_page == 'ai_builder':
         render_ai_builder_page()
+    elif current_page == 'trends':
+        render_trends_page()
+    elif current_page == 'dashboard':
+        render_dashboard_page()
     else:
         render_landing_page()
 
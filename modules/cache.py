@@ -0,0 +1,368 @@
+# PATSTAT Explorer - Result Cache
+# Two-tier cache for query results: in-process LRU bounded by DataFrame
+# memory, backed by Parquet files on disk with a TTL and a size cap.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def sql_hash(sql: str) -> str:
+    """Return a stable hash of the SQL text of a query."""
+    return hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(sql: str, params: dict = None) -> str:
+    """Build a cache key from SQL text and query parameters.
+
+    Parameters with a value of None are dropped and keys are sorted, so
+    dicts that differ only in insertion order share an entry.
+    """
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    payload = json.dumps({"sql": sql_hash(sql), "params": params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Return the in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ResultCache:
+    """Two-tier result cache keyed by :func:`make_cache_key`.
+
+    Memory tier: LRU capped by the summed size of the cached DataFrames.
+    Disk tier: one Parquet file per entry plus a JSON sidecar with its
+    metadata; entries stored without table versions expire after
+    ``ttl_seconds``. When the files exceed ``max_disk_bytes`` the oldest
+    entries are removed.
+
+    Every entry remembers the query id and SQL hash it was produced for.
+    Storing a result for a query id whose SQL changed drops the entries
+    of the old SQL, so editing a ``sql_template`` invalidates its results.
+    Entries stored with the versions of the tables they read stay valid
+    until :meth:`invalidate_tables` sees one of those tables change.
+    """
+
+    def __init__(self, max_memory_bytes: int, cache_dir: str = None,
+                 ttl_seconds: float = 24 * 3600, max_disk_bytes: int = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()  # key -> (df, nbytes, meta)
+        self._memory_bytes = 0
+        self._disk_bytes = None  # Size of the disk tier's files, None until scanned
+        self._sql_hashes = {}  # query_id -> sql hash of the latest stored result
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def get(self, key: str):
+        """Return the cached DataFrame for ``key`` or None on a miss.
+
+        The returned frame is a shallow copy whose ``attrs['cache_tier']``
+        records which tier answered ('memory' or 'disk').
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry[2], memory=True):
+                self._drop_memory(key)
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._hits["memory"] += 1
+                return self._tagged(entry[0], "memory")
+
+        df, meta = self._read_disk(key)
+        if df is None:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits["disk"] += 1
+            self._store_memory(key, df, meta)
+        return self._tagged(df, "disk")
+
+    def put(self, key: str, df: pd.DataFrame, query_id: str = None,
+            sql_digest: str = None, params: dict = None, tables: dict = None,
+            ttl_seconds: float = None):
+        """Store a result in both tiers.
+
+        Args:
+            key: Cache key from :func:`make_cache_key`
+            df: Query result
+            query_id: QUERIES id the result belongs to, if any
+            sql_digest: :func:`sql_hash` of the SQL that produced the result
+            params: Parameters the result was produced with (see :meth:`entries`)
+            tables: Versions of the tables the query read, table -> version
+            ttl_seconds: Expire the entry after this long in both tiers,
+                whatever its table versions (e.g. results that reference
+                a temporary table)
+        """
+        now = time.time()
+        meta = {
+            "query_id": query_id,
+            "sql_hash": sql_digest,
+            "params": params,
+            "tables": tables or None,
+            "created_at": now,
+            "expires_at": now + ttl_seconds if ttl_seconds is not None else None,
+        }
+
+        if query_id and sql_digest:
+            with self._lock:
+                previous = self._sql_hashes.get(query_id)
+                self._sql_hashes[query_id] = sql_digest
+            if previous and previous != sql_digest:
+                self.invalidate_query(query_id, keep_sql_hash=sql_digest)
+
+        with self._lock:
+            self._store_memory(key, df, meta)
+        self._write_disk(key, df, meta)
+        if self.max_disk_bytes is not None and (self._disk_bytes is None
+                                                or self._disk_bytes > self.max_disk_bytes):
+            self._trim_disk()
+
+    def entries(self, query_id: str, sql_digest: str):
+        """Yield (DataFrame, params) of memory-tier results for a query, newest first.
+
+        Only results stored with ``params`` are included. Used to find a
+        held result that a new request can be derived from.
+        """
+        with self._lock:
+            matches = [(df, meta["params"]) for df, _, meta in reversed(self._memory.values())
+                       if not self._expired(meta, memory=True)
+                       and meta.get("query_id") == query_id
+                       and meta.get("sql_hash") == sql_digest
+                       and meta.get("params") is not None]
+        for df, params in matches:
+            yield self._tagged(df, "memory"), params
+
+    def invalidate_query(self, query_id: str, keep_sql_hash: str = None):
+        """Drop all entries of ``query_id`` except those for ``keep_sql_hash``."""
+        def is_stale(meta):
+            return (meta.get("query_id") == query_id
+                    and meta.get("sql_hash") != keep_sql_hash)
+
+        with self._lock:
+            for key in [k for k, (_, _, m) in self._memory.items() if is_stale(m)]:
+                self._drop_memory(key)
+
+        for key, meta in self._iter_disk_meta():
+            if is_stale(meta):
+                self._remove_disk(key)
+
+    def invalidate_tables(self, current: dict):
+        """Drop entries that read a table whose version is no longer current.
+
+        Args:
+            current: Current versions of the tables that changed, table -> version
+        """
+        def is_stale(meta):
+            tables = meta.get("tables") or {}
+            return any(t in current and version != current[t] for t, version in tables.items())
+
+        with self._lock:
+            for key in [k for k, (_, _, m) in self._memory.items() if is_stale(m)]:
+                self._drop_memory(key)
+
+        for key, meta in self._iter_disk_meta():
+            if is_stale(meta):
+                self._remove_disk(key)
+
+    def purge_stale(self, current_hashes: dict):
+        """Remove disk entries whose query SQL no longer matches or that expired.
+
+        The oldest remaining entries are then removed until the disk tier
+        fits ``max_disk_bytes``.
+
+        Args:
+            current_hashes: Dict mapping query id to the hash of its current SQL
+        """
+        for key, meta in self._iter_disk_meta():
+            query_id = meta.get("query_id")
+            edited = (query_id in current_hashes
+                      and meta.get("sql_hash") != current_hashes[query_id])
+            if self._expired(meta) or edited:
+                self._remove_disk(key)
+        self._trim_disk()
+
+        with self._lock:
+            self._sql_hashes.update(current_hashes)
+
+    def clear(self):
+        """Empty both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for key, _ in self._iter_disk_meta():
+            self._remove_disk(key)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "memory_hits": self._hits["memory"],
+                "disk_hits": self._hits["disk"],
+                "misses": self._misses,
+            }
+
+    def _expired(self, meta: dict, memory: bool = False) -> bool:
+        """Whether an entry has outlived its explicit expiry or, on disk, the TTL.
+
+        Disk entries with table versions do not age; they are dropped by
+        :meth:`invalidate_tables` instead. The memory tier only honours
+        explicit expiries.
+        """
+        now = time.time()
+        if meta.get("expires_at") is not None:
+            return now > meta["expires_at"]
+        if memory or meta.get("tables"):
+            return False
+        return now - meta.get("created_at", 0) > self.ttl_seconds
+
+    # -------------------------------------------------------------------------
+    # Memory tier
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _tagged(df: pd.DataFrame, tier: str) -> pd.DataFrame:
+        tagged = df.copy(deep=False)
+        tagged.attrs["cache_tier"] = tier
+        return tagged
+
+    def _store_memory(self, key: str, df: pd.DataFrame, meta: dict):
+        nbytes = frame_nbytes(df)
+        if key in self._memory:
+            self._drop_memory(key)
+        if nbytes > self.max_memory_bytes:
+            return  # Too large for the memory tier, disk only
+
+        self._memory[key] = (df, nbytes, meta)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+
+    def _drop_memory(self, key: str):
+        _, nbytes, _ = self._memory.pop(key)
+        self._memory_bytes -= nbytes
+
+    # -------------------------------------------------------------------------
+    # Disk tier
+    # -------------------------------------------------------------------------
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.parquet", f"{base}.json"
+
+    def _read_disk(self, key: str):
+        if not self.cache_dir:
+            return None, None
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if self._expired(meta):
+                self._remove_disk(key)
+                return None, None
+            return pd.read_parquet(data_path), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_disk(self, key: str, df: pd.DataFrame, meta: dict):
+        if not self.cache_dir:
+            return
+        data_path, meta_path = self._paths(key)
+        previous = self._entry_bytes(key)
+        try:
+            df.to_parquet(f"{data_path}.tmp", index=False)
+            os.replace(f"{data_path}.tmp", data_path)
+            with open(f"{meta_path}.tmp", "w") as f:
+                json.dump(meta, f, default=str)
+            os.replace(f"{meta_path}.tmp", meta_path)
+        except Exception as e:
+            # A result that cannot be persisted is still served from memory
+            print(f"Result cache: could not write {key}: {e}")
+            self._count_disk_bytes(self._entry_bytes(key) - previous)
+            self._remove_disk(key)
+        else:
+            self._count_disk_bytes(self._entry_bytes(key) - previous)
+
+    def _iter_disk_meta(self):
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name)) as f:
+                    yield name[:-len(".json")], json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def _trim_disk(self):
+        """Remove the oldest disk entries until the tier fits ``max_disk_bytes``.
+
+        Rescans the cache directory, which also resets the running total.
+        """
+        if not self.cache_dir or self.max_disk_bytes is None or not os.path.isdir(self.cache_dir):
+            return
+        entries, total = [], 0
+        for item in os.scandir(self.cache_dir):
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            total += stat.st_size
+            if item.name.endswith(".parquet"):
+                entries.append((stat.st_mtime, item.name[:-len(".parquet")]))
+        with self._lock:
+            self._disk_bytes = total
+        for _, key in sorted(entries):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove_disk(key)
+
+    def _entry_bytes(self, key: str) -> int:
+        """Return the size of an entry's files on disk (0 if absent)."""
+        nbytes = 0
+        for path in self._paths(key):
+            try:
+                nbytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return nbytes
+
+    def _count_disk_bytes(self, delta: int):
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += delta
+
+    def _remove_disk(self, key: str):
+        self._count_disk_bytes(-self._entry_bytes(key))
+        for path in self._paths(key):
+            for candidate in (path, f"{path}.tmp"):
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    pass
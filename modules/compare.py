@@ -0,0 +1,75 @@
+# PATSTAT Explorer - Parameter Set Comparison
+# Answer one query for several parameter sets with a single BigQuery job:
+# the query runs once with parameters covering every set, and the result is
+# split back per set by filtering on the columns the parameters map to.
+
+import pandas as pd
+
+from .refine import refine
+
+SET_COLUMN = "parameter_set"
+
+
+def covering_params(param_sets: list, param_columns: dict) -> dict:
+    """Return the parameters whose result contains the rows of every set.
+
+    Args:
+        param_sets: Canonical parameter dicts, one per set
+        param_columns: The query's ``param_columns`` mapping
+
+    Mapped year ranges are widened to their union and mapped list
+    parameters merged; all other parameters must be equal across sets.
+
+    Raises:
+        ValueError: If the sets differ in a parameter that is not mapped
+            to a result column, or have no parameters in common.
+    """
+    if not param_sets:
+        raise ValueError("No parameter sets to compare")
+    first = param_sets[0]
+    if any(params.keys() != first.keys() for params in param_sets):
+        raise ValueError("Parameter sets must have the same parameters")
+
+    covering = {}
+    for name in first:
+        values = [params[name] for params in param_sets]
+        if name in ('year_start', 'year_end') and 'year_range' in param_columns:
+            if None in values:
+                raise ValueError("Compared year ranges need a start and an end")
+            covering[name] = min(values) if name == 'year_start' else max(values)
+        elif name in param_columns and all(isinstance(v, list) for v in values):
+            covering[name] = sorted(set().union(*values))
+        elif any(v != values[0] for v in values):
+            raise ValueError(f"Parameter sets can only differ in {', '.join(sorted(param_columns))}, "
+                             f"not in {name}")
+        else:
+            covering[name] = values[0]
+    return covering
+
+
+def split_sets(df: pd.DataFrame, param_sets: list, param_columns: dict) -> list:
+    """Split a covering result into one frame per parameter set, in set order."""
+    frames = []
+    for i, params in enumerate(param_sets):
+        part = refine(df, params, param_columns)
+        part.attrs = {SET_COLUMN: i, 'params': params}
+        frames.append(part)
+    return frames
+
+
+def combine_sets(frames: list, labels: list) -> pd.DataFrame:
+    """Stack per-set frames into one, tagging each row with its set label."""
+    tagged = [frame.assign(**{SET_COLUMN: label}) for frame, label in zip(frames, labels)]
+    combined = pd.concat(tagged, ignore_index=True) if tagged else pd.DataFrame()
+    return combined[[SET_COLUMN] + [c for c in combined.columns if c != SET_COLUMN]]
+
+
+def set_label(params: dict, param_columns: dict) -> str:
+    """Describe a parameter set by its mapped parameters, e.g. '2015-2020 | DE, FR'."""
+    parts = []
+    if 'year_range' in param_columns and params.get('year_start') is not None:
+        parts.append(f"{params['year_start']}-{params['year_end']}")
+    for name in param_columns:
+        if name != 'year_range' and isinstance(params.get(name), list):
+            parts.append(", ".join(params[name]) or "none")
+    return " | ".join(parts)
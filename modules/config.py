@@ -80,6 +80,199 @@ TECH_FIELDS = {
     35: ("Civil engineering", "Other fields"),
 }
 
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+# In-process tier is bounded by DataFrame memory, not entry count. Results
+# are invalidated when a table they read changes (see TABLE VERSIONS); the
+# TTL only applies to results whose tables could not be versioned and to
+# paged results, whose destination tables BigQuery expires after a day.
+# The on-disk tier is capped at RESULT_CACHE_DISK_MB; the oldest files go first.
+# Each value can be overridden via the environment variable of the same name.
+RESULT_CACHE_MEMORY_MB = 256
+RESULT_CACHE_DIR = ".cache/results"
+RESULT_CACHE_TTL_SECONDS = 23 * 3600
+RESULT_CACHE_DISK_MB = 2048
+
+# =============================================================================
+# TABLE VERSIONS
+# =============================================================================
+# Last-modified time and row count of every table a query reads, re-read from
+# table metadata at most this often (TABLE_VERSION_REFRESH_SECONDS env var
+# overrides). A change invalidates the cached results that read the table.
+TABLE_VERSION_REFRESH_SECONDS = 300
+
+# =============================================================================
+# COST PREVIEW
+# =============================================================================
+# BigQuery on-demand analysis price (USD per TiB scanned)
+BIGQUERY_PRICE_PER_TIB_USD = 6.25
+# Parameters must be unchanged this long before the dry run refreshes
+DRY_RUN_DEBOUNCE_SECONDS = 1.0
+
+# =============================================================================
+# QUERY GUARDRAILS
+# =============================================================================
+# Applied to every job. QUERIES entries may override the byte budget with
+# "max_bytes_billed"; MAX_BYTES_BILLED / JOB_TIMEOUT_MS env vars override these.
+MAX_BYTES_BILLED_DEFAULT = 200 * 1024 ** 3  # 200 GiB
+JOB_TIMEOUT_MS_DEFAULT = 120_000
+# Running jobs whose page has not polled them for this long are cancelled
+ABANDONED_RUN_SECONDS = 30
+
+# =============================================================================
+# SHARED EXECUTOR
+# =============================================================================
+# Worker threads shared by all sessions for BigQuery calls and downloads
+# (EXECUTOR_WORKERS env var overrides)
+EXECUTOR_WORKERS = 8
+
+# =============================================================================
+# RESULT DOWNLOAD
+# =============================================================================
+# Results with at least this many rows or bytes are downloaded as Arrow over
+# the BigQuery Storage Read API; smaller ones use the REST API, which has
+# less setup overhead. Env vars of the same name override.
+STORAGE_API_MIN_ROWS = 50_000
+STORAGE_API_MIN_BYTES = 32 * 1024 ** 2  # 32 MiB
+
+# =============================================================================
+# RESULT PAGINATION
+# =============================================================================
+# Results above PAGINATE_MIN_ROWS rows stay in the job's destination table and
+# are read one page of RESULT_PAGE_ROWS at a time; QUERIES entries can page
+# smaller results with "display_rows". Env vars of the same name override.
+PAGINATE_MIN_ROWS = 10_000
+RESULT_PAGE_ROWS = 1_000
+
+# =============================================================================
+# ADMISSION CONTROL
+# =============================================================================
+# Per-session quotas keyed on the Streamlit session id. Queries beyond the
+# running limit wait in the queue; beyond the queued limit, or when the
+# estimated queue wait exceeds the deadline, they are rejected.
+# Each value can be overridden via the environment variable of the same name.
+SESSION_MAX_RUNNING = 2
+SESSION_MAX_QUEUED = 4
+ADMISSION_MAX_WAIT_SECONDS = 60
+
+# =============================================================================
+# FAMILY SKETCHES
+# =============================================================================
+# HLL_COUNT sketch table built by scripts/build_family_sketches.py, in the
+# SKETCH_DATASET dataset (default: BIGQUERY_DATASET). Precision 14 gives a
+# relative standard error of ~0.81%; see modules/sketches.py for the bounds.
+# Each value can be overridden via the environment variable of the same name.
+SKETCH_TABLE = "family_sketches"
+SKETCH_PRECISION = 14
+SKETCH_DIR = ".cache/sketches"
+
+# =============================================================================
+# SUMMARY TABLES
+# =============================================================================
+# Aggregate tables defined in modules/summaries.py and built by
+# scripts/build_summary_tables.py, named SUMMARY_TABLE_PREFIX + name in the
+# SUMMARY_DATASET dataset (default: BIGQUERY_DATASET). Env vars override.
+SUMMARY_TABLE_PREFIX = "summary_"
+
+# =============================================================================
+# EDITION SNAPSHOTS
+# =============================================================================
+# scripts/build_snapshot.py runs every QUERIES entry with its default
+# parameters, plus the extra parameter profiles below (values as entered on
+# the detail page, merged over the defaults), and writes the results to
+# SNAPSHOT_DIR/<edition>/. Requests with matching parameters are served from
+# the bundle of the loaded edition. SNAPSHOT_DIR env var overrides.
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_PROFILES = {
+    "Q02": [{"year_start": 1782, "year_end": 2024}],
+    "Q03": [{"jurisdictions": JURISDICTIONS}],
+}
+
+# =============================================================================
+# SPECULATIVE PREFETCH
+# =============================================================================
+# Opt-in: when a detail page opens, and once its parameters have been left
+# unchanged for SPECULATIVE_DEBOUNCE_SECONDS, the query runs in the
+# background so that Run Analysis finds the result cached (or joins the
+# running job). Prefetches only start while the session has no other query
+# queued or running, and stop once their estimated scans reach
+# SPECULATIVE_SESSION_BYTES. Env vars of the same name override.
+SPECULATIVE_PREFETCH = False
+SPECULATIVE_DEBOUNCE_SECONDS = 2.0
+SPECULATIVE_SESSION_BYTES = 20 * 1024 ** 3  # 20 GiB
+
+# =============================================================================
+# CACHE PREWARMING
+# =============================================================================
+# At startup and every PREWARM_INTERVAL_SECONDS the PREWARM_TOP_N most
+# requested (query, parameters) pairs of the last PREWARM_LOG_DAYS, read
+# from the request log, are run into the result cache; COMMON_QUESTIONS
+# with their default parameters fill up the list. At most
+# PREWARM_CONCURRENCY run at once, within PREWARM_MAX_BYTES estimated scan
+# per cycle. PREWARM_READY_FILE is written once the first cycle completes
+# (readiness probe). Env vars of the same name override. Prewarming spends
+# warehouse bytes without a user asking, so it is off unless
+# PREWARM_ENABLED=1.
+PREWARM_ENABLED = False
+REQUEST_LOG_PATH = ".cache/requests.jsonl"
+PREWARM_TOP_N = 20
+PREWARM_LOG_DAYS = 14
+PREWARM_CONCURRENCY = 2
+PREWARM_MAX_BYTES = 100 * 1024 ** 3  # 100 GiB
+PREWARM_INTERVAL_SECONDS = 3600
+PREWARM_READY_FILE = ".cache/prewarm.ready"
+
+# =============================================================================
+# JOB TELEMETRY
+# =============================================================================
+# Every job is labeled with app, query_id, params (a parameter fingerprint)
+# and page. A background collector copies the labeled jobs from
+# INFORMATION_SCHEMA.JOBS_BY_PROJECT of the region the jobs run in into a
+# local Parquet store. Needs bigquery.jobs.listAll on the project, so it is
+# off unless TELEMETRY_ENABLED=1 (env vars of the same name override).
+TELEMETRY_ENABLED = False
+TELEMETRY_REGION = "EU"
+TELEMETRY_PATH = ".cache/telemetry/jobs.parquet"
+TELEMETRY_INTERVAL_SECONDS = 900
+TELEMETRY_RETENTION_DAYS = 30
+
+# =============================================================================
+# RUNTIME ESTIMATES
+# =============================================================================
+# Every finished job is logged to EXECUTION_LOG_PATH (runtime, bytes
+# processed, BigQuery cache hit and parameter features). Once a query has
+# ESTIMATE_MIN_SAMPLES executions, its estimates are predicted from them
+# instead of the static estimated_seconds_* fields in QUERIES.
+EXECUTION_LOG_PATH = ".cache/executions.jsonl"
+ESTIMATE_MIN_SAMPLES = 3
+
+# =============================================================================
+# QUERY PLANS
+# =============================================================================
+# The plan and timeline of every job are stored with its result and shown
+# in the "View SQL Query" expander. A stage is flagged as skewed when its
+# slowest worker computes PLAN_SKEW_RATIO times as long as the average one,
+# and for at least PLAN_SKEW_MIN_MS.
+PLAN_SKEW_RATIO = 5.0
+PLAN_SKEW_MIN_MS = 1000
+
+# =============================================================================
+# DASHBOARD
+# =============================================================================
+# Catalog queries shown on the dashboard page by default. A dashboard's
+# queries run concurrently; keep DASHBOARD_MAX_PANELS at or below
+# SESSION_MAX_QUEUED, which bounds a session's queued and running queries.
+DASHBOARD_QUERIES = ["Q03", "Q06", "Q07", "Q11"]
+DASHBOARD_MAX_PANELS = 4
+
+# =============================================================================
+# COMPARE MODE
+# =============================================================================
+# Queries with "param_columns" can be compared side by side on the detail
+# page for up to this many parameter sets, answered by a single job.
+COMPARE_MAX_SETS = 3
+
 # =============================================================================
 # EXTERNAL URLS
 # =============================================================================
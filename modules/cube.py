@@ -0,0 +1,100 @@
+# PATSTAT Explorer - Technology Trend Cube
+# Pre-aggregated (jurisdiction, WIPO field, filing year) counts that answer
+# any Technology Trend Analysis (DQ01) parameter combination locally.
+
+import numpy as np
+import pandas as pd
+
+# One scan per PATSTAT edition; same filters as DQ01 (weight > 0.5)
+CUBE_SQL = """
+    SELECT
+        a.appln_auth AS jurisdiction,
+        tf.techn_field_nr AS tech_field,
+        a.appln_filing_year AS year,
+        COUNT(DISTINCT a.appln_id) AS application_count,
+        COUNT(DISTINCT a.docdb_family_id) AS invention_count
+    FROM tls201_appln a
+    JOIN tls230_appln_techn_field tf ON a.appln_id = tf.appln_id
+    WHERE a.appln_auth IN UNNEST(@jurisdictions)
+      AND a.appln_filing_year BETWEEN @year_start AND @year_end
+      AND tf.weight > 0.5
+    GROUP BY a.appln_auth, tf.techn_field_nr, a.appln_filing_year
+"""
+
+
+class TrendCube:
+    """Dense cube of DQ01 counts indexed by jurisdiction, field and year.
+
+    ``applications`` and ``inventions`` hold the per-cell counts of DQ01
+    (distinct applications and distinct families per jurisdiction, field
+    and year). ``applications_cum`` holds cumulative sums along the year
+    axis, so application totals over any year range are two lookups.
+    Family counts are not additive across years and have no cumulative form.
+    """
+
+    def __init__(self, jurisdictions: list, fields: list, year_start: int, year_end: int):
+        self.jurisdictions = list(jurisdictions)
+        self.fields = list(fields)
+        self.year_start = year_start
+        self.year_end = year_end
+        self._j_index = {j: i for i, j in enumerate(self.jurisdictions)}
+        self._f_index = {f: i for i, f in enumerate(self.fields)}
+
+        shape = (len(self.jurisdictions), len(self.fields), year_end - year_start + 1)
+        self.applications = np.zeros(shape, dtype=np.int32)
+        self.inventions = np.zeros(shape, dtype=np.int32)
+        self.applications_cum = np.zeros(shape[:2] + (shape[2] + 1,), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, jurisdictions: list, fields: list,
+                   year_start: int, year_end: int) -> "TrendCube":
+        """Build a cube from the long-format result of CUBE_SQL."""
+        cube = cls(jurisdictions, fields, year_start, year_end)
+        j = df['jurisdiction'].astype(str).map(cube._j_index)
+        f = df['tech_field'].astype(int).map(cube._f_index)
+        y = df['year'].astype(int) - year_start
+        valid = (j.notna() & f.notna() & (y >= 0) & (y < cube.applications.shape[2])).to_numpy()
+        idx = (j[valid].astype(int).to_numpy(), f[valid].astype(int).to_numpy(), y[valid].to_numpy())
+
+        cube.applications[idx] = df['application_count'].to_numpy()[valid]
+        cube.inventions[idx] = df['invention_count'].to_numpy()[valid]
+        np.cumsum(cube.applications, axis=2, out=cube.applications_cum[:, :, 1:])
+        return cube
+
+    def _select(self, jurisdictions: list, tech_field: int, year_start: int, year_end: int):
+        js = sorted(j for j in jurisdictions if j in self._j_index)
+        f = self._f_index.get(tech_field)
+        y0 = max(year_start, self.year_start) - self.year_start
+        y1 = min(year_end, self.year_end) - self.year_start + 1
+        return js, [self._j_index[j] for j in js], f, y0, y1
+
+    def query(self, jurisdictions: list, tech_field: int, year_start: int, year_end: int) -> pd.DataFrame:
+        """Return the DQ01 result (jurisdiction, year, application_count, invention_count).
+
+        Rows are ordered by jurisdiction and year; cells without applications
+        are omitted, as DQ01's GROUP BY would.
+        """
+        js, j_idx, f, y0, y1 = self._select(jurisdictions, tech_field, year_start, year_end)
+        columns = ['jurisdiction', 'year', 'application_count', 'invention_count']
+        if f is None or not js or y1 <= y0:
+            return pd.DataFrame(columns=columns)
+
+        apps = self.applications[j_idx, f, y0:y1]
+        inventions = self.inventions[j_idx, f, y0:y1]
+        years = np.arange(y0, y1) + self.year_start
+        df = pd.DataFrame({
+            'jurisdiction': np.repeat(js, len(years)),
+            'year': np.tile(years, len(js)),
+            'application_count': apps.ravel(),
+            'invention_count': inventions.ravel(),
+        })
+        return df[df['application_count'] > 0].reset_index(drop=True)
+
+    def application_totals(self, jurisdictions: list, tech_field: int,
+                           year_start: int, year_end: int) -> dict:
+        """Return total applications per jurisdiction over the year range."""
+        js, j_idx, f, y0, y1 = self._select(jurisdictions, tech_field, year_start, year_end)
+        if f is None or y1 <= y0:
+            return {j: 0 for j in js}
+        totals = self.applications_cum[j_idx, f, y1] - self.applications_cum[j_idx, f, y0]
+        return dict(zip(js, totals.tolist()))
@@ -4,12 +4,66 @@
 import os
 import json
 import time
+import threading
+import pandas as pd
+import pyarrow as pa
 import streamlit as st
 from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
 from google.oauth2 import service_account
 
-from queries_bq import QUERIES
-from .config import JURISDICTIONS, TECH_FIELDS
+from queries_bq import QUERIES, DYNAMIC_QUERIES
+from .config import (
+    JURISDICTIONS, TECH_FIELDS, DEFAULT_YEAR_START, DEFAULT_YEAR_END,
+    RESULT_CACHE_MEMORY_MB, RESULT_CACHE_DIR, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_DISK_MB,
+    BIGQUERY_PRICE_PER_TIB_USD, MAX_BYTES_BILLED_DEFAULT, JOB_TIMEOUT_MS_DEFAULT,
+    ABANDONED_RUN_SECONDS, EXECUTOR_WORKERS, STORAGE_API_MIN_ROWS, STORAGE_API_MIN_BYTES,
+    PAGINATE_MIN_ROWS, RESULT_PAGE_ROWS,
+    SESSION_MAX_RUNNING, SESSION_MAX_QUEUED, ADMISSION_MAX_WAIT_SECONDS,
+    SKETCH_TABLE, SKETCH_PRECISION, SUMMARY_TABLE_PREFIX, SNAPSHOT_DIR,
+    TABLE_VERSION_REFRESH_SECONDS, SPECULATIVE_PREFETCH, SPECULATIVE_SESSION_BYTES,
+    COMMON_QUESTIONS, PREWARM_ENABLED, REQUEST_LOG_PATH, PREWARM_TOP_N, PREWARM_LOG_DAYS,
+    PREWARM_CONCURRENCY, PREWARM_MAX_BYTES, PREWARM_INTERVAL_SECONDS, PREWARM_READY_FILE,
+    TELEMETRY_ENABLED, TELEMETRY_REGION, TELEMETRY_PATH, TELEMETRY_INTERVAL_SECONDS,
+    TELEMETRY_RETENTION_DAYS, EXECUTION_LOG_PATH, ESTIMATE_MIN_SAMPLES,
+    PLAN_SKEW_RATIO, PLAN_SKEW_MIN_MS
+)
+from .cube import TrendCube, CUBE_SQL
+from .sketches import merge_sql, exact_sql, split_total, relative_error
+from .summaries import SUMMARY_TABLES, edition_label, find_summary, summary_sql
+from .snapshot import SnapshotBundle
+from .versions import referenced_tables, TableVersions
+from .cache import ResultCache, make_cache_key, sql_hash
+from .execution import SingleFlight, QueryRun, FairExecutor, AdmissionController, AdmissionError
+from .refine import covers, refine
+from .compare import covering_params, split_sets
+from .prewarm import RequestLog, Prewarmer
+from .telemetry import JobTelemetry, job_labels, jobs_sql
+from .estimates import RuntimeEstimator
+from .plans import summarize_plan
+from .logic import build_query_params
+from .utils import canonicalize_sql, canonicalize_params, format_bytes, compact_frame
+
+
+class QueryBudgetError(Exception):
+    """Raised when a query would scan more bytes than its budget allows.
+
+    Attributes:
+        bytes_processed: Dry-run estimate of the scan
+        max_bytes_billed: Budget the query was checked against
+        suggestion: Narrower parameters that fit the budget, or None
+    """
+
+    def __init__(self, bytes_processed: int, max_bytes_billed: int, suggestion: dict = None):
+        self.bytes_processed = bytes_processed
+        self.max_bytes_billed = max_bytes_billed
+        self.suggestion = suggestion
+        message = (f"Query would scan {format_bytes(bytes_processed)}, "
+                   f"above its budget of {format_bytes(max_bytes_billed)}.")
+        if suggestion and 'year_start' in suggestion:
+            message += (f" Try filing years {suggestion['year_start']}-{suggestion['year_end']}"
+                        f" ({format_bytes(suggestion['bytes_processed'])}).")
+        super().__init__(message)
 
 
 @st.cache_resource
@@ -39,45 +93,500 @@ def get_bigquery_client():
     return bigquery.Client(project=project)
 
 
-def run_query(client, query):
-    """Execute a query and return results as DataFrame with execution time."""
+@st.cache_resource
+def get_bqstorage_client(_client):
+    """Create the BigQuery Storage Read API client, or None if unavailable.
+
+    Uses the credentials of the BigQuery client. Requires the optional
+    google-cloud-bigquery-storage package; without it all results are
+    downloaded over REST.
+    """
+    try:
+        from google.cloud import bigquery_storage
+        return bigquery_storage.BigQueryReadClient(credentials=getattr(_client, "_credentials", None))
+    except ImportError:
+        return None
+    except Exception as e:
+        print(f"Storage Read API unavailable, using REST downloads: {e}")
+        return None
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Create the process-wide result cache shared by all sessions."""
+    cache = ResultCache(
+        max_memory_bytes=int(os.getenv("RESULT_CACHE_MEMORY_MB", RESULT_CACHE_MEMORY_MB)) * 1024 * 1024,
+        cache_dir=os.getenv("RESULT_CACHE_DIR", RESULT_CACHE_DIR),
+        ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", RESULT_CACHE_TTL_SECONDS)),
+        max_disk_bytes=int(os.getenv("RESULT_CACHE_DISK_MB", RESULT_CACHE_DISK_MB)) * 1024 * 1024,
+    )
+    # Drop on-disk results of queries whose SQL was edited since they were stored,
+    # and the oldest ones beyond the disk cap
+    cache.purge_stale(catalog_sql_hashes())
+    return cache
+
+
+def catalog_sql_hashes() -> dict:
+    """Return the hash of each catalog query's canonical SQL, query id -> hash.
+
+    Results are stored under these hashes whether they were read from a
+    summary table or the base tables (see _execute).
+    """
+    return {
+        qid: sql_hash(canonicalize_sql(q.get("sql_template", q.get("sql", ""))))
+        for qid, q in {**DYNAMIC_QUERIES, **QUERIES}.items()
+    }
+
+
+@st.cache_resource
+def get_table_versions() -> TableVersions:
+    """Create the process-wide tracker of table versions."""
+    return TableVersions(
+        refresh_seconds=float(os.getenv("TABLE_VERSION_REFRESH_SECONDS", TABLE_VERSION_REFRESH_SECONDS))
+    )
+
+
+def get_table_dependencies(sql: str) -> list:
+    """Return the fully qualified ids of the tables a query reads."""
+    project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
+    tables = []
+    for name in referenced_tables(sql):
+        parts = name.split(".")
+        if len(parts) == 1:
+            tables.append(_table_id(name))
+        elif len(parts) == 2:
+            tables.append(f"{project}.{name}")
+        else:
+            tables.append(name)
+    return tables
+
+
+def _fetch_table_version(client, table_id: str) -> str:
+    """Read a table's version: '<last modified ISO time>|<row count>'."""
+    table = client.get_table(table_id)
+    return f"{table.modified.isoformat()}|{table.num_rows}"
+
+
+def refresh_table_versions(client, sql: str) -> dict:
+    """Return the versions of the tables ``sql`` reads, table id -> version.
+
+    Versions are re-read from table metadata (no query, nothing billed) at
+    most every TABLE_VERSION_REFRESH_SECONDS. Cached results that read a
+    table whose version changed are dropped from both cache tiers.
+    """
+    versions, changed = get_table_versions().refresh(
+        get_table_dependencies(sql), lambda table_id: _fetch_table_version(client, table_id))
+    if changed:
+        get_result_cache().invalidate_tables(changed)
+    return versions
+
+
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    """Create the process-wide registry of in-flight BigQuery jobs."""
+    return SingleFlight()
+
+
+@st.cache_resource
+def get_executor() -> FairExecutor:
+    """Create the bounded executor that runs warehouse calls for all sessions."""
+    return FairExecutor(
+        max_workers=int(os.getenv("EXECUTOR_WORKERS", EXECUTOR_WORKERS)),
+        max_per_owner=int(os.getenv("SESSION_MAX_RUNNING", SESSION_MAX_RUNNING)),
+    )
+
+
+@st.cache_resource
+def get_admission_controller() -> AdmissionController:
+    """Create the admission controller guarding the shared executor."""
+    return AdmissionController(
+        get_executor(),
+        max_per_session=int(os.getenv("SESSION_MAX_QUEUED", SESSION_MAX_QUEUED)),
+        max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", ADMISSION_MAX_WAIT_SECONDS)),
+    )
+
+
+def get_executor_stats() -> dict:
+    """Return queue depth, running count and wait times of the shared executor."""
+    return {**get_executor().stats(), **get_admission_controller().stats()}
+
+
+def get_cache_stats() -> dict:
+    """Return result cache hits and misses, and how many callers joined running jobs."""
+    return {**get_result_cache().stats(), **get_single_flight().stats()}
+
+
+def get_query_budget(query_id: str = None) -> int:
+    """Return the maximum bytes billed for a query.
+
+    Uses the query's ``max_bytes_billed`` entry (see get_query_info), else
+    the global default (MAX_BYTES_BILLED env var or MAX_BYTES_BILLED_DEFAULT).
+    """
+    default = int(os.getenv("MAX_BYTES_BILLED", MAX_BYTES_BILLED_DEFAULT))
+    return get_query_info(query_id).get('max_bytes_billed', default)
+
+
+def get_query_info(query_id: str) -> dict:
+    """Return the catalog entry of a query from QUERIES or DYNAMIC_QUERIES ({} if unknown)."""
+    return QUERIES.get(query_id) or DYNAMIC_QUERIES.get(query_id, {})
+
+
+def _job_config(query_params: list, **kwargs) -> bigquery.QueryJobConfig:
+    """Build a job config with the PATSTAT dataset as default dataset."""
     project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
     dataset = os.getenv("BIGQUERY_DATASET", "patstat")
 
     # Set default dataset so queries don't need fully qualified table names
-    job_config = bigquery.QueryJobConfig(
-        default_dataset=f"{project}.{dataset}"
+    return bigquery.QueryJobConfig(
+        default_dataset=f"{project}.{dataset}",
+        query_parameters=query_params,
+        **kwargs
     )
 
+
+def _execute(client, sql: str, params: dict, query_id: str = None, on_job=None,
+             on_progress=None, fallback_sql: str = None, page: str = None,
+             sql_digest: str = None):
+    """Run a query, answering locally from cached results where possible.
+
+    Cached results of the same query with broader parameters are filtered
+    down (see _lookup_local). Queries with an ``incremental_years`` entry in
+    QUERIES are assembled from cached single-year results; only the missing
+    years are queried. All other queries run as one job (see _execute_job).
+    If ``sql`` reads a table that no longer exists (a dropped summary
+    table), ``fallback_sql`` runs instead. Jobs are labeled with ``page``
+    (see job_labels).
+
+    Results are cached under ``sql_digest``, the hash of the catalog SQL
+    (``fallback_sql`` when given, else ``sql``), so a query's summary-table
+    and base-table results count as the same SQL when the cache drops
+    results of edited queries.
+
+    Returns:
+        tuple: (DataFrame, execution_time in seconds)
+    """
+    sql_digest = sql_digest or sql_hash(fallback_sql or sql)
+    if fallback_sql is not None and fallback_sql != sql:
+        try:
+            return _execute(client, sql, params, query_id, on_job, on_progress, page=page,
+                            sql_digest=sql_digest)
+        except NotFound:
+            get_summary_tables.clear()
+            return _execute(client, fallback_sql, params, query_id, on_job, on_progress, page=page,
+                            sql_digest=sql_digest)
+
+    refresh_table_versions(client, sql)
+    start_time = time.time()
+    local = _lookup_local(sql, params, query_id, sql_digest)
+    if local is not None:
+        return local, time.time() - start_time
+
+    incremental = get_query_info(query_id).get('incremental_years')
+    year_start, year_end = params.get('year_start'), params.get('year_end')
+    if incremental and year_start is not None and year_end is not None and year_start <= year_end:
+        return _execute_incremental(client, sql, params, query_id, incremental,
+                                    on_job=on_job, on_progress=on_progress, page=page,
+                                    sql_digest=sql_digest)
+    return _execute_job(client, sql, params, query_id=query_id, on_job=on_job,
+                        on_progress=on_progress, page=page, sql_digest=sql_digest)
+
+
+def _lookup_local(sql: str, params: dict, query_id: str = None, sql_digest: str = None):
+    """Return the result from the cache or by refining a cached result, else None.
+
+    Queries with a ``param_columns`` entry (in QUERIES or DYNAMIC_QUERIES)
+    can be answered from a memory-tier result of the same SQL whose
+    parameters cover the new ones (wider year range, superset of
+    jurisdictions, ...). Such answers
+    carry ``attrs['refined_from']`` with the parameters of the source.
+    """
+    cache = get_result_cache()
+    cached = cache.get(make_cache_key(sql, params))
+    if cached is not None:
+        return cached
+
+    param_columns = get_query_info(query_id).get('param_columns')
+    if not param_columns:
+        return None
+    for df, held in cache.entries(query_id, sql_digest or sql_hash(sql)):
+        # Paginated results are incomplete locally and cannot be filtered
+        if not df.attrs.get('destination') and covers(held, params, param_columns):
+            refined = refine(df, params, param_columns)
+            refined.attrs = {'refined_from': held}
+            return refined
+    return None
+
+
+def _execute_incremental(client, sql: str, params: dict, query_id: str, incremental: dict,
+                         on_job=None, on_progress=None, page: str = None, sql_digest: str = None):
+    """Answer a year-range query from per-year partial results.
+
+    Each filing year's rows are cached under the key of the same query run
+    for that single year. Years not cached yet are queried in contiguous
+    ranges, split by ``incremental['year_column']`` and cached per year;
+    the merged frame is sorted by ``incremental['sort_by']`` /
+    ``incremental['ascending']``. Its ``attrs['incremental']`` records how
+    many years were reused and queried.
+    """
+    cache = get_result_cache()
+    sql_digest = sql_digest or sql_hash(sql)
+    start_time = time.time()
+    versions = refresh_table_versions(client, sql)
+
+    def year_key(year):
+        return make_cache_key(sql, {**params, 'year_start': year, 'year_end': year})
+
+    years = range(params['year_start'], params['year_end'] + 1)
+    partials = {year: cache.get(year_key(year)) for year in years}
+    missing = [year for year in years if partials[year] is None]
+
+    for first, last in _contiguous_ranges(missing):
+        df, _ = _execute_job(client, sql, {**params, 'year_start': first, 'year_end': last},
+                             query_id=query_id, on_job=on_job, on_progress=on_progress, page=page,
+                             sql_digest=sql_digest)
+        if df.attrs.get('destination'):
+            # Paginated, so not every row is local: answer with a single job instead
+            return _execute_job(client, sql, params, query_id=query_id, on_job=on_job,
+                                on_progress=on_progress, page=page, sql_digest=sql_digest)
+        year_values = df[incremental['year_column']]
+        for year in range(first, last + 1):
+            partials[year] = df[year_values == year].reset_index(drop=True)
+            cache.put(year_key(year), partials[year], query_id=query_id, sql_digest=sql_digest,
+                      params={**params, 'year_start': year, 'year_end': year}, tables=versions)
+
+    frames = [partials[year] for year in years if len(partials[year])]
+    if frames:
+        merged = pd.concat(frames, ignore_index=True)
+        merged = merged.sort_values(incremental['sort_by'],
+                                    ascending=incremental.get('ascending', True),
+                                    ignore_index=True, kind='stable')
+    else:
+        merged = partials[years[0]].iloc[0:0]
+    merged = compact_frame(merged, get_query_info(query_id).get('column_hints'))
+    merged.attrs = {'incremental': {'cached_years': len(years) - len(missing),
+                                    'queried_years': len(missing)}}
+    cache.put(make_cache_key(sql, params), merged, query_id=query_id, sql_digest=sql_digest,
+              params=params, tables=versions)
+    return merged, time.time() - start_time
+
+
+def _contiguous_ranges(years: list) -> list:
+    """Group sorted years into (first, last) runs of consecutive years."""
+    ranges = []
+    for year in years:
+        if ranges and year == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], year)
+        else:
+            ranges.append((year, year))
+    return ranges
+
+
+def _execute_job(client, sql: str, params: dict, query_id: str = None, on_job=None,
+                 on_progress=None, page: str = None, sql_digest: str = None):
+    """Run a query through the result cache and the single-flight registry.
+
+    Concurrent callers with the same fingerprint share one BigQuery job;
+    followers get the leader's DataFrame with ``attrs['shared_job']`` set.
+    Jobs whose dry-run estimate exceeds the query's byte budget raise
+    QueryBudgetError before anything is billed. ``on_job`` is called with
+    the QueryJob and the key of the flight it leads as soon as it is
+    submitted (followers submit nothing), ``on_progress`` with
+    (rows_downloaded, total_rows) while the result is downloaded. Jobs
+    carry the labels of job_labels(query_id, params, page); the job's plan
+    is stored in ``df.attrs['query_plan']`` (see summarize_plan).
+
+    Returns:
+        tuple: (DataFrame, execution_time in seconds)
+    """
+    cache = get_result_cache()
+    key = make_cache_key(sql, params)
+
     start_time = time.time()
-    result = client.query(query, job_config=job_config).to_dataframe()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, time.time() - start_time
+
+    versions = refresh_table_versions(client, sql)
+    max_bytes_billed = get_query_budget(query_id)
+    _check_budget(client, sql, params, max_bytes_billed)
+    job_config = _job_config(
+        _build_query_parameters(params),
+        maximum_bytes_billed=max_bytes_billed,
+        job_timeout_ms=int(os.getenv("JOB_TIMEOUT_MS", JOB_TIMEOUT_MS_DEFAULT)),
+        labels=job_labels(query_id, params, page),
+    )
+
+    def fetch():
+        # A flight for this key may have finished since our cache lookup
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        job_start = time.time()
+        job = client.query(sql, job_config=job_config)
+        if on_job:
+            on_job(job, key)
+        query_info = get_query_info(query_id)
+        df = compact_frame(_download(client, job, on_progress, query_info.get('display_rows')),
+                           query_info.get('column_hints'))
+        df.attrs['bigquery_cache_hit'] = bool(job.cache_hit)
+        df.attrs['query_plan'] = _capture_plan(job)
+        if query_id:
+            _record_execution(query_id, params, job, time.time() - job_start)
+        # Paged results reference the job's destination table, which BigQuery expires
+        ttl = cache.ttl_seconds if df.attrs.get('destination') else None
+        cache.put(key, df, query_id=query_id, sql_digest=sql_digest or sql_hash(sql), params=params,
+                  tables=versions, ttl_seconds=ttl)
+        return df
+
+    result, shared = get_single_flight().do(key, fetch, label=query_id)
     execution_time = time.time() - start_time
+
+    if shared:
+        result = result.copy(deep=False)
+        result.attrs['shared_job'] = True
     return result, execution_time
 
 
-def run_parameterized_query(client, sql_template: str, params: dict):
-    """Execute a parameterized query with BigQuery query parameters.
+def _capture_plan(job):
+    """Return the job's summarized query plan, or None if it is unavailable."""
+    try:
+        return summarize_plan(job,
+                              skew_ratio=float(os.getenv("PLAN_SKEW_RATIO", PLAN_SKEW_RATIO)),
+                              skew_min_ms=int(os.getenv("PLAN_SKEW_MIN_MS", PLAN_SKEW_MIN_MS)))
+    except Exception as e:
+        print(f"Could not capture the query plan: {e}")
+        return None
+
+
+# Arrow types mapped like RowIterator.to_dataframe() does, so both download
+# paths produce the same dtypes
+_ARROW_DTYPES = {
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+
+def _use_storage_api(client, destination, total_rows: int) -> bool:
+    """Decide whether a result is large enough for the Storage Read API."""
+    min_rows = int(os.getenv("STORAGE_API_MIN_ROWS", STORAGE_API_MIN_ROWS))
+    if total_rows >= min_rows:
+        return True
+    # Only wide rows can reach the byte threshold with few rows; skip the
+    # metadata call for results that fit in a couple of REST pages
+    if total_rows < 1000 or destination is None:
+        return False
+    try:
+        num_bytes = client.get_table(destination).num_bytes or 0
+    except Exception:
+        return False
+    return num_bytes >= int(os.getenv("STORAGE_API_MIN_BYTES", STORAGE_API_MIN_BYTES))
+
+
+def _rows_to_dataframe(client, rows, destination, on_progress=None) -> pd.DataFrame:
+    """Download all rows of a RowIterator as a DataFrame.
+
+    Large results are streamed as Arrow record batches over the Storage
+    Read API, small ones (or all, without a Storage client) come over REST.
+    """
+    total_rows = rows.total_rows or 0
+    bqstorage_client = (get_bqstorage_client(client)
+                        if _use_storage_api(client, destination, total_rows) else None)
+
+    if bqstorage_client is None:
+        df = rows.to_dataframe(create_bqstorage_client=False)
+        if on_progress:
+            on_progress(len(df), total_rows)
+        return df
+
+    batches, downloaded = [], 0
+    for batch in rows.to_arrow_iterable(bqstorage_client=bqstorage_client):
+        batches.append(batch)
+        downloaded += batch.num_rows
+        if on_progress:
+            on_progress(downloaded, total_rows)
+    if not batches:
+        return pd.DataFrame()
+    table = pa.Table.from_batches(batches)
+    del batches  # Let to_pandas release Arrow buffers as columns are converted
+    return table.to_pandas(types_mapper=_ARROW_DTYPES.get, split_blocks=True, self_destruct=True)
+
+
+def _page_rows(total_rows: int, display_rows: int = None):
+    """Return how many rows to download up front, or None to download all."""
+    if display_rows and total_rows > display_rows:
+        return display_rows
+    if total_rows > int(os.getenv("PAGINATE_MIN_ROWS", PAGINATE_MIN_ROWS)):
+        return int(os.getenv("RESULT_PAGE_ROWS", RESULT_PAGE_ROWS))
+    return None
+
+
+def _download(client, job, on_progress=None, display_rows: int = None) -> pd.DataFrame:
+    """Wait for a job and download its result as a DataFrame.
+
+    Results above ``display_rows`` (or PAGINATE_MIN_ROWS) stay in the job's
+    destination table: only the first page is downloaded, and the frame's
+    attrs record ``total_rows``, ``page_rows`` and the ``destination`` table
+    so fetch_result_page() and download_full_result() can read the rest.
 
     Args:
-        client: BigQuery client
-        sql_template: SQL with @param placeholders
-        params: Dict with parameter values:
-            - year_start: int
-            - year_end: int
-            - jurisdictions: list[str]
-            - tech_field: int or None
-            - tech_sector: str or None (Q08)
-            - applicant_name: str or None (Q11)
-            - competitors: list[str] or None (Q12)
-            - ipc_class: str or None (Q14, Q15, Q16)
+        client: BigQuery client that ran the job
+        job: Submitted QueryJob
+        on_progress: Optional callable(rows_downloaded, total_rows)
+        display_rows: Rows the page shows at once (the query's "display_rows")
+    """
+    rows = job.result()
+    total_rows = rows.total_rows or 0
+    page_rows = _page_rows(total_rows, display_rows)
 
-    Returns:
-        tuple: (DataFrame, execution_time in seconds)
+    if page_rows is None or job.destination is None:
+        return _rows_to_dataframe(client, rows, job.destination, on_progress)
+
+    df = client.list_rows(job.destination, start_index=0, max_results=page_rows
+                          ).to_dataframe(create_bqstorage_client=False)
+    if on_progress:
+        on_progress(len(df), len(df))
+    dest = job.destination
+    df.attrs.update(total_rows=total_rows, page_rows=page_rows,
+                    destination=f"{dest.project}.{dest.dataset_id}.{dest.table_id}")
+    return df
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_result_page(_client, destination: str, start_index: int, max_results: int,
+                      query_id: str = None) -> pd.DataFrame:
+    """Read one page of a paginated result from its destination table."""
+    df = _client.list_rows(destination, start_index=start_index, max_results=max_results
+                           ).to_dataframe(create_bqstorage_client=False)
+    return compact_frame(df, get_query_info(query_id).get('column_hints'))
+
+
+def download_full_result(client, df: pd.DataFrame, query_id: str = None) -> pd.DataFrame:
+    """Return the complete result for a (possibly paginated) result frame.
+
+    Frames without a ``destination`` attr are already complete. Otherwise
+    all rows are read from the destination table (over the Storage Read
+    API when large), e.g. for CSV export.
     """
-    project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
-    dataset = os.getenv("BIGQUERY_DATASET", "patstat")
+    destination = df.attrs.get('destination')
+    if not destination:
+        return df
+    rows = client.list_rows(destination)
+    full = _rows_to_dataframe(client, rows, destination)
+    return compact_frame(full, get_query_info(query_id).get('column_hints'))
 
-    # Build query parameters
+
+def run_query(client, query, query_id: str = None, page: str = None):
+    """Execute a query and return results as DataFrame with execution time.
+
+    Results are served from the result cache when the same SQL ran before;
+    ``df.attrs['cache_tier']`` is set on cache hits. ``page`` labels the job
+    (e.g. 'ai_builder', 'contribution'; see job_labels).
+    """
+    return _submit_and_wait(client, canonicalize_sql(query), {}, query_id=query_id, page=page)
+
+
+def _build_query_parameters(params: dict) -> list:
+    """Translate a parameter dict into BigQuery query parameters."""
     query_params = []
 
     # Common parameters
@@ -122,16 +631,698 @@ def run_parameterized_query(client, sql_template: str, params: dict):
     if "system" in params and params["system"] is not None:
         query_params.append(bigquery.ScalarQueryParameter("system", "STRING", params["system"]))
 
-    # Set job config with parameters
+    return query_params
+
+
+def _prepare(sql_template: str, params: dict, query_id: str = None,
+             params_config: dict = None):
+    """Canonicalize SQL and parameters for a query.
+
+    Returns:
+        tuple: (canonical SQL, canonical params dict)
+    """
+    if params_config is None:
+        params_config = get_query_info(query_id).get('parameters', {})
+    sql = canonicalize_sql(sql_template)
+    return sql, canonicalize_params(params or {}, params_config, sql)
+
+
+def run_parameterized_query(client, sql_template: str, params: dict, query_id: str = None,
+                            params_config: dict = None, page: str = None):
+    """Execute a parameterized query with BigQuery query parameters.
+
+    Args:
+        client: BigQuery client
+        sql_template: SQL with @param placeholders
+        params: Dict with parameter values:
+            - year_start: int
+            - year_end: int
+            - jurisdictions: list[str]
+            - tech_field: int or None
+            - tech_sector: str or None (Q08)
+            - applicant_name: str or None (Q11)
+            - competitors: list[str] or None (Q12)
+            - ipc_class: str or None (Q14, Q15, Q16)
+        query_id: QUERIES id, used to invalidate cached results when the
+            query's SQL changes
+        params_config: The query's ``parameters`` schema; looked up by
+            query_id (see get_query_info) when omitted
+        page: Labels the job with the page it ran for (see job_labels)
+
+    SQL and parameters are canonicalized first, so equivalent requests share
+    both our result cache and BigQuery's.
+
+    Returns:
+        tuple: (DataFrame, execution_time in seconds)
+    """
+    sql, params = _prepare(sql_template, params, query_id, params_config)
+    routed = route_to_summary(client, sql, query_id)
+    return _submit_and_wait(client, routed, params, query_id=query_id, fallback_sql=sql, page=page)
+
+
+def _estimate(client, sql: str, params: dict) -> dict:
+    """Return the memoized dry run of ``sql`` for the current versions of its tables."""
+    versions = refresh_table_versions(client, sql)
+    return _dry_run(client, sql, params, json.dumps(versions, sort_keys=True))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _dry_run(_client, sql: str, params: dict, tables_version: str = None) -> dict:
+    job_config = _job_config(_build_query_parameters(params), dry_run=True, use_query_cache=False)
+    job = _client.query(sql, job_config=job_config)
+    bytes_processed = job.total_bytes_processed or 0
+    return {
+        'bytes_processed': bytes_processed,
+        'tables': sorted({t.table_id for t in (job.referenced_tables or [])}),
+        'estimated_cost_usd': bytes_processed / 2**40 * BIGQUERY_PRICE_PER_TIB_USD,
+    }
+
+
+# Runs not yet finished, across all sessions (for cancelling abandoned runs)
+_RUNS = []
+_RUNS_LOCK = threading.Lock()
+
+
+def _lookup_without_job(client, sql: str, params: dict, query_id: str = None,
+                        fallback_sql: str = None):
+    """Return a cached, refined or snapshot result, else None.
+
+    Such results need no warehouse call, so they bypass admission control.
+    """
+    refresh_table_versions(client, sql)
+    local = _lookup_local(sql, params, query_id, sql_hash(fallback_sql or sql))
+    if local is None:
+        local = _lookup_snapshot(client, fallback_sql or sql, params)
+    return local
+
+
+def _launch(run: QueryRun, client, sql: str, params: dict, query_id: str = None,
+            fallback_sql: str = None, max_running: int = None, page: str = None) -> QueryRun:
+    """Queue an admitted run on the shared executor."""
+    with _RUNS_LOCK:
+        _RUNS.append(run)
+    return run.start(lambda: _execute(client, sql, params, query_id=query_id,
+                                      on_job=run.attach_job,
+                                      on_progress=run.report_download,
+                                      fallback_sql=fallback_sql, page=page),
+                     executor=get_executor(), max_running=max_running)
+
+
+def _start_run(client, sql: str, params: dict, query_id: str = None,
+               fallback_sql: str = None) -> QueryRun:
+    reap_abandoned_runs()
+    key = make_cache_key(sql, params)
+    run = QueryRun(label=query_id, key=key, owner=get_session_id())
+
+    start_time = time.time()
+    local = _lookup_without_job(client, sql, params, query_id, fallback_sql)
+    if local is not None:
+        return run.resolve((local, time.time() - start_time))
+
+    get_admission_controller().admit(run.owner)
+    return _launch(run, client, sql, params, query_id, fallback_sql)
+
+
+def _submit_and_wait(client, sql: str, params: dict, query_id: str = None,
+                     fallback_sql: str = None, page: str = None):
+    """Run a query on the shared executor and block until it finishes.
+
+    Raises AdmissionError if the session's quota or the queue deadline
+    does not allow another query.
+    """
+    start_time = time.time()
+    local = _lookup_without_job(client, sql, params, query_id, fallback_sql)
+    if local is not None:
+        return local, time.time() - start_time
+
+    owner = get_session_id()
+    get_admission_controller().admit(owner)
+    future = get_executor().submit(_execute, client, sql, params, query_id, None, None,
+                                   fallback_sql, page, owner=owner)
+    return future.result()
+
+
+def submit_query(client, query: str, query_id: str = None) -> QueryRun:
+    """Start a static query in the background and return its QueryRun.
+
+    ``run.result()`` returns (DataFrame, execution_time in seconds).
+    Raises AdmissionError when the query is not admitted.
+    """
+    _record_request(query_id, {})
+    return _start_run(client, canonicalize_sql(query), {}, query_id=query_id)
+
+
+def submit_parameterized_query(client, sql_template: str, params: dict, query_id: str = None,
+                               params_config: dict = None) -> QueryRun:
+    """Start a parameterized query in the background and return its QueryRun.
+
+    Same arguments as run_parameterized_query. The page can poll
+    ``run.progress()`` and cancel with cancel_run() while it executes.
+    Raises AdmissionError when the query is not admitted.
+    """
+    sql, params = _prepare(sql_template, params, query_id, params_config)
+    _record_request(query_id, params)
+    routed = route_to_summary(client, sql, query_id)
+    return _start_run(client, routed, params, query_id=query_id, fallback_sql=sql)
+
+
+def submit_batch(client, requests: list) -> list:
+    """Start several queries at once, e.g. the panels of a dashboard.
+
+    Args:
+        client: BigQuery client
+        requests: (query_id, sql_template, params) tuples; static queries
+            pass their ``sql`` and empty params
+
+    Results available without a job resolve at once. The others are
+    admitted as one batch and may all run concurrently, above the
+    session's usual running limit, so the batch takes about as long as
+    its slowest query.
+
+    Returns:
+        list: QueryRun per request, in request order
+
+    Raises:
+        AdmissionError: If the batch is not admitted; no query is started.
+    """
+    reap_abandoned_runs()
+    owner = get_session_id()
+    runs, pending = [], []
+    for query_id, sql_template, params in requests:
+        sql, params = _prepare(sql_template, params, query_id)
+        _record_request(query_id, params)
+        routed = route_to_summary(client, sql, query_id)
+        run = QueryRun(label=query_id, key=make_cache_key(routed, params), owner=owner)
+        start_time = time.time()
+        local = _lookup_without_job(client, routed, params, query_id, fallback_sql=sql)
+        if local is not None:
+            run.resolve((local, time.time() - start_time))
+        else:
+            pending.append((run, routed, params, query_id, sql))
+        runs.append(run)
+
+    if pending:
+        get_admission_controller().admit(owner, count=len(pending))
+        for run, routed, params, query_id, sql in pending:
+            _launch(run, client, routed, params, query_id, fallback_sql=sql,
+                    max_running=len(pending), page="dashboard")
+    return runs
+
+
+def speculation_settings() -> dict:
+    """Return whether speculative prefetch is enabled and its per-session scan budget."""
+    enabled = os.getenv("SPECULATIVE_PREFETCH", str(SPECULATIVE_PREFETCH))
+    return {
+        'enabled': enabled.strip().lower() in ("1", "true", "yes", "on"),
+        'session_bytes': int(os.getenv("SPECULATIVE_SESSION_BYTES", SPECULATIVE_SESSION_BYTES)),
+    }
+
+
+def prefetch_parameterized_query(client, sql_template: str, params: dict, query_id: str = None,
+                                 params_config: dict = None, max_bytes: int = None):
+    """Speculatively start a query the user is likely to run next.
+
+    Nothing starts when the result is available without a job, when the
+    session already has a query queued or running, or when the dry-run
+    estimate exceeds ``max_bytes`` or the query's budget. A started run stores its result in the
+    result cache, and Run Analysis with the same parameters joins it while
+    it is still running. Speculative runs are not reaped when unpolled.
+
+    Returns:
+        tuple: (QueryRun or None, estimated bytes processed of the started run, else 0)
+    """
+    sql, params = _prepare(sql_template, params, query_id, params_config)
+    routed = route_to_summary(client, sql, query_id)
+    if _lookup_without_job(client, routed, params, query_id, fallback_sql=sql) is not None:
+        return None, 0
+
+    owner = get_session_id()
+    if owner is not None and get_executor().owner_load(owner) > 0:
+        return None, 0
+    bytes_processed = _estimate(client, routed, params)['bytes_processed']
+    if bytes_processed > get_query_budget(query_id) or (max_bytes is not None and bytes_processed > max_bytes):
+        return None, 0
+
+    get_admission_controller().admit(owner)
+    run = QueryRun(label=query_id, key=make_cache_key(routed, params), owner=owner)
+    run.start(lambda: _execute(client, routed, params, query_id=query_id, fallback_sql=sql,
+                               page="prefetch"),
+              executor=get_executor())
+    return run, bytes_processed
+
+
+@st.cache_resource
+def get_runtime_estimator() -> RuntimeEstimator:
+    """Create the process-wide runtime estimator (learns from the execution log)."""
+    return RuntimeEstimator(
+        RequestLog(os.getenv("EXECUTION_LOG_PATH", EXECUTION_LOG_PATH)),
+        min_samples=int(os.getenv("ESTIMATE_MIN_SAMPLES", ESTIMATE_MIN_SAMPLES)),
+    )
+
+
+def _record_execution(query_id: str, params: dict, job, seconds: float):
+    """Log a finished job for the runtime estimator."""
+    get_runtime_estimator().record(query_id, params, seconds, job.total_bytes_processed or 0,
+                                   cache_hit=bool(job.cache_hit))
+
+
+def estimate_runtime(query_id: str, params: dict = None, query_info: dict = None) -> dict:
+    """Estimate a query's runtime, learned from its executions where possible.
+
+    Args:
+        query_id: Query to estimate
+        params: Parameters as passed to run_parameterized_query (default
+            parameters when omitted)
+        query_info: The query's catalog entry; looked up with get_query_info when omitted
+
+    Returns:
+        dict: 'cached' and 'first_run' estimates, each with seconds,
+        seconds_low/seconds_high (80% interval, None for static values),
+        samples, confidence and source ('history' or 'static'); plus the
+        learned bytes_processed of a first run, or None
+    """
+    if query_info is None:
+        query_info = get_query_info(query_id)
+    if params is None:
+        params_config = query_info.get('parameters', {})
+        params = build_query_params(params_config, default_parameter_values(params_config))
+    static_cached = query_info.get('estimated_seconds_cached', 0)
+    static = {
+        'cached': static_cached,
+        'first_run': query_info.get('estimated_seconds_first_run', static_cached),
+    }
+
+    estimator = get_runtime_estimator()
+    result = {'bytes_processed': None}
+    for kind, static_seconds in static.items():
+        learned = estimator.estimate(query_id, params, cached=(kind == 'cached'))
+        if learned is None:
+            result[kind] = {'seconds': static_seconds, 'seconds_low': None, 'seconds_high': None,
+                            'samples': 0, 'confidence': None, 'source': 'static'}
+            continue
+        result[kind] = {**learned, 'source': 'history'}
+        if kind == 'first_run':
+            result['bytes_processed'] = result[kind].pop('bytes_processed')
+        else:
+            result[kind].pop('bytes_processed')
+    return result
+
+
+@st.cache_resource
+def get_request_log() -> RequestLog:
+    """Create the process-wide log of catalog requests (read by the prewarmer)."""
+    return RequestLog(os.getenv("REQUEST_LOG_PATH", REQUEST_LOG_PATH))
+
+
+def _record_request(query_id: str, params: dict):
+    """Log a user's request for a catalog query (canonical parameters)."""
+    if get_query_info(query_id):
+        get_request_log().record(query_id, params)
+
+
+def prewarm_targets() -> list:
+    """Return the (query_id, canonical params) pairs to prewarm, most requested first.
+
+    The PREWARM_TOP_N most frequent requests of the last PREWARM_LOG_DAYS,
+    filled up with COMMON_QUESTIONS run with their default parameters.
+    """
+    top_n = int(os.getenv("PREWARM_TOP_N", PREWARM_TOP_N))
+    since = time.time() - float(os.getenv("PREWARM_LOG_DAYS", PREWARM_LOG_DAYS)) * 86400
+    targets = [(query_id, params) for query_id, params in get_request_log().top(top_n, since)
+               if get_query_info(query_id)]
+    for query_id in COMMON_QUESTIONS:
+        if len(targets) >= top_n:
+            break
+        query_info = get_query_info(query_id)
+        params_config = query_info.get('parameters', {})
+        values = build_query_params(params_config, default_parameter_values(params_config))
+        _, params = _prepare(query_info.get('sql_template', query_info.get('sql', '')), values, query_id)
+        if (query_id, params) not in targets:
+            targets.append((query_id, params))
+    return targets
+
+
+def _prewarm_request(client, target: tuple):
+    query_id, params = target
+    query_info = get_query_info(query_id)
+    sql, params = _prepare(query_info.get('sql_template', query_info.get('sql', '')), params, query_id)
+    return sql, params, route_to_summary(client, sql, query_id)
+
+
+def _prewarm_estimate(client, target: tuple):
+    """Return the bytes prewarming ``target`` would scan, or None if it is cached."""
+    sql, params, routed = _prewarm_request(client, target)
+    if _lookup_without_job(client, routed, params, target[0], fallback_sql=sql) is not None:
+        return None
+    bytes_processed = _estimate(client, routed, params)['bytes_processed']
+    max_bytes_billed = get_query_budget(target[0])
+    if bytes_processed > max_bytes_billed:
+        raise QueryBudgetError(bytes_processed, max_bytes_billed)
+    return bytes_processed
+
+
+def _prewarm_execute(client, target: tuple):
+    sql, params, routed = _prewarm_request(client, target)
+    _execute(client, routed, params, query_id=target[0], fallback_sql=sql, page="prewarm")
+
+
+@st.cache_resource
+def get_prewarmer(_client) -> Prewarmer:
+    """Create and start the process-wide prewarmer.
+
+    Warm-up runs are queued on the shared executor under their own owner,
+    so they take turns with user queries, at most PREWARM_CONCURRENCY at once.
+    """
+    concurrency = int(os.getenv("PREWARM_CONCURRENCY", PREWARM_CONCURRENCY))
+    return Prewarmer(
+        targets=prewarm_targets,
+        estimate=lambda target: _prewarm_estimate(_client, target),
+        execute=lambda target: _prewarm_execute(_client, target),
+        submit=lambda fn, target: get_executor().submit(fn, target, owner="prewarm",
+                                                        max_running=concurrency),
+        max_bytes=int(os.getenv("PREWARM_MAX_BYTES", PREWARM_MAX_BYTES)),
+        interval_seconds=float(os.getenv("PREWARM_INTERVAL_SECONDS", PREWARM_INTERVAL_SECONDS)),
+        ready_file=os.getenv("PREWARM_READY_FILE", PREWARM_READY_FILE),
+    ).start()
+
+
+def start_prewarming(client):
+    """Start the prewarmer if PREWARM_ENABLED is on; return it, or None."""
+    enabled = os.getenv("PREWARM_ENABLED", str(PREWARM_ENABLED))
+    if enabled.strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    return get_prewarmer(client)
+
+
+def _fetch_job_telemetry(client, since) -> pd.DataFrame:
+    """Read the app's jobs created since ``since`` from INFORMATION_SCHEMA."""
+    region = os.getenv("TELEMETRY_REGION", TELEMETRY_REGION)
     job_config = bigquery.QueryJobConfig(
-        default_dataset=f"{project}.{dataset}",
-        query_parameters=query_params
+        query_parameters=[bigquery.ScalarQueryParameter("since", "TIMESTAMP", since)],
+        labels=job_labels(page="telemetry"),
     )
+    return client.query(jobs_sql(region), job_config=job_config).result().to_dataframe()
+
+
+@st.cache_resource
+def get_job_telemetry(_client) -> JobTelemetry:
+    """Create the process-wide job telemetry collector."""
+    return JobTelemetry(
+        os.getenv("TELEMETRY_PATH", TELEMETRY_PATH),
+        fetch=lambda since: _fetch_job_telemetry(_client, since),
+        interval_seconds=float(os.getenv("TELEMETRY_INTERVAL_SECONDS",
+                                         TELEMETRY_INTERVAL_SECONDS)),
+        retention_days=float(os.getenv("TELEMETRY_RETENTION_DAYS", TELEMETRY_RETENTION_DAYS)),
+    )
+
+
+def start_telemetry(client):
+    """Start the job telemetry collector if TELEMETRY_ENABLED is on; return it, or None."""
+    enabled = os.getenv("TELEMETRY_ENABLED", str(TELEMETRY_ENABLED))
+    if enabled.strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    return get_job_telemetry(client).start()
+
+
+def get_query_telemetry(client, query_id: str) -> dict:
+    """Return the collected BigQuery job statistics of a query, or None.
+
+    A row of JobTelemetry.summary() as a dict; None when telemetry is off or
+    no job of the query has been collected yet.
+    """
+    telemetry = start_telemetry(client)
+    if telemetry is None:
+        return None
+    summary = telemetry.summary(query_id)
+    return summary.iloc[0].to_dict() if not summary.empty else None
+
+
+def run_comparison(client, sql_template: str, param_sets: list, query_id: str,
+                   params_config: dict = None):
+    """Run a query for several parameter sets with a single BigQuery job.
+
+    The query runs once with parameters covering every set (union of the
+    year ranges and jurisdictions, see modules.compare) and its result is
+    split per set, so the sets share one scan and the covering result is
+    cached for later refinement. Only queries with ``param_columns`` in
+    QUERIES can be compared, and the sets may only differ in those.
+
+    Returns:
+        tuple: (list of DataFrames in set order, execution_time in seconds)
+
+    Raises:
+        ValueError: If the query or the parameter sets cannot be compared.
+    """
+    param_columns = get_query_info(query_id).get('param_columns')
+    if not param_columns:
+        raise ValueError(f"{query_id} cannot be compared: it declares no param_columns")
+
+    param_sets = [_prepare(sql_template, params, query_id, params_config)[1] for params in param_sets]
+    for params in param_sets:
+        _record_request(query_id, params)
+    covering = covering_params(param_sets, param_columns)
+    df, execution_time = run_parameterized_query(client, sql_template, covering, query_id=query_id,
+                                                 params_config=params_config, page="compare")
+    df = download_full_result(client, df, query_id=query_id)
+    return split_sets(df, param_sets, param_columns), execution_time
+
+
+def get_queue_position(run: QueryRun) -> int:
+    """Return the run's position in the shared executor queue, or None once started."""
+    return get_executor().position(run.task) if run.task is not None else None
+
+
+def cancel_run(run: QueryRun):
+    """Cancel a run, stopping its BigQuery job unless other sessions share it.
+
+    A run leads a flight per job it submitted (the sub-range jobs of an
+    incremental query, a fallback to base tables), each under its own key.
+    """
+    flights = get_single_flight()
+    shared = any(flights.waiters(key) > 0 for key in run.flight_keys)
+    run.cancel(cancel_job=not shared)
 
-    start_time = time.time()
-    result = client.query(sql_template, job_config=job_config).to_dataframe()
-    execution_time = time.time() - start_time
-    return result, execution_time
+
+def reap_abandoned_runs(max_idle: float = None):
+    """Cancel runs whose page stopped polling them (closed tab, navigated away)."""
+    max_idle = max_idle if max_idle is not None else ABANDONED_RUN_SECONDS
+    now = time.time()
+    with _RUNS_LOCK:
+        _RUNS[:] = [r for r in _RUNS if not r.done()]
+        abandoned = [r for r in _RUNS if now - r.last_polled > max_idle]
+    for run in abandoned:
+        cancel_run(run)
+
+
+def get_session_id() -> str:
+    """Return the Streamlit session id of the calling thread, or None."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
+
+def dry_run_query(client, sql_template: str, params: dict = None, query_id: str = None,
+                  params_config: dict = None) -> dict:
+    """Estimate a query's cost with a BigQuery dry run (nothing is billed).
+
+    Results are memoized per canonical SQL and parameters.
+
+    Returns:
+        dict with keys:
+            - bytes_processed: int, bytes BigQuery would scan
+            - tables: list[str], table ids referenced by the query
+            - estimated_cost_usd: float, on-demand price of the scan
+            - max_bytes_billed: int, the query's byte budget
+    """
+    sql, params = _prepare(sql_template, params, query_id, params_config)
+    estimate = dict(_estimate(client, route_to_summary(client, sql, query_id), params))
+    estimate['max_bytes_billed'] = get_query_budget(query_id)
+    return estimate
+
+
+def _check_budget(client, sql: str, params: dict, max_bytes_billed: int):
+    """Raise QueryBudgetError if the dry-run scan exceeds the budget."""
+    bytes_processed = _estimate(client, sql, params)['bytes_processed']
+    if bytes_processed > max_bytes_billed:
+        suggestion = suggest_narrower_params(client, sql, params, max_bytes_billed)
+        raise QueryBudgetError(bytes_processed, max_bytes_billed, suggestion)
+
+
+def suggest_narrower_params(client, sql: str, params: dict, max_bytes_billed: int):
+    """Find the widest year range ending at year_end that fits the budget.
+
+    Binary-searches year_start with dry runs (free, and memoized), so at
+    most ~log2(span) estimates are made.
+
+    Returns:
+        Suggested params dict including 'bytes_processed', or None if the
+        query has no year range or even a single year is over budget.
+    """
+    if params.get('year_start') is None or params.get('year_end') is None:
+        return None
+
+    year_end = params['year_end']
+    low, high = params['year_start'] + 1, year_end  # candidate year_start values
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = {**params, 'year_start': mid}
+        scanned = _estimate(client, sql, candidate)['bytes_processed']
+        if scanned <= max_bytes_billed:
+            best = {**candidate, 'bytes_processed': scanned}
+            high = mid - 1  # fits, try a wider range
+        else:
+            low = mid + 1
+    return best
+
+
+def _table_id(table: str) -> str:
+    """Return the fully qualified id of a PATSTAT table."""
+    project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
+    dataset = os.getenv("BIGQUERY_DATASET", "patstat")
+    return f"{project}.{dataset}.{table}"
+
+
+def get_patstat_edition(client) -> str:
+    """Identify the loaded PATSTAT edition by when tls201_appln was last modified."""
+    table_id = _table_id("tls201_appln")
+    versions, _ = get_table_versions().refresh(
+        [table_id], lambda table_id: _fetch_table_version(client, table_id))
+    if table_id not in versions:
+        return "unknown"
+    return versions[table_id].split("|")[0]
+
+
+@st.cache_resource(ttl=3600, max_entries=1, show_spinner=False)
+def _load_snapshot(edition: str):
+    return SnapshotBundle.load(os.getenv("SNAPSHOT_DIR", SNAPSHOT_DIR), edition)
+
+
+def get_snapshot(client):
+    """Return the snapshot bundle of the loaded PATSTAT edition, or None."""
+    return _load_snapshot(get_patstat_edition(client))
+
+
+def _lookup_snapshot(client, sql: str, params: dict):
+    """Return the snapshot result for a catalog SQL and its parameters, or None.
+
+    Bundles are keyed by the catalog SQL, not the summary-table form it
+    may be routed to, so they stay valid whichever tables are built.
+    """
+    try:
+        bundle = get_snapshot(client)
+    except Exception as e:
+        print(f"Could not load edition snapshot: {e}")
+        return None
+    return bundle.get(make_cache_key(sql, params)) if bundle is not None else None
+
+
+def get_trend_cube(client) -> TrendCube:
+    """Return the Technology Trend (DQ01) cube of the current PATSTAT edition.
+
+    Built with one scan the first time it is needed per edition, then shared
+    by all sessions. Raises QueryBudgetError / AdmissionError like any query.
+    """
+    return _build_trend_cube(client, get_patstat_edition(client))
+
+
+@st.cache_resource(max_entries=1, show_spinner="Building technology trend cube...")
+def _build_trend_cube(_client, edition: str) -> TrendCube:
+    years = DYNAMIC_QUERIES['DQ01']['parameters']['year_range']
+    params = {'jurisdictions': sorted(JURISDICTIONS),
+              'year_start': years['min'], 'year_end': years['max']}
+    df, _ = _submit_and_wait(_client, canonicalize_sql(CUBE_SQL), params, page="trends")
+    df = download_full_result(_client, df)
+    return TrendCube.from_frame(df, JURISDICTIONS, list(TECH_FIELDS),
+                                years['min'], years['max'])
+
+
+def summary_table_id(name: str) -> str:
+    """Return the fully qualified id of summary table ``name``."""
+    project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
+    dataset = os.getenv("SUMMARY_DATASET") or os.getenv("BIGQUERY_DATASET", "patstat")
+    prefix = os.getenv("SUMMARY_TABLE_PREFIX", SUMMARY_TABLE_PREFIX)
+    return f"{project}.{dataset}.{prefix}{name}"
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_summary_tables(_client, edition: str) -> dict:
+    """Return the summary tables built from ``edition``, name -> row count.
+
+    Tables that are missing or were built from another edition are left
+    out, so queries fall back to the base tables until they are rebuilt.
+    """
+    available = {}
+    for name in SUMMARY_TABLES:
+        try:
+            table = _client.get_table(summary_table_id(name))
+        except NotFound:
+            continue
+        if (table.labels or {}).get('patstat_edition') == edition_label(edition):
+            available[name] = table.num_rows
+    return available
+
+
+def route_to_summary(client, sql: str, query_id: str = None) -> str:
+    """Return the SQL to run for a catalog query: its summary-table form if one applies.
+
+    Queries with an ``aggregate`` entry in QUERIES are sent to the smallest
+    built summary table holding their dimensions and measures. Any other
+    SQL, including edited templates, is returned unchanged.
+    """
+    query_info = get_query_info(query_id)
+    aggregate = query_info.get('aggregate')
+    if not aggregate or sql != canonicalize_sql(query_info.get('sql_template', query_info.get('sql', ''))):
+        return sql
+    try:
+        available = get_summary_tables(client, get_patstat_edition(client))
+    except Exception as e:
+        print(f"Could not list summary tables: {e}")
+        return sql
+    name = find_summary(aggregate, available)
+    if name is None:
+        return sql
+    return canonicalize_sql(summary_sql(aggregate, summary_table_id(name)))
+
+
+def sketch_table_id() -> str:
+    """Return the fully qualified id of the family sketch table."""
+    project = os.getenv("BIGQUERY_PROJECT", "patstat-mtc")
+    dataset = os.getenv("SKETCH_DATASET") or os.getenv("BIGQUERY_DATASET", "patstat")
+    return f"{project}.{dataset}.{os.getenv('SKETCH_TABLE', SKETCH_TABLE)}"
+
+
+def get_family_counts(client, jurisdictions: list, tech_field: int, year_start: int,
+                      year_end: int, exact: bool = False) -> dict:
+    """Count distinct families (docdb_family_id) over a slice.
+
+    By default the HLL_COUNT sketches of the slice's (year, authority,
+    field) cells are merged from the sketch table; ``exact=True`` runs
+    COUNT(DISTINCT) over the base tables instead. ``tech_field`` None
+    counts applications of any field. Both go through the result cache.
+
+    Returns:
+        dict with keys:
+            - counts: dict jurisdiction -> family count
+            - total: families across all given jurisdictions
+            - exact: bool
+            - relative_error: standard error of the estimate (0.0 when exact)
+    """
+    sql = exact_sql(tech_field) if exact else merge_sql(sketch_table_id(), tech_field)
+    params = {'jurisdictions': sorted(jurisdictions), 'tech_field': tech_field,
+              'year_start': year_start, 'year_end': year_end}
+    df, _ = _submit_and_wait(client, canonicalize_sql(sql), params, page="trends")
+    counts, total = split_total(df)
+    precision = int(os.getenv("SKETCH_PRECISION", SKETCH_PRECISION))
+    return {
+        'counts': counts,
+        'total': total,
+        'exact': exact,
+        'relative_error': 0.0 if exact else relative_error(precision),
+    }
 
 
 def get_all_queries() -> dict:
@@ -143,6 +1334,31 @@ def get_all_queries() -> dict:
     return all_queries
 
 
+def default_parameter_values(params_config: dict) -> dict:
+    """Return the values the detail page's parameter controls start with.
+
+    Same shape as the page collects them (year_start/year_end for year
+    ranges), ready for build_query_params.
+    """
+    values = {}
+    for name, config in params_config.items():
+        param_type = config.get('type')
+        if param_type in ('year_range', 'year_picker'):
+            values['year_start'] = config.get('default_start', DEFAULT_YEAR_START)
+            values['year_end'] = config.get('default_end', DEFAULT_YEAR_END)
+        elif param_type == 'multiselect':
+            options = resolve_options(config.get('options', []))
+            defaults = config.get('defaults', options[:3] if options else [])
+            values[name] = [d for d in defaults if d in options]
+        elif param_type == 'select':
+            options = resolve_options(config.get('options', []))
+            default = config.get('defaults')
+            values[name] = default if default in options else (options[0] if options else None)
+        elif param_type == 'text':
+            values[name] = config.get('defaults', '')
+    return values
+
+
 def resolve_options(options):
     """Resolve option references to actual lists (Story 1.8).
 
@@ -0,0 +1,169 @@
+# PATSTAT Explorer - Runtime Estimates
+# Learns per-query runtime and bytes processed from recorded executions, as
+# a function of the parameters (year span, number of jurisdictions,
+# technology field), to replace the hand-typed estimated_seconds fields.
+
+import math
+import threading
+
+import numpy as np
+
+
+FEATURES = ('year_span', 'jurisdictions', 'tech_field')
+
+# Count features enter the model as logarithms: runtime and bytes grow
+# roughly in proportion to the years and offices scanned
+_LOG_FEATURES = ('year_span', 'jurisdictions')
+
+# z for a two-sided 80% interval
+_Z80 = 1.2816
+
+
+def features(params: dict) -> dict:
+    """Return the model features of a query's parameters.
+
+    Missing parameters give 0 (no year range, no jurisdiction filter, all
+    technology fields).
+    """
+    params = params or {}
+    year_span = 0
+    if params.get('year_start') is not None and params.get('year_end') is not None:
+        year_span = int(params['year_end']) - int(params['year_start']) + 1
+    jurisdictions = params.get('jurisdictions')
+    return {
+        'year_span': year_span,
+        'jurisdictions': len(jurisdictions) if isinstance(jurisdictions, (list, tuple)) else 0,
+        'tech_field': 0 if params.get('tech_field') is None else 1,
+    }
+
+
+def _design_row(feature_values: dict) -> list:
+    return [math.log(max(feature_values[name], 1)) if name in _LOG_FEATURES
+            else float(feature_values[name]) for name in FEATURES]
+
+
+def fit(samples: list, min_samples: int):
+    """Fit log(value) as a linear function of the (log count) features.
+
+    Features that do not vary across the samples are left out; with fewer
+    than two samples per coefficient only the mean is fitted.
+
+    Args:
+        samples: (features dict, value) pairs with value > 0
+        min_samples: Samples needed for a fit
+
+    Returns:
+        dict: {'features', 'coef', 'sigma', 'samples'}, or None
+    """
+    if len(samples) < min_samples:
+        return None
+    X = np.array([_design_row(f) for f, _ in samples], dtype=float)
+    y = np.log(np.array([value for _, value in samples], dtype=float))
+    varying = [i for i in range(len(FEATURES)) if np.ptp(X[:, i]) > 0]
+    if len(samples) < 2 * (len(varying) + 1):
+        varying = []
+    A = np.column_stack([np.ones(len(samples))] + [X[:, i] for i in varying])
+    coef, *_ = np.linalg.lstsq(A, y, rcond=None)
+    dof = max(len(samples) - A.shape[1], 1)
+    sigma = float(np.sqrt(np.sum((y - A @ coef) ** 2) / dof))
+    return {'features': [FEATURES[i] for i in varying], 'coef': coef.tolist(),
+            'sigma': sigma, 'samples': len(samples)}
+
+
+def predict(model: dict, feature_values: dict) -> tuple:
+    """Return (estimate, low, high) of a fitted model; low/high bound an 80% interval."""
+    row = dict(zip(FEATURES, _design_row(feature_values)))
+    log_value = model['coef'][0] + sum(
+        coef * row[name] for coef, name in zip(model['coef'][1:], model['features']))
+    spread = _Z80 * model['sigma'] * math.sqrt(1 + 1 / model['samples'])
+    return math.exp(log_value), math.exp(log_value - spread), math.exp(log_value + spread)
+
+
+def confidence(model: dict) -> str:
+    """Rate a model 'high', 'medium' or 'low' by sample count and residual spread."""
+    if model['samples'] >= 20 and model['sigma'] < 0.3:
+        return 'high'
+    if model['samples'] >= 8 and model['sigma'] < 0.6:
+        return 'medium'
+    return 'low'
+
+
+class RuntimeEstimator:
+    """Learn per-query runtime and bytes models from recorded executions.
+
+    Runtimes of BigQuery cache hits and of jobs that scanned the tables are
+    modelled separately. Models are refitted lazily after new executions.
+
+    Args:
+        log: RequestLog holding the execution history
+        min_samples: Executions of a query needed before its history is used
+        max_samples: Only the newest executions of a query are fitted
+    """
+
+    def __init__(self, log, min_samples: int = 3, max_samples: int = 200):
+        self.log = log
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._history = None
+        self._models = {}
+
+    def record(self, query_id: str, params: dict, seconds: float, bytes_processed: int,
+               cache_hit: bool):
+        """Record one finished job."""
+        entry = {'query_id': query_id, 'features': features(params), 'seconds': seconds,
+                 'bytes': int(bytes_processed or 0), 'cache_hit': bool(cache_hit)}
+        self.log.append(entry)
+        with self._lock:
+            if self._history is not None:
+                entries = self._history.setdefault(query_id, [])
+                entries.append(entry)
+                del entries[:-4 * self.max_samples]  # Room for cache hits and first runs
+            self._models = {k: v for k, v in self._models.items() if k[0] != query_id}
+
+    def estimate(self, query_id: str, params: dict, cached: bool = False) -> dict:
+        """Predict the runtime (and, for first runs, the bytes) of a query.
+
+        Args:
+            query_id: Query to estimate
+            params: Its parameters (features are derived from them)
+            cached: Estimate a BigQuery cache hit instead of a first run
+
+        Returns:
+            dict: seconds, seconds_low, seconds_high (80% interval),
+            bytes_processed (None for cache hits), samples and confidence;
+            None without enough history
+        """
+        seconds_model = self._model(query_id, 'cached' if cached else 'seconds')
+        if seconds_model is None:
+            return None
+        values = features(params)
+        seconds, low, high = predict(seconds_model, values)
+        bytes_model = None if cached else self._model(query_id, 'bytes')
+        return {
+            'seconds': seconds, 'seconds_low': low, 'seconds_high': high,
+            'bytes_processed': int(predict(bytes_model, values)[0]) if bytes_model else None,
+            'samples': seconds_model['samples'], 'confidence': confidence(seconds_model),
+        }
+
+    def _model(self, query_id: str, target: str):
+        with self._lock:
+            key = (query_id, target)
+            if key not in self._models:
+                if self._history is None:
+                    self._history = {}
+                    for entry in self.log.entries():
+                        if 'seconds' in entry:
+                            self._history.setdefault(entry['query_id'], []).append(entry)
+                self._models[key] = fit(self._samples(query_id, target), self.min_samples)
+            return self._models[key]
+
+    def _samples(self, query_id: str, target: str) -> list:
+        entries = self._history.get(query_id, [])
+        if target == 'cached':
+            samples = [(e['features'], e['seconds']) for e in entries if e['cache_hit']]
+        elif target == 'seconds':
+            samples = [(e['features'], e['seconds']) for e in entries if not e['cache_hit']]
+        else:
+            samples = [(e['features'], e['bytes']) for e in entries if not e['cache_hit']]
+        return [(f, value) for f, value in samples if value > 0][-self.max_samples:]
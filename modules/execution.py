@@ -0,0 +1,422 @@
+# PATSTAT Explorer - Execution Primitives
+# Process-wide coordination of warehouse calls shared by all Streamlit sessions
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+
+class _Flight:
+    """A call in progress and the callers waiting on it."""
+
+    def __init__(self, label: str = None):
+        self.future = Future()
+        self.label = label
+        self.waiters = 0
+        self.started_at = time.time()
+
+
+class SingleFlight:
+    """Deduplicate identical concurrent calls.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it runs wait for that result instead of starting their
+    own. Completed flights are kept in a bounded history with the number of
+    waiters that joined them, so the savings can be reported.
+    """
+
+    def __init__(self, history_size: int = 200):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._history = deque(maxlen=history_size)
+        self._totals = {"flights": 0, "joined": 0}
+
+    def do(self, key: str, fn, label: str = None):
+        """Run ``fn()`` once per key among concurrent callers.
+
+        Args:
+            key: Fingerprint identifying equivalent calls
+            fn: Zero-argument callable doing the work
+            label: Human-readable name for stats (e.g. the query id)
+
+        Returns:
+            tuple: (result, shared) where shared is True if this caller
+            joined a flight started by someone else
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(label)
+                self._inflight[key] = flight
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            return flight.future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.future.set_exception(e)
+            raise
+        else:
+            flight.future.set_result(result)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                self._totals["flights"] += 1
+                self._totals["joined"] += flight.waiters
+                self._history.append({
+                    "key": key,
+                    "label": flight.label,
+                    "waiters": flight.waiters,
+                    "duration": time.time() - flight.started_at,
+                })
+        return result, False
+
+    def waiters(self, key: str) -> int:
+        """Return how many callers are waiting on the flight for ``key``."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            return flight.waiters if flight else 0
+
+    def in_flight(self) -> int:
+        """Return the number of calls currently running."""
+        with self._lock:
+            return len(self._inflight)
+
+    def stats(self) -> dict:
+        """Return totals and the most recent flights that had waiters."""
+        with self._lock:
+            return {
+                "flights": self._totals["flights"],
+                "joined": self._totals["joined"],
+                "in_flight": len(self._inflight),
+                "shared_flights": [h for h in self._history if h["waiters"]],
+            }
+
+
+_NO_OWNER = object()  # No queued task may start yet
+
+
+class AdmissionError(Exception):
+    """Raised when a query is not admitted (session quota or queue too long)."""
+
+
+class FairExecutor:
+    """Bounded thread pool with one FIFO queue per owner, served round-robin.
+
+    Owners are Streamlit sessions: a session that queues many tasks cannot
+    starve others, because workers take one task per owner in turn, and at
+    most ``max_per_owner`` tasks of one owner run at the same time (a task
+    may raise that limit for itself, e.g. a dashboard's batch). Queue depth,
+    wait and run times are tracked for display and admission control.
+    """
+
+    def __init__(self, max_workers: int, max_per_owner: int = None, history_size: int = 200):
+        self.max_workers = max_workers
+        self.max_per_owner = max_per_owner
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()  # owner -> deque of (future, fn, args, enqueued_at, max_running)
+        self._running = 0
+        self._running_by_owner = {}
+        self._waits = deque(maxlen=history_size)
+        self._durations = deque(maxlen=history_size)
+        self._workers = []
+
+    def submit(self, fn, *args, owner: str = None, max_running: int = None) -> Future:
+        """Queue ``fn(*args)`` for ``owner`` and return a Future for its result.
+
+        ``max_running`` replaces ``max_per_owner`` for this task: it starts
+        while fewer than that many tasks of the owner are running.
+        """
+        future = Future()
+        with self._cond:
+            self._queues.setdefault(owner, deque()).append((future, fn, args, time.time(), max_running))
+            idle = len(self._workers) - self._running
+            if len(self._workers) < self.max_workers and self._queued() > idle:
+                worker = threading.Thread(target=self._work, daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        return future
+
+    def position(self, future: Future) -> int:
+        """Return how many tasks will start before ``future`` (0 = next), or None."""
+        with self._cond:
+            # Round-robin order: round r takes the r-th task of every owner in turn
+            order = []
+            queues = list(self._queues.values())
+            for r in range(max((len(q) for q in queues), default=0)):
+                order.extend(q[r][0] for q in queues if len(q) > r)
+            return order.index(future) if future in order else None
+
+    def _queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _eligible_owner(self):
+        """First owner in rotation that is below its running limit, or _NO_OWNER."""
+        for owner, queue in self._queues.items():
+            limit = queue[0][4] if queue[0][4] is not None else self.max_per_owner
+            if limit is None or owner is None or self._running_by_owner.get(owner, 0) < limit:
+                return owner
+        return _NO_OWNER
+
+    def _next_task(self, owner):
+        queue = self._queues.pop(owner)
+        task = queue.popleft()
+        if queue:
+            self._queues[owner] = queue  # re-append: owner goes to the back
+        return task
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while (owner := self._eligible_owner()) is _NO_OWNER:
+                    self._cond.wait()
+                future, fn, args, enqueued_at, _ = self._next_task(owner)
+                self._running += 1
+                self._running_by_owner[owner] = self._running_by_owner.get(owner, 0) + 1
+                self._waits.append(time.time() - enqueued_at)
+
+            started_at = time.time()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+                self._durations.append(time.time() - started_at)
+
+            with self._cond:
+                self._running -= 1
+                self._running_by_owner[owner] -= 1
+                if not self._running_by_owner[owner]:
+                    del self._running_by_owner[owner]
+                self._cond.notify_all()  # An owner may have dropped below its limit
+
+    def owner_load(self, owner: str) -> int:
+        """Return queued (not cancelled) plus running tasks of ``owner``."""
+        with self._cond:
+            queued = sum(1 for task in self._queues.get(owner, ()) if not task[0].cancelled())
+            return queued + self._running_by_owner.get(owner, 0)
+
+    def estimated_wait(self) -> float:
+        """Estimate how long a task submitted now waits before it starts.
+
+        Queued tasks ahead, spread over the workers, times the average run
+        time of recent tasks. 0 until there is history.
+        """
+        with self._cond:
+            if not self._durations:
+                return 0.0
+            avg_run = sum(self._durations) / len(self._durations)
+            ahead = self._queued() + self._running - self.max_workers + 1
+            return max(ahead, 0) * avg_run / self.max_workers
+
+    def stats(self) -> dict:
+        """Return worker, queue depth and wait time figures."""
+        with self._cond:
+            waits = list(self._waits)
+            durations = list(self._durations)
+            return {
+                "max_workers": self.max_workers,
+                "max_per_owner": self.max_per_owner,
+                "running": self._running,
+                "running_by_owner": dict(self._running_by_owner),
+                "queued": self._queued(),
+                "queued_by_owner": {o: len(q) for o, q in self._queues.items()},
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait": max(waits, default=0.0),
+                "avg_run": sum(durations) / len(durations) if durations else 0.0,
+            }
+
+
+class AdmissionController:
+    """Decide whether a session may queue another query.
+
+    Rejects when the session already has ``max_per_session`` queries queued
+    or running, or when the executor's estimated queue wait exceeds
+    ``max_wait`` seconds. Admitted queries are queued in the executor, which
+    limits how many of a session's queries run at once.
+    """
+
+    def __init__(self, executor: FairExecutor, max_per_session: int, max_wait: float):
+        self.executor = executor
+        self.max_per_session = max_per_session
+        self.max_wait = max_wait
+        self._rejected = 0
+
+    def admit(self, session_id: str, count: int = 1):
+        """Raise AdmissionError if the session's ``count`` queries cannot be accepted now.
+
+        A batch (``count`` > 1) is admitted or rejected as a whole.
+        """
+        load = self.executor.owner_load(session_id) if session_id is not None else 0
+        if session_id is not None and load + count > self.max_per_session:
+            self._rejected += 1
+            if count > 1:
+                raise AdmissionError(
+                    f"These {count} queries exceed your limit of {self.max_per_session} "
+                    f"queued or running queries ({load} in progress)."
+                )
+            raise AdmissionError(
+                f"You already have {self.max_per_session} queries queued or running. "
+                "Wait for one to finish or cancel it."
+            )
+        wait = self.executor.estimated_wait()
+        if wait > self.max_wait:
+            self._rejected += 1
+            raise AdmissionError(
+                f"The service is busy (estimated queue wait {wait:.0f}s). "
+                "Please try again in a minute."
+            )
+
+    def stats(self) -> dict:
+        return {"rejected": self._rejected, "estimated_wait": self.executor.estimated_wait()}
+
+
+class QueryRun:
+    """Handle for a query executing in the background.
+
+    The worker attaches the BigQuery job as soon as it is submitted, so the
+    UI can poll its progress and cancel it while the result is still being
+    computed or downloaded.
+    """
+
+    def __init__(self, label: str = None, key: str = None, owner: str = None):
+        self.label = label
+        self.key = key
+        self.owner = owner
+        self.job = None
+        self.flight_keys = []  # SingleFlight keys of the jobs this run submitted
+        self.rows_downloaded = 0
+        self.total_rows = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.last_polled = time.time()
+        self._future = Future()
+        self._cancelled = False
+        self._task = None
+
+    def start(self, fn, executor: FairExecutor = None, max_running: int = None):
+        """Run ``fn()`` on ``executor`` (or a daemon thread); its return value becomes the result.
+
+        ``max_running`` is passed to FairExecutor.submit.
+        """
+        if executor is not None:
+            self._task = executor.submit(self._run, fn, owner=self.owner, max_running=max_running)
+        else:
+            threading.Thread(target=self._run, args=(fn,), daemon=True).start()
+        return self
+
+    def resolve(self, result):
+        """Finish the run with ``result`` without executing anything (e.g. a cache hit)."""
+        self._finish(result=result)
+        return self
+
+    def _run(self, fn):
+        if self._cancelled:
+            return  # Cancelled while queued, never submitted
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(exception=e)
+        else:
+            self._finish(result=result)
+
+    def _finish(self, result=None, exception=None):
+        self.finished_at = time.time()
+        if self._future.done():
+            return
+        if exception is not None:
+            self._future.set_exception(exception)
+        else:
+            self._future.set_result(result)
+
+    @property
+    def task(self) -> Future:
+        """Executor future of the run, None when started on its own thread."""
+        return self._task
+
+    def attach_job(self, job, flight_key: str = None):
+        """Record the BigQuery job; cancels it at once if the run was cancelled.
+
+        ``flight_key`` is the SingleFlight key of the flight the job runs for.
+        """
+        self.job = job
+        if flight_key is not None:
+            self.flight_keys.append(flight_key)
+        if self._cancelled:
+            self._cancel_job()
+
+    def report_download(self, rows_downloaded: int, total_rows: int):
+        """Record result download progress (called by the worker)."""
+        self.rows_downloaded = rows_downloaded
+        self.total_rows = total_rows
+
+    def done(self) -> bool:
+        return self._cancelled or self._future.done()
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def result(self, timeout: float = None):
+        """Block until the run finishes and return its result."""
+        return self._future.result(timeout)
+
+    def cancel(self, cancel_job: bool = True):
+        """Stop waiting for the run and, if ``cancel_job``, cancel the BigQuery job.
+
+        Pass ``cancel_job=False`` when other callers share the job.
+        """
+        self._cancelled = True
+        if self._task is not None:
+            self._task.cancel()  # Drops it from the queue if not started yet
+        if cancel_job:
+            self._cancel_job()
+
+    def _cancel_job(self):
+        if self.job is not None and not self.job.done():
+            try:
+                self.job.cancel()
+            except Exception as e:
+                print(f"Could not cancel job {getattr(self.job, 'job_id', '?')}: {e}")
+
+    def progress(self) -> dict:
+        """Poll the job and summarize its progress.
+
+        Returns:
+            dict with state, elapsed seconds, completed/total stages,
+            records read so far, bytes processed (once BigQuery reports it)
+            and rows downloaded / total rows of the result
+        """
+        self.last_polled = time.time()
+        progress = {
+            "state": "PENDING",
+            "elapsed": (self.finished_at or time.time()) - self.submitted_at,
+            "stages_done": 0,
+            "stages_total": 0,
+            "records_read": 0,
+            "bytes_processed": None,
+            "rows_downloaded": self.rows_downloaded,
+            "total_rows": self.total_rows,
+        }
+        if self.job is None:
+            return progress
+
+        try:
+            self.job.reload()
+        except Exception:
+            pass  # Keep last known state; the worker reports real failures
+
+        plan = self.job.query_plan or []
+        progress.update({
+            "state": self.job.state,
+            "stages_done": sum(1 for s in plan if s.status == "COMPLETE"),
+            "stages_total": len(plan),
+            "records_read": sum(s.records_read or 0 for s in plan),
+            "bytes_processed": self.job.total_bytes_processed,
+        })
+        return progress
@@ -6,7 +6,10 @@ import streamlit as st
 import pandas as pd
 
 from queries_bq import QUERIES
-from .config import PATSTAT_SYSTEM_PROMPT
+from .config import (
+    PATSTAT_SYSTEM_PROMPT,
+    DEFAULT_YEAR_START, DEFAULT_YEAR_END, DEFAULT_JURISDICTIONS
+)
 from .abra_q_client import get_abraq_client, is_abraq_available
 
 
@@ -53,6 +56,42 @@ def filter_queries(queries: dict, search_term: str = None, category: str = None,
     return filtered
 
 
+def build_query_params(params_config: dict, collected_params: dict) -> dict:
+    """Build the parameter dict for run_parameterized_query from UI values (Story 1.8).
+
+    Only parameters declared in the query's ``parameters`` schema are included.
+    """
+    params = {}
+    if 'year_range' in params_config:
+        params['year_start'] = collected_params.get('year_start', DEFAULT_YEAR_START)
+        params['year_end'] = collected_params.get('year_end', DEFAULT_YEAR_END)
+    if 'jurisdictions' in params_config:
+        jurisdictions = collected_params.get('jurisdictions', DEFAULT_JURISDICTIONS)
+        params['jurisdictions'] = jurisdictions if jurisdictions else None
+    if 'tech_field' in params_config:
+        params['tech_field'] = collected_params.get('tech_field')
+    if 'tech_sector' in params_config:
+        params['tech_sector'] = collected_params.get('tech_sector')
+    if 'applicant_name' in params_config:
+        params['applicant_name'] = collected_params.get('applicant_name', '')
+    if 'competitors' in params_config:
+        params['competitors'] = collected_params.get('competitors')
+    if 'ipc_class' in params_config:
+        params['ipc_class'] = collected_params.get('ipc_class', '')
+    # Classification query parameters (Q54-Q58)
+    if 'classification_symbol' in params_config:
+        params['classification_symbol'] = collected_params.get('classification_symbol', '')
+    if 'keyword' in params_config:
+        params['keyword'] = collected_params.get('keyword', '')
+    if 'modification_type' in params_config:
+        params['modification_type'] = collected_params.get('modification_type')
+    if 'parent_symbol' in params_config:
+        params['parent_symbol'] = collected_params.get('parent_symbol', '')
+    if 'system' in params_config:
+        params['system'] = collected_params.get('system')
+    return params
+
+
 def generate_insight_headline(df, query_info):
     """Generate an insight headline based on query results (Story 1.4).
 
@@ -0,0 +1,119 @@
+# PATSTAT Explorer - Query Plans
+# Captures the execution plan and timeline of a finished BigQuery job as
+# plain data (stored with its result), and points out the stages worth
+# fixing: the heaviest reads, shuffles and aggregations, skewed stages and
+# repartitions.
+
+from .utils import format_bytes, format_time
+
+
+def _number(value) -> int:
+    """Return a plan statistic as int (None and non-numeric values give 0)."""
+    return int(value) if isinstance(value, (int, float)) else 0
+
+
+def stage_kind(name: str) -> str:
+    """Return the kind of a stage from its name ('S02: Join+' -> 'join')."""
+    label = name.split(":", 1)[-1].strip().rstrip("+").lower()
+    return label or "stage"
+
+
+def summarize_plan(job, skew_ratio: float = 5.0, skew_min_ms: int = 1000) -> dict:
+    """Capture the query plan and timeline of a finished job.
+
+    A stage is skewed when its slowest worker computed at least
+    ``skew_ratio`` times as long as the average one, and for at least
+    ``skew_min_ms``.
+
+    Returns:
+        dict: job_id, total_slot_ms, stages (one dict per stage, in plan
+        order), timeline (one dict per sample) and findings (see
+        plan_findings); None when the job has no plan
+    """
+    stages = []
+    for entry in job.query_plan or []:
+        compute_avg, compute_max = _number(entry.compute_ms_avg), _number(entry.compute_ms_max)
+        start, end = entry.start, entry.end
+        stages.append({
+            'id': str(entry.entry_id),
+            'name': entry.name or "",
+            'kind': stage_kind(entry.name or ""),
+            'status': entry.status,
+            'slot_ms': _number(entry.slot_ms),
+            'duration_ms': int((end - start).total_seconds() * 1000) if start and end else 0,
+            'records_read': _number(entry.records_read),
+            'records_written': _number(entry.records_written),
+            'shuffle_output_bytes': _number(entry.shuffle_output_bytes),
+            'shuffle_spilled_bytes': _number(entry.shuffle_output_bytes_spilled),
+            'parallel_inputs': _number(entry.parallel_inputs),
+            'compute_ms_avg': compute_avg,
+            'compute_ms_max': compute_max,
+            'wait_ms_max': _number(entry.wait_ms_max),
+            'input_stages': [str(s) for s in entry.input_stages or []],
+            'steps': [step.kind for step in entry.steps or []],
+            'skew': round(compute_max / compute_avg, 1) if compute_avg else None,
+        })
+    if not stages:
+        return None
+    for stage in stages:
+        stage['skewed'] = bool(stage['skew'] and stage['skew'] >= skew_ratio
+                               and stage['compute_ms_max'] >= skew_min_ms)
+        stage['repartition'] = stage['kind'] == 'repartition'
+
+    timeline = [{
+        'elapsed_ms': _number(sample.elapsed_ms),
+        'active_units': _number(sample.active_units),
+        'pending_units': _number(sample.pending_units),
+        'completed_units': _number(sample.completed_units),
+        'slot_millis': _number(sample.slot_millis),
+    } for sample in job.timeline or []]
+
+    total_slot_ms = _number(job.slot_millis) or sum(s['slot_ms'] for s in stages)
+    plan = {'job_id': str(job.job_id), 'total_slot_ms': total_slot_ms, 'stages': stages,
+            'timeline': timeline}
+    plan['findings'] = plan_findings(plan)
+    return plan
+
+
+def plan_findings(plan: dict) -> list:
+    """Describe the stages of a captured plan that are worth fixing.
+
+    Returns:
+        list: {'text', 'warning'} dicts; skew, repartitions and spills to
+        disk are warnings, the heaviest stages informational
+    """
+    stages = plan['stages']
+    total_slot_ms = plan['total_slot_ms'] or 1
+    findings = []
+
+    def add(text: str, warning: bool = False):
+        findings.append({'text': text, 'warning': warning})
+
+    heaviest = max(stages, key=lambda s: s['slot_ms'])
+    if heaviest['slot_ms'] and len(stages) > 1:
+        add(f"{heaviest['name']} used {heaviest['slot_ms'] / total_slot_ms:.0%} of the slot "
+            f"time ({format_time(heaviest['slot_ms'] / 1000)}).")
+
+    reader = max(stages, key=lambda s: s['records_read'])
+    if reader['records_read'] and reader is not heaviest:
+        add(f"{reader['name']} read the most records ({reader['records_read']:,}).")
+
+    shuffler = max(stages, key=lambda s: s['shuffle_output_bytes'])
+    if shuffler['shuffle_output_bytes']:
+        text = (f"{shuffler['name']} shuffled the most data "
+                f"({format_bytes(shuffler['shuffle_output_bytes'])})")
+        spilled = shuffler['shuffle_spilled_bytes']
+        if spilled:
+            text += f", {format_bytes(spilled)} spilled to disk"
+        add(text + ".", warning=bool(spilled))
+
+    for stage in stages:
+        if stage['skewed']:
+            add(f"{stage['name']} is skewed: its slowest worker took {stage['skew']:g}x the "
+                f"average ({format_time(stage['compute_ms_max'] / 1000)} vs. "
+                f"{format_time(stage['compute_ms_avg'] / 1000)}); a few keys hold most rows.",
+                warning=True)
+        if stage['repartition']:
+            add(f"{stage['name']} repartitioned the data mid-query; the previous stage "
+                f"produced partitions too large to process.", warning=True)
+    return findings
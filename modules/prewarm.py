@@ -0,0 +1,206 @@
+# PATSTAT Explorer - Cache Prewarming
+# A log of the catalog requests users make, and a background prewarmer that
+# runs the most requested ones at startup and on a schedule, so the first
+# users after a deploy or restart find their results cached.
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+
+class RequestLog:
+    """Append-only JSON-lines log of (query id, canonical parameters) requests.
+
+    The file is compacted to its newest ``max_entries`` lines once it holds
+    twice as many. ``append`` logs arbitrary entries, e.g. the executions
+    the runtime estimator learns from.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._lines = None
+
+    def record(self, query_id: str, params: dict):
+        """Append one request."""
+        self.append({'query_id': query_id, 'params': params})
+
+    def append(self, entry: dict):
+        """Append one entry (a JSON-serializable dict), stamped with ``at``."""
+        line = json.dumps({**entry, 'at': time.time()}, sort_keys=True, default=str)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if self._lines is None:
+                    self._lines = len(self._read())
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._lines += 1
+                if self._lines >= 2 * self.max_entries:
+                    self._compact()
+            except OSError as e:
+                print(f"Could not write {self.path}: {e}")
+
+    def top(self, n: int, since: float = None) -> list:
+        """Return the ``n`` most requested (query_id, params) pairs, most frequent first.
+
+        Only requests made after ``since`` (epoch seconds) count.
+        """
+        entries = self.entries()
+        counts = Counter()
+        requests = {}
+        for entry in entries:
+            if since is not None and entry.get('at', 0) < since:
+                continue
+            key = json.dumps([entry['query_id'], entry['params']], sort_keys=True)
+            counts[key] += 1
+            requests[key] = (entry['query_id'], entry['params'])
+        return [requests[key] for key, _ in counts.most_common(n)]
+
+    def entries(self) -> list:
+        """Return all logged entries, oldest first."""
+        with self._lock:
+            return self._read()
+
+    def _read(self) -> list:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # Torn write
+        return entries
+
+    def _compact(self):
+        entries = self._read()[-self.max_entries:]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, sort_keys=True, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+        self._lines = len(entries)
+
+
+class Prewarmer:
+    """Run warm-up requests in the background, at startup and then periodically.
+
+    Args:
+        targets: Callable returning the (query_id, params) pairs to warm
+        estimate: Callable(target) returning the bytes a run would scan,
+            or None when its result is already cached
+        execute: Callable(target) that runs the query into the result cache
+        submit: Callable(fn, target) returning a Future; bounds concurrency
+        max_bytes: Estimated bytes one warm-up cycle may scan
+        interval_seconds: Time between cycles
+        ready_file: Written with the status once the first cycle completes,
+            for readiness probes
+
+    ``ready`` is set once the first cycle has completed.
+    """
+
+    def __init__(self, targets, estimate, execute, submit, max_bytes: int,
+                 interval_seconds: float, ready_file: str = None):
+        self.targets = targets
+        self.estimate = estimate
+        self.execute = execute
+        self.submit = submit
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.ready_file = ready_file
+        self.ready = threading.Event()
+        self._status = {'state': 'starting', 'cycles': 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread (once)."""
+        if self._thread is None:
+            if self.ready_file and os.path.exists(self.ready_file):
+                os.remove(self.ready_file)  # Left by a previous process
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        """Return the state ('starting', 'warming', 'ready') and counts of the last cycle."""
+        with self._lock:
+            return dict(self._status)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except Exception as e:
+                print(f"Prewarm cycle failed: {e}")
+                self._update(state='ready', error=str(e))
+            if not self.ready.is_set():
+                self._write_ready_file()
+                self.ready.set()
+            self._stop.wait(self.interval_seconds)
+
+    def run_cycle(self) -> dict:
+        """Warm every target not cached yet, within the byte budget.
+
+        Targets are estimated one after the other and submitted while the
+        budget lasts; the cycle ends when all submitted runs have finished.
+        """
+        targets = self.targets()
+        counts = {'total': len(targets), 'warmed': 0, 'cached': 0, 'skipped': 0, 'failed': 0,
+                  'bytes_processed': 0}
+        self._update(state='warming' if not self.ready.is_set() else 'ready',
+                     started_at=time.time(), **counts)
+
+        futures = []
+        for target in targets:
+            try:
+                bytes_processed = self.estimate(target)
+            except Exception as e:
+                print(f"Prewarm of {target[0]} skipped: {e}")
+                counts['failed'] += 1
+                continue
+            if bytes_processed is None:
+                counts['cached'] += 1
+            elif counts['bytes_processed'] + bytes_processed > self.max_bytes:
+                counts['skipped'] += 1
+            else:
+                counts['bytes_processed'] += bytes_processed
+                futures.append((target, self.submit(self.execute, target)))
+
+        for target, future in futures:
+            try:
+                future.result()
+                counts['warmed'] += 1
+            except Exception as e:
+                print(f"Prewarm of {target[0]} failed: {e}")
+                counts['failed'] += 1
+
+        with self._lock:
+            cycles = self._status.get('cycles', 0) + 1
+        self._update(state='ready', finished_at=time.time(), cycles=cycles, **counts)
+        return counts
+
+    def _update(self, **fields):
+        with self._lock:
+            self._status.update(fields)
+
+    def _write_ready_file(self):
+        if not self.ready_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ready_file) or ".", exist_ok=True)
+            with open(self.ready_file, "w", encoding="utf-8") as f:
+                json.dump(self.status(), f, sort_keys=True)
+        except OSError as e:
+            print(f"Could not write {self.ready_file}: {e}")
@@ -0,0 +1,51 @@
+# PATSTAT Explorer - Local Refinement
+# Answer a query from a cached result of the same query run with broader
+# parameters, by filtering on the columns the parameters map to.
+
+import pandas as pd
+
+
+def covers(held: dict, wanted: dict, param_columns: dict) -> bool:
+    """Return True if a result for ``held`` params contains the rows for ``wanted``.
+
+    Args:
+        held: Canonical parameters of the cached result
+        wanted: Canonical parameters of the new request
+        param_columns: The query's ``param_columns`` mapping of parameter
+            names (``year_range`` for year_start/year_end) to result columns
+
+    Mapped year ranges must lie within the held range and mapped list
+    parameters must be subsets; all other parameters must be equal.
+    """
+    if held.keys() != wanted.keys():
+        return False
+
+    for name, value in wanted.items():
+        if name in ('year_start', 'year_end') and 'year_range' in param_columns:
+            continue
+        if name in param_columns and isinstance(value, list) and isinstance(held[name], list):
+            if not set(value) <= set(held[name]):
+                return False
+        elif held[name] != value:
+            return False
+
+    if 'year_range' in param_columns and 'year_start' in wanted:
+        if None in (held['year_start'], held['year_end'], wanted['year_start'], wanted['year_end']):
+            return held['year_start'] == wanted['year_start'] and held['year_end'] == wanted['year_end']
+        return held['year_start'] <= wanted['year_start'] and wanted['year_end'] <= held['year_end']
+    return True
+
+
+def refine(df: pd.DataFrame, wanted: dict, param_columns: dict) -> pd.DataFrame:
+    """Filter a covering result down to the rows selected by ``wanted``.
+
+    Row order is kept, so the query's ORDER BY still holds.
+    """
+    mask = pd.Series(True, index=df.index)
+    for name, column in param_columns.items():
+        if name == 'year_range':
+            years = df[column]
+            mask &= (years >= wanted['year_start']) & (years <= wanted['year_end'])
+        elif isinstance(wanted.get(name), list):
+            mask &= df[column].isin(wanted[name])
+    return df[mask.fillna(False).astype(bool)].reset_index(drop=True)
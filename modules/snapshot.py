@@ -0,0 +1,87 @@
+# PATSTAT Explorer - Edition Snapshots
+# Versioned Parquet bundles of catalog results precomputed for one PATSTAT
+# edition, served instead of running the query when the parameters match.
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .summaries import edition_label
+
+MANIFEST = "manifest.json"
+
+
+def bundle_dir(directory: str, edition: str) -> str:
+    """Return the directory of the snapshot bundle for ``edition``."""
+    return os.path.join(directory, edition_label(edition))
+
+
+class SnapshotBundle:
+    """Catalog results of one PATSTAT edition, keyed like the result cache.
+
+    A bundle is a directory holding one Parquet file per result and a
+    ``manifest.json`` listing the edition, when it was built, and per key
+    the query id, canonical parameters, row count and file name. Results
+    are read from disk the first time they are requested.
+    """
+
+    def __init__(self, path: str, edition: str, created: float = None, entries: dict = None):
+        self.path = path
+        self.edition = edition
+        self.created = created if created is not None else time.time()
+        self.entries = entries if entries is not None else {}
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str, edition: str):
+        """Load the bundle for ``edition`` from ``directory``, or None if there is none."""
+        path = bundle_dir(directory, edition)
+        try:
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('edition') != edition:
+            return None
+        return cls(path, edition, manifest.get('created'), manifest.get('entries', {}))
+
+    def get(self, key: str):
+        """Return the result stored under ``key``, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            df = self._frames.get(key)
+            if df is None:
+                try:
+                    df = pd.read_parquet(os.path.join(self.path, entry['file']))
+                except OSError as e:
+                    print(f"Could not read snapshot result {entry['file']}: {e}")
+                    return None
+                self._frames[key] = df
+        df = df.copy(deep=False)
+        df.attrs = {'snapshot': self.edition}
+        return df
+
+    def add(self, key: str, df: pd.DataFrame, query_id: str, params: dict):
+        """Write one result into the bundle directory."""
+        os.makedirs(self.path, exist_ok=True)
+        file_name = f"{key}.parquet"
+        df = df.copy(deep=False)
+        df.attrs = {}
+        df.to_parquet(os.path.join(self.path, file_name), index=False)
+        self.entries[key] = {'query_id': query_id, 'params': params,
+                             'rows': len(df), 'file': file_name}
+
+    def save(self):
+        """Write the manifest, making the bundle visible to the app."""
+        os.makedirs(self.path, exist_ok=True)
+        manifest = {'edition': self.edition, 'created': self.created, 'entries': self.entries}
+        tmp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True, default=str)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
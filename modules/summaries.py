@@ -0,0 +1,123 @@
+# PATSTAT Explorer - Summary Tables
+# Declarative aggregate tables built from the PATSTAT base tables, and the
+# matching that routes catalog queries to them.
+#
+# A QUERIES entry opts in with an "aggregate" entry naming the dimensions it
+# groups or filters on, the measures it reads, and an equivalent SQL written
+# against {source}. Any summary table holding those dimensions and measures
+# can answer it; the one with the fewest rows is used.
+
+import re
+
+# Measures must be additive over the dimensions (COUNT, COUNTIF, SUM, or
+# COUNT(DISTINCT) of a key that falls into exactly one cell), so queries
+# re-aggregate them with SUM at any coarser grain.
+SUMMARY_TABLES = {
+    'appln_auth_year': {
+        'description': "Applications per filing authority and filing year",
+        'from': "tls201_appln a",
+        'dimensions': {
+            'appln_auth': "a.appln_auth",
+            'appln_filing_year': "a.appln_filing_year",
+        },
+        'measures': {
+            'applications': "COUNT(*)",
+            'granted_applications': "COUNTIF(a.granted = 'Y')",
+        },
+    },
+    'appln_auth_year_field': {
+        'description': "Applications per filing authority, filing year and primary WIPO field",
+        'from': "tls201_appln a JOIN tls230_appln_techn_field atf ON a.appln_id = atf.appln_id",
+        'where': "atf.weight > 0.5",
+        'dimensions': {
+            'appln_auth': "a.appln_auth",
+            'appln_filing_year': "a.appln_filing_year",
+            'techn_field_nr': "atf.techn_field_nr",
+        },
+        'measures': {
+            'field_applications': "COUNT(DISTINCT a.appln_id)",
+            'family_size_sum': "SUM(a.docdb_family_size)",
+            'family_size_count': "COUNT(a.docdb_family_size)",
+            'citing_families_sum': "SUM(a.nb_citing_docdb_fam)",
+            'citing_families_count': "COUNT(a.nb_citing_docdb_fam)",
+        },
+    },
+    'ipc_subclass_auth_year': {
+        'description': "IPC assignments per filing authority, filing year and IPC subclass",
+        'from': "tls209_appln_ipc ipc JOIN tls201_appln a ON ipc.appln_id = a.appln_id",
+        'dimensions': {
+            'appln_auth': "a.appln_auth",
+            'appln_filing_year': "a.appln_filing_year",
+            'ipc_subclass': "SUBSTR(ipc.ipc_class_symbol, 1, 4)",
+        },
+        'measures': {
+            'ipc_assignments': "COUNT(*)",
+            'ipc_applications': "COUNT(DISTINCT ipc.appln_id)",
+        },
+    },
+}
+
+# BigQuery clusters on at most four columns
+_MAX_CLUSTER_COLUMNS = 4
+
+
+def edition_label(edition: str) -> str:
+    """Return ``edition`` as a valid BigQuery label value."""
+    return re.sub(r"[^a-z0-9_-]", "-", edition.lower())[:63]
+
+
+def build_sql(name: str, table: str, edition: str) -> str:
+    """Return the statement that (re)creates summary table ``name``.
+
+    The table is labelled with the PATSTAT edition it was built from, so
+    the data layer only routes queries to summaries of the loaded edition.
+    """
+    definition = SUMMARY_TABLES[name]
+    dimensions = definition['dimensions']
+    columns = [f"{expr} AS {column}" for column, expr in dimensions.items()]
+    columns += [f"{expr} AS {column}" for column, expr in definition['measures'].items()]
+    where = f"WHERE {definition['where']}" if definition.get('where') else ""
+    group_by = ", ".join(str(i) for i in range(1, len(dimensions) + 1))
+    cluster_by = ", ".join(list(dimensions)[:_MAX_CLUSTER_COLUMNS])
+    select_list = ",\n        ".join(columns)
+
+    return f"""
+    CREATE OR REPLACE TABLE `{table}`
+    CLUSTER BY {cluster_by}
+    OPTIONS (labels = [("patstat_edition", "{edition_label(edition)}")])
+    AS
+    SELECT
+        {select_list}
+    FROM {definition['from']}
+    {where}
+    GROUP BY {group_by}
+"""
+
+
+def find_summary(aggregate: dict, available: dict):
+    """Return the name of the smallest summary table that can answer a query.
+
+    Args:
+        aggregate: The query's ``aggregate`` entry (dimensions, measures)
+        available: Built summary tables of the current edition, name -> row count
+
+    Returns:
+        Summary table name, or None if no built table has every dimension
+        and measure the query needs.
+    """
+    needed_dimensions = set(aggregate['dimensions'])
+    needed_measures = set(aggregate['measures'])
+    candidates = [
+        name for name, definition in SUMMARY_TABLES.items()
+        if name in available
+        and needed_dimensions <= set(definition['dimensions'])
+        and needed_measures <= set(definition['measures'])
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda name: available[name] or 0)
+
+
+def summary_sql(aggregate: dict, table: str) -> str:
+    """Return the query's SQL reading from summary ``table``."""
+    return aggregate['sql'].replace("{source}", f"`{table}`")
@@ -0,0 +1,206 @@
+# PATSTAT Explorer - Job Telemetry
+# Labels for every BigQuery job the app submits, and a collector that
+# periodically copies the app's jobs from INFORMATION_SCHEMA.JOBS_BY_PROJECT
+# into a local Parquet store: bytes billed, slot time, cache hits, duration
+# and queue time per job.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+
+APP_LABEL = "patstat-explorer"
+
+# Label values: lowercase letters, digits, '_' and '-', at most 63 characters
+_LABEL_INVALID = re.compile(r"[^a-z0-9_-]")
+
+JOBS_SQL = """
+SELECT
+  job_id,
+  creation_time,
+  state,
+  IFNULL(cache_hit, FALSE) AS cache_hit,
+  total_bytes_processed,
+  total_bytes_billed,
+  total_slot_ms,
+  TIMESTAMP_DIFF(end_time, start_time, MILLISECOND) AS duration_ms,
+  TIMESTAMP_DIFF(start_time, creation_time, MILLISECOND) AS queue_ms,
+  error_result.reason AS error_reason,
+  (SELECT value FROM UNNEST(labels) WHERE key = 'query_id') AS query_id,
+  (SELECT value FROM UNNEST(labels) WHERE key = 'params') AS params,
+  (SELECT value FROM UNNEST(labels) WHERE key = 'page') AS page
+FROM `region-{region}`.INFORMATION_SCHEMA.JOBS_BY_PROJECT
+WHERE creation_time >= @since
+  AND job_type = 'QUERY'
+  AND state = 'DONE'
+  AND EXISTS (SELECT 1 FROM UNNEST(labels) WHERE key = 'app' AND value = '{app}')
+ORDER BY creation_time
+"""
+
+COLUMNS = ["job_id", "creation_time", "state", "cache_hit", "total_bytes_processed",
+           "total_bytes_billed", "total_slot_ms", "duration_ms", "queue_ms", "error_reason",
+           "query_id", "params", "page"]
+
+
+def label_value(value) -> str:
+    """Return ``value`` as a valid BigQuery label value."""
+    return _LABEL_INVALID.sub("_", str(value).lower())[:63]
+
+
+def params_fingerprint(params: dict) -> str:
+    """Return a short, stable fingerprint of query parameters.
+
+    Parameters with a value of None are dropped, as in make_cache_key.
+    """
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def job_labels(query_id: str = None, params: dict = None, page: str = None) -> dict:
+    """Return the labels for a job of the app.
+
+    Args:
+        query_id: Catalog query id, or None for ad-hoc SQL
+        params: The job's query parameters
+        page: Where the job was submitted from ('catalog', 'ai_builder',
+            'contribution', ...); defaults to 'catalog' for queries with an
+            id and 'adhoc' otherwise
+    """
+    return {
+        'app': APP_LABEL,
+        'query_id': label_value(query_id or "none"),
+        'params': params_fingerprint(params),
+        'page': label_value(page or ("catalog" if query_id else "adhoc")),
+    }
+
+
+def jobs_sql(region: str) -> str:
+    """Return the JOBS_BY_PROJECT query for a region (e.g. 'EU', 'us-central1')."""
+    if not re.fullmatch(r"[A-Za-z0-9-]+", region):
+        raise ValueError(f"Invalid region: {region!r}")
+    return JOBS_SQL.format(region=region.lower(), app=APP_LABEL)
+
+
+class JobTelemetry:
+    """Local store of the app's BigQuery jobs, filled from INFORMATION_SCHEMA.
+
+    Args:
+        path: Parquet file holding the collected jobs
+        fetch: Callable(since) returning a DataFrame of COLUMNS for jobs
+            created at or after ``since`` (a UTC datetime)
+        interval_seconds: Time between collections
+        retention_days: Jobs older than this are dropped from the store
+        overlap_seconds: Each collection starts this long before the newest
+            stored job, so jobs that finished late are picked up; rows are
+            deduplicated by job_id
+
+    The first collection reaches back ``retention_days``.
+    """
+
+    def __init__(self, path: str, fetch, interval_seconds: float, retention_days: float,
+                 overlap_seconds: float = 3600):
+        self.path = path
+        self.fetch = fetch
+        self.interval_seconds = interval_seconds
+        self.retention_days = retention_days
+        self.overlap_seconds = overlap_seconds
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread (once)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.collect()
+                self.last_error = None
+            except Exception as e:
+                print(f"Job telemetry collection failed: {e}")
+                self.last_error = str(e)
+            self._stop.wait(self.interval_seconds)
+
+    def collect(self, now: datetime = None) -> int:
+        """Pull new jobs into the store; return the number of jobs added."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self.retention_days)
+        with self._lock:
+            stored = self.load()
+            since = cutoff
+            if not stored.empty:
+                since = max(cutoff, stored['creation_time'].max().to_pydatetime()
+                            - timedelta(seconds=self.overlap_seconds))
+            fetched = self.fetch(since)
+            if fetched is None or fetched.empty:
+                new = pd.DataFrame(columns=COLUMNS)
+            else:
+                new = fetched.reindex(columns=COLUMNS)
+                new['creation_time'] = pd.to_datetime(new['creation_time'], utc=True)
+            added = len(set(new['job_id']) - set(stored['job_id']))
+            frames = [df for df in (stored, new) if not df.empty]
+            combined = pd.concat(frames) if frames else stored
+            combined = (combined.drop_duplicates('job_id', keep='last')
+                        .loc[lambda df: df['creation_time'] >= cutoff]
+                        .sort_values('creation_time')
+                        .reset_index(drop=True))
+            self._write(combined)
+        return added
+
+    def load(self) -> pd.DataFrame:
+        """Return the stored jobs (an empty frame before the first collection)."""
+        try:
+            df = pd.read_parquet(self.path)
+        except (OSError, ValueError):
+            return pd.DataFrame({col: pd.Series(dtype='datetime64[ns, UTC]'
+                                                if col == 'creation_time' else object)
+                                 for col in COLUMNS})
+        df['creation_time'] = pd.to_datetime(df['creation_time'], utc=True)
+        return df
+
+    def summary(self, query_id: str = None) -> pd.DataFrame:
+        """Aggregate the stored jobs per query id.
+
+        Returns one row per query id with the job count, BigQuery cache hit
+        rate, bytes billed, slot milliseconds and mean duration and queue
+        time, most bytes billed first; restricted to ``query_id`` if given.
+        """
+        df = self.load()
+        if query_id is not None:
+            df = df[df['query_id'] == label_value(query_id)]
+        if df.empty:
+            return pd.DataFrame(columns=['query_id', 'jobs', 'cache_hit_rate', 'bytes_billed',
+                                         'slot_ms', 'mean_duration_ms', 'mean_queue_ms'])
+        grouped = df.groupby('query_id', dropna=False)
+        summary = pd.DataFrame({
+            'jobs': grouped['job_id'].count(),
+            'cache_hit_rate': grouped['cache_hit'].apply(lambda s: s.astype(bool).mean()),
+            'bytes_billed': grouped['total_bytes_billed'].apply(
+                lambda s: pd.to_numeric(s).fillna(0).sum()),
+            'slot_ms': grouped['total_slot_ms'].apply(lambda s: pd.to_numeric(s).fillna(0).sum()),
+            'mean_duration_ms': grouped['duration_ms'].apply(lambda s: pd.to_numeric(s).mean()),
+            'mean_queue_ms': grouped['queue_ms'].apply(lambda s: pd.to_numeric(s).mean()),
+        }).reset_index().fillna({'mean_duration_ms': 0, 'mean_queue_ms': 0})
+        return summary.sort_values('bytes_billed', ascending=False).reset_index(drop=True)
+
+    def _write(self, df: pd.DataFrame):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            df.to_parquet(f"{self.path}.tmp", index=False)
+            os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            print(f"Could not write {self.path}: {e}")
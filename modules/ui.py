@@ -5,21 +5,28 @@ import time
 import streamlit as st
 import altair as alt
 
+from queries_bq import DYNAMIC_QUERIES
 from .config import (
     COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT, COLOR_PALETTE,
     DEFAULT_YEAR_START, DEFAULT_YEAR_END, DEFAULT_JURISDICTIONS, DEFAULT_TECH_FIELD,
     YEAR_MIN, YEAR_MAX,
     CATEGORIES, STAKEHOLDER_TAGS, COMMON_QUESTIONS,
     JURISDICTIONS, TECH_FIELDS,
-    TIP_PLATFORM_URL, GITHUB_REPO_URL
+    TIP_PLATFORM_URL, GITHUB_REPO_URL,
+    DRY_RUN_DEBOUNCE_SECONDS, SPECULATIVE_DEBOUNCE_SECONDS, COMPARE_MAX_SETS, DASHBOARD_QUERIES, DASHBOARD_MAX_PANELS
 )
-from .utils import format_time, format_sql_for_tip
+from .utils import format_time, format_bytes, format_sql_for_tip
+from .compare import combine_sets, set_label
 from .data import (
-    get_bigquery_client, run_query, run_parameterized_query,
-    get_all_queries, resolve_options
+    get_bigquery_client, run_query, dry_run_query,
+    submit_query, submit_parameterized_query, cancel_run, reap_abandoned_runs,
+    get_queue_position, get_executor_stats, get_cache_stats, fetch_result_page, download_full_result,
+    get_trend_cube, get_patstat_edition, get_family_counts, run_comparison, submit_batch,
+    default_parameter_values, prefetch_parameterized_query, speculation_settings, start_prewarming,
+    get_query_telemetry, estimate_runtime, get_all_queries, resolve_options, QueryBudgetError, AdmissionError
 )
 from .logic import (
-    filter_queries, generate_insight_headline,
+    filter_queries, build_query_params, generate_insight_headline,
     validate_contribution_step1, submit_contribution,
     is_ai_available, generate_sql_query
 )
@@ -91,6 +98,8 @@ def init_session_state():
 
 def go_to_landing():
     """Navigate to landing page, preserving category selection."""
+    cancel_active_run()
+    cancel_dashboard()
     st.session_state['current_page'] = 'landing'
     st.session_state['selected_query'] = None
 
@@ -108,6 +117,8 @@ def go_to_detail(query_id: str):
     all_queries = get_all_queries()
     if query_id not in all_queries:
         return
+    cancel_active_run()
+    cancel_dashboard()
     st.session_state['current_page'] = 'detail'
     st.session_state['selected_query'] = query_id
     st.rerun()
@@ -120,6 +131,20 @@ def go_to_contribute():
     st.rerun()
 
 
+def go_to_trends():
+    """Navigate to the Technology Trend Analysis page."""
+    cancel_active_run()
+    st.session_state['current_page'] = 'trends'
+    st.rerun()
+
+
+def go_to_dashboard():
+    """Navigate to the dashboard page."""
+    cancel_active_run()
+    st.session_state['current_page'] = 'dashboard'
+    st.rerun()
+
+
 def go_to_ai_builder():
     """Navigate to AI query builder page."""
     st.session_state['current_page'] = 'ai_builder'
@@ -427,6 +452,145 @@ def render_metrics(df, query_info):
                     st.metric(label=label, value=str(value))
 
 
+def render_cost_preview(query_id: str, sql: str, params: dict, params_config: dict):
+    """Show the dry-run estimate of a query before it runs.
+
+    The estimate refreshes once the parameters have been unchanged for
+    DRY_RUN_DEBOUNCE_SECONDS, so dragging a slider doesn't fire a dry run
+    per intermediate value.
+    """
+    preview = st.session_state.setdefault('cost_preview', {})
+    signature = (query_id, repr(sorted(params.items())))
+    if preview.get('signature') != signature:
+        preview['signature'] = signature
+        preview['changed_at'] = time.time()
+    _cost_preview_fragment(query_id, sql, params, params_config)
+
+
+@st.fragment(run_every=DRY_RUN_DEBOUNCE_SECONDS)
+def _cost_preview_fragment(query_id: str, sql: str, params: dict, params_config: dict):
+    preview = st.session_state.get('cost_preview', {})
+    if time.time() - preview.get('changed_at', 0) < DRY_RUN_DEBOUNCE_SECONDS:
+        if preview.get('estimate'):
+            st.caption(f"{_format_estimate(preview['estimate'])} (updating...)")
+        return
+    if preview.get('estimate_signature') == preview.get('signature'):
+        if preview.get('estimate'):
+            st.caption(_format_estimate(preview['estimate']))
+        elif preview.get('error'):
+            st.caption(f"Cost estimate unavailable: {preview['error']}")
+        return
+
+    client = get_bigquery_client()
+    if client is None:
+        return
+    try:
+        preview['estimate'] = dry_run_query(client, sql, params, query_id=query_id,
+                                            params_config=params_config)
+        preview['error'] = None
+    except Exception as e:
+        preview['estimate'] = None
+        preview['error'] = str(e)
+    preview['estimate_signature'] = preview.get('signature')
+
+    if preview['estimate']:
+        st.caption(_format_estimate(preview['estimate']))
+    else:
+        st.caption(f"Cost estimate unavailable: {preview['error']}")
+
+
+def render_speculation(query_id: str, sql: str, params: dict, params_config: dict):
+    """Prefetch the result for the current parameters (opt-in, see SPECULATIVE_PREFETCH).
+
+    Starts at once when the detail page opens, and after parameter edits
+    once they have been unchanged for SPECULATIVE_DEBOUNCE_SECONDS.
+    """
+    settings = speculation_settings()
+    if not settings['enabled']:
+        return
+    speculation = st.session_state.setdefault('speculation', {'bytes_used': 0})
+    signature = (query_id, repr(sorted(params.items())))
+    if speculation.get('signature') != signature:
+        same_page = speculation.get('signature', (None,))[0] == query_id
+        speculation['signature'] = signature
+        speculation['changed_at'] = time.time() if same_page else 0
+        speculation['done'] = False
+    _speculation_fragment(query_id, sql, params, params_config, settings['session_bytes'])
+
+
+@st.fragment(run_every=SPECULATIVE_DEBOUNCE_SECONDS)
+def _speculation_fragment(query_id: str, sql: str, params: dict, params_config: dict,
+                          session_bytes: int):
+    speculation = st.session_state.get('speculation', {})
+    if speculation.get('done') or time.time() - speculation.get('changed_at', 0) < SPECULATIVE_DEBOUNCE_SECONDS:
+        return
+    speculation['done'] = True
+    if st.session_state.get('active_run'):
+        return
+
+    client = get_bigquery_client()
+    if client is None:
+        return
+    try:
+        run, bytes_processed = prefetch_parameterized_query(
+            client, sql, params, query_id=query_id, params_config=params_config,
+            max_bytes=session_bytes - speculation['bytes_used']
+        )
+    except (QueryBudgetError, AdmissionError) as e:
+        print(f"Prefetch of {query_id} skipped: {e}")
+        return
+    except Exception as e:
+        # Speculation runs unasked in the background; it must never fail the page
+        print(f"Prefetch of {query_id} failed: {e}")
+        return
+    if run is not None:
+        speculation['bytes_used'] += bytes_processed
+
+
+def _format_estimate(estimate: dict) -> str:
+    tables = ", ".join(estimate['tables']) or "no tables"
+    cost = estimate['estimated_cost_usd']
+    cost_str = f"~${cost:.2f}" if cost >= 0.01 else "<$0.01"
+    text = (f"Scans {format_bytes(estimate['bytes_processed'])} "
+            f"({cost_str} on-demand) from {tables}")
+    budget = estimate.get('max_bytes_billed')
+    if budget and estimate['bytes_processed'] > budget:
+        text += f" - over the {format_bytes(budget)} budget, narrow the parameters to run"
+    return text
+
+
+def get_runtime_estimate(query_id: str, query_info: dict, collected_params: dict = None) -> dict:
+    """Estimate a query's runtime for the parameters on the page (see estimate_runtime).
+
+    Without ``collected_params`` the query's default parameters are used.
+    """
+    if "sql_template" not in query_info:
+        params = {}
+    elif collected_params is None:
+        params = None
+    else:
+        params = build_query_params(query_info.get('parameters', {}), collected_params)
+    return estimate_runtime(query_id, params, query_info)
+
+
+def _format_runtime_estimate(estimate: dict) -> str:
+    cached, first = estimate['cached'], estimate['first_run']
+    if first['source'] == 'history':
+        first_text = (f"~{format_time(first['seconds'])} (first run, usually "
+                      f"{format_time(first['seconds_low'])}-{format_time(first['seconds_high'])})")
+    else:
+        first_text = f"~{format_time(first['seconds'])} (first run)"
+    if first['source'] == 'static' and cached['source'] == 'static' \
+            and first['seconds'] == cached['seconds']:
+        return f"Estimated: ~{format_time(cached['seconds'])}"
+    text = f"Estimated: ~{format_time(cached['seconds'])} (cached) / {first_text}"
+    learned = first if first['source'] == 'history' else cached
+    if learned['source'] == 'history':
+        text += (f" - learned from {first['samples'] + cached['samples']} runs, "
+                 f"{learned['confidence']} confidence")
+    return text
+
+
 def get_contextual_spinner_message(query_info):
     """Generate contextual spinner message based on query (Story 1.3)."""
     category = query_info.get("category", "")
@@ -462,11 +626,24 @@ def render_landing_page():
         )
         st.session_state['search_term'] = search_term
 
-    col1, col2, col3 = st.columns([2, 1, 1])
+    prewarmer = start_prewarming(get_bigquery_client())
+    if prewarmer is not None and not prewarmer.ready.is_set():
+        status = prewarmer.status()
+        done = status.get('warmed', 0) + status.get('cached', 0)
+        progress = f" ({done}/{status['total']})" if status.get('total') else ""
+        st.caption(f"Warming up results of popular questions{progress}...")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        if st.button("🗂️ Dashboard", use_container_width=True):
+            go_to_dashboard()
     with col2:
+        if st.button("📈 Technology Trends", use_container_width=True):
+            go_to_trends()
+    with col3:
         if st.button("🤖 AI Query Builder", use_container_width=True):
             go_to_ai_builder()
-    with col3:
+    with col4:
         if st.button("📝 Contribute Query", use_container_width=True):
             go_to_contribute()
 
@@ -579,8 +756,16 @@ def render_query_list(search_term: str = None, category_filter: str = None,
                 st.markdown(f"**{query_id}:** {query_info['title']}")
 
             with col_time:
-                est_time = query_info.get('estimated_seconds_cached', 5)
-                st.caption(f"~{format_time(est_time)}")
+                estimate = get_runtime_estimate(query_id, query_info)
+                cached = estimate['cached']
+                help_text = None
+                if cached['source'] == 'history':
+                    help_text = (f"Predicted for the default parameters from {cached['samples']} "
+                                 f"runs, {cached['confidence']} confidence")
+                    if estimate['bytes_processed']:
+                        help_text += (f". A first run typically scans "
+                                      f"{format_bytes(estimate['bytes_processed'])}")
+                st.caption(f"~{format_time(cached['seconds'] or 5)}", help=help_text)
                 st.caption(query_info.get('category', ''))
 
             with col_action:
@@ -644,13 +829,9 @@ def render_detail_page(query_id: str):
                 for output in query_info["key_outputs"]:
                     st.markdown(f"- {output}")
 
-    estimated_cached = query_info.get("estimated_seconds_cached", 0)
-    estimated_first = query_info.get("estimated_seconds_first_run", estimated_cached)
-    if estimated_first > 0:
-        if estimated_first != estimated_cached:
-            st.caption(f"Estimated: ~{format_time(estimated_cached)} (cached) / ~{format_time(estimated_first)} (first run)")
-        else:
-            st.caption(f"Estimated: ~{format_time(estimated_cached)}")
+    runtime_estimate = get_runtime_estimate(query_id, query_info, collected_params)
+    if runtime_estimate['first_run']['seconds'] > 0:
+        st.caption(_format_runtime_estimate(runtime_estimate))
 
     with st.expander("View SQL Query", expanded=False):
         # Show sql_template if available (with parameter placeholders), otherwise static sql
@@ -673,10 +854,25 @@ def render_detail_page(query_id: str):
         st.caption(f"Parameters: {param_context}")
         st.code(display_sql.strip(), language="sql")
 
+        last = st.session_state.get('last_result')
+        if last and last.get('query_id') == query_id and last.get('df') is not None \
+                and last['df'].attrs.get('query_plan'):
+            render_query_plan(last['df'].attrs['query_plan'])
+
     if "methodology" in query_info:
         with st.expander("Methodology", expanded=False):
             st.markdown(query_info["methodology"])
 
+    params_config = query_info.get('parameters', {})
+    run_sql = query_info.get("sql_template", query_info.get("sql", ""))
+    run_params = build_query_params(params_config, collected_params) if "sql_template" in query_info else {}
+    render_cost_preview(query_id, run_sql, run_params, params_config)
+    if "sql_template" in query_info:
+        render_speculation(query_id, run_sql, run_params, params_config)
+
+    if "param_columns" in query_info and "sql_template" in query_info:
+        render_compare_section(query_id, query_info, collected_params)
+
     st.divider()
 
     if run_clicked:
@@ -685,161 +881,431 @@ def render_detail_page(query_id: str):
             st.error("Could not connect to BigQuery.")
             return
 
-        spinner_msg = get_contextual_spinner_message(query_info)
-        estimated_seconds = query_info.get("estimated_seconds_cached", 1)
+        cancel_active_run()
+        try:
+            if "sql_template" in query_info:
+                run = submit_parameterized_query(
+                    client, query_info["sql_template"], run_params,
+                    query_id=query_id, params_config=params_config
+                )
+            else:
+                run = submit_query(client, query_info["sql"], query_id=query_id)
+        except AdmissionError as e:
+            st.warning(str(e))
+            return
+        st.session_state['active_run'] = {'query_id': query_id, 'run': run,
+                                          'collected_params': collected_params,
+                                          'estimate': runtime_estimate}
+        st.session_state['last_result'] = None
+        st.session_state.pop('full_export', None)
+        st.session_state.pop(f"result_page_{query_id}", None)
+
+    active = st.session_state.get('active_run')
+    if active and active['query_id'] == query_id:
+        render_run_progress(query_info)
+        return
+
+    last = st.session_state.get('last_result')
+    if last and last['query_id'] == query_id:
+        if last.get('error') is not None:
+            if isinstance(last['error'], QueryBudgetError):
+                st.warning(str(last['error']))
+            else:
+                st.error(f"Error: {str(last['error'])}")
+            return
+        render_results(query_id, query_info, last['df'], last['execution_time'],
+                       last['collected_params'])
+
+
+def render_compare_section(query_id: str, query_info: dict, collected_params: dict):
+    """Render the compare mode: the query for several parameter sets, side by side.
 
-        with st.spinner(f"{spinner_msg} (~{format_time(estimated_seconds)})"):
+    Set A uses the parameters above; the other sets only override the
+    parameters mapped in ``param_columns``. All sets are answered by one
+    query (see run_comparison).
+    """
+    params_config = query_info['parameters']
+    param_columns = query_info['param_columns']
+    compared = [name for name in params_config if name in param_columns]
+
+    with st.expander("Compare parameter sets", expanded=False):
+        st.caption(f"Set A uses the parameters above. Vary "
+                   f"{', '.join(params_config[name].get('label', name) for name in compared)} "
+                   f"for up to {COMPARE_MAX_SETS - 1} more sets; all sets run as one query.")
+        extra = st.radio("Additional sets", list(range(1, COMPARE_MAX_SETS)), horizontal=True,
+                         key=f"compare_count_{query_id}")
+
+        param_sets = [collected_params]
+        cols = st.columns(extra)
+        for i in range(extra):
+            with cols[i], st.container(border=True):
+                st.markdown(f"**Set {chr(ord('A') + i + 1)}**")
+                overrides = {}
+                for name in compared:
+                    value = render_single_parameter(name, params_config[name],
+                                                    key_prefix=f"compare_{i + 1}_{query_id}")
+                    if isinstance(value, dict):
+                        overrides.update(value)
+                    else:
+                        overrides[name] = value
+                param_sets.append({**collected_params, **overrides})
+
+        if st.button("Run Comparison", key=f"compare_run_{query_id}"):
+            client = get_bigquery_client()
+            if client is None:
+                st.error("Could not connect to BigQuery.")
+                return
             try:
-                if "sql_template" in query_info:
-                    params = {}
-                    params_config = query_info.get('parameters', {})
-                    if 'year_range' in params_config:
-                        params['year_start'] = year_start
-                        params['year_end'] = year_end
-                    if 'jurisdictions' in params_config:
-                        params['jurisdictions'] = jurisdictions if jurisdictions else None
-                    if 'tech_field' in params_config:
-                        params['tech_field'] = tech_field
-                    if 'tech_sector' in params_config:
-                        params['tech_sector'] = collected_params.get('tech_sector')
-                    if 'applicant_name' in params_config:
-                        params['applicant_name'] = collected_params.get('applicant_name', '')
-                    if 'competitors' in params_config:
-                        params['competitors'] = collected_params.get('competitors')
-                    if 'ipc_class' in params_config:
-                        params['ipc_class'] = collected_params.get('ipc_class', '')
-                    # Classification query parameters (Q54-Q58)
-                    if 'classification_symbol' in params_config:
-                        params['classification_symbol'] = collected_params.get('classification_symbol', '')
-                    if 'keyword' in params_config:
-                        params['keyword'] = collected_params.get('keyword', '')
-                    if 'modification_type' in params_config:
-                        params['modification_type'] = collected_params.get('modification_type')
-                    if 'parent_symbol' in params_config:
-                        params['parent_symbol'] = collected_params.get('parent_symbol', '')
-                    if 'system' in params_config:
-                        params['system'] = collected_params.get('system')
-                    df, execution_time = run_parameterized_query(client, query_info["sql_template"], params)
+                with st.spinner(get_contextual_spinner_message(query_info)):
+                    frames, execution_time = run_comparison(
+                        client, query_info["sql_template"],
+                        [build_query_params(params_config, values) for values in param_sets],
+                        query_id=query_id, params_config=params_config
+                    )
+            except (ValueError, QueryBudgetError, AdmissionError) as e:
+                st.warning(str(e))
+                return
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                return
+            st.session_state['comparison'] = {
+                'query_id': query_id, 'frames': frames, 'execution_time': execution_time,
+                'labels': [set_label(frame.attrs['params'], param_columns) for frame in frames]
+            }
+
+        comparison = st.session_state.get('comparison')
+        if comparison and comparison['query_id'] == query_id:
+            render_comparison(query_id, query_info, comparison)
+
+
+def render_comparison(query_id: str, query_info: dict, comparison: dict):
+    """Render per-set results in columns, with a combined CSV download."""
+    frames, labels = comparison['frames'], comparison['labels']
+    st.caption(f"{len(frames)} parameter sets answered by one query in "
+               f"{format_time(comparison['execution_time'])}")
+
+    cols = st.columns(len(frames))
+    for i, (frame, label) in enumerate(zip(frames, labels)):
+        with cols[i]:
+            st.markdown(f"**Set {chr(ord('A') + i)}:** {label}")
+            st.metric("Results", f"{len(frame):,} rows")
+            if frame.empty:
+                st.info("No results for this set.")
+                continue
+            chart = render_chart(frame, query_info)
+            if chart:
+                st.altair_chart(chart.properties(height=300), use_container_width=True)
+            st.dataframe(frame, use_container_width=True, hide_index=True, height=300)
+
+    csv = combine_sets(frames, labels).to_csv(index=False)
+    st.download_button("📥 Download Comparison (CSV)", data=csv,
+                       file_name=f"{query_id}_comparison_{time.strftime('%Y%m%d')}.csv",
+                       mime="text/csv", key=f"compare_csv_{query_id}")
+
+
+def cancel_active_run():
+    """Cancel the session's running query, if any (navigation or a new run)."""
+    active = st.session_state.pop('active_run', None)
+    if active and not active['run'].done():
+        cancel_run(active['run'])
+
+
+@st.fragment(run_every=1.0)
+def render_run_progress(query_info: dict):
+    """Poll the session's running query; show progress and a Cancel button.
+
+    When the run finishes its result is moved to ``last_result`` and the
+    page reruns to render it.
+    """
+    active = st.session_state.get('active_run')
+    if not active:
+        return
+    run = active['run']
+
+    if run.done():
+        st.session_state.pop('active_run', None)
+        if not run.cancelled():
+            try:
+                df, execution_time = run.result()
+                st.session_state['last_result'] = {
+                    'query_id': active['query_id'], 'df': df, 'execution_time': execution_time,
+                    'collected_params': active['collected_params'], 'error': None
+                }
+            except Exception as e:
+                st.session_state['last_result'] = {'query_id': active['query_id'], 'error': e}
+        st.rerun()
+
+    reap_abandoned_runs()
+    progress = run.progress()
+    spinner_msg = get_contextual_spinner_message(query_info)
+    estimated_seconds = active['estimate']['cached']['seconds'] or 1
+
+    with st.container(border=True):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(f"**{spinner_msg}** {format_time(progress['elapsed'])} "
+                        f"(est. ~{format_time(estimated_seconds)})")
+            if progress['stages_total']:
+                st.progress(progress['stages_done'] / progress['stages_total'],
+                            text=f"Stage {progress['stages_done']}/{progress['stages_total']}"
+                                 f" - {progress['records_read']:,} records read")
+            if progress['total_rows']:
+                st.progress(progress['rows_downloaded'] / progress['total_rows'],
+                            text=f"Downloading {progress['rows_downloaded']:,}"
+                                 f" / {progress['total_rows']:,} rows")
+            details = [progress['state'].title()]
+            if progress['bytes_processed']:
+                details.append(f"{format_bytes(progress['bytes_processed'])} processed")
+            position = get_queue_position(run)
+            if position is not None:
+                stats = get_executor_stats()
+                if stats['running_by_owner'].get(run.owner, 0) >= (stats['max_per_owner'] or float('inf')):
+                    details.append(f"queued behind your {stats['max_per_owner']} running queries")
                 else:
-                    df, execution_time = run_query(client, query_info["sql"])
-
-                if df.empty:
-                    st.warning("No results found for your query.")
-                    st.info("**Suggestions:** Try broadening the year range or selecting different jurisdictions.")
-                    return
-
-                headline = generate_insight_headline(df, query_info)
-                if headline:
-                    st.markdown(headline)
-                    ''
-
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Results", f"{len(df):,} rows")
-                with col2:
-                    st.metric("Execution", format_time(execution_time))
-                with col3:
-                    if estimated_seconds > 0:
-                        diff = execution_time - estimated_seconds
-                        delta_str = f"{'+' if diff > 0 else ''}{format_time(abs(diff))}"
-                        st.metric("vs. Est.", delta_str,
-                                 delta=f"{'slower' if diff > 0 else 'faster'}",
-                                 delta_color="inverse")
-
-                ''
-
-                display_mode = query_info.get('display_mode', 'default')
-                chart = None  # Initialize chart variable for all display modes
-
-                if display_mode == 'metrics_grid':
-                    # Special mode: Display results as metric cards in a grid
-                    # Works with 2-column dataframes (metric, value)
-                    if len(df.columns) == 2:
-                        metric_col = df.columns[0]
-                        value_col = df.columns[1]
-
-                        # Display metrics in rows of 4
-                        rows = [df.iloc[i:i+4] for i in range(0, len(df), 4)]
-                        for row_df in rows:
-                            cols = st.columns(4)
-                            for idx, (_, row) in enumerate(row_df.iterrows()):
-                                with cols[idx]:
-                                    label = str(row[metric_col])
-                                    value = row[value_col]
-                                    # Format large numbers with commas
-                                    if isinstance(value, (int, float)):
-                                        st.metric(label=label, value=f"{value:,.0f}")
-                                    elif str(value).replace(',', '').isdigit():
-                                        st.metric(label=label, value=f"{int(str(value).replace(',', '')):,}")
-                                    else:
-                                        st.metric(label=label, value=str(value))
-
-                        ''
-
-                    # Optional chart (only if visualization config exists and not disabled)
-                    if query_info.get('visualization', {}).get('type'):
-                        chart = render_chart(df, query_info)
-                        if chart:
-                            st.altair_chart(chart, use_container_width=True)
+                    details.append(f"queued, {position} ahead "
+                                   f"(typical wait {format_time(stats['avg_wait'])})")
+            elif run.job is None:
+                details.append("waiting for BigQuery")
+            st.caption(" | ".join(details))
+        with col2:
+            if st.button("Cancel", key="cancel_run", use_container_width=True):
+                cancel_active_run()
+                st.rerun()
 
-                    # Data table in expander (same as default)
-                    with st.expander("View Data Table", expanded=False):
-                        st.dataframe(df, use_container_width=True, height=400)
 
-                elif display_mode == 'chart_and_table':
-                    # Chart + visible table (no expander)
-                    chart = render_chart(df, query_info)
-                    if chart:
-                        st.altair_chart(chart, use_container_width=True)
+def render_query_plan(plan: dict):
+    """Show the stages and timeline of the last run's BigQuery job (see summarize_plan)."""
+    import pandas as pd
 
-                    st.markdown("### Data")
-                    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.markdown(f"**Execution plan of the last run** - {len(plan['stages'])} stages, "
+                f"{format_time(plan['total_slot_ms'] / 1000)} slot time")
+    for finding in plan['findings']:
+        if finding['warning']:
+            st.warning(finding['text'])
+        else:
+            st.caption(finding['text'])
+
+    stages = pd.DataFrame([{
+        'Stage': stage['name'],
+        'Steps': ", ".join(stage['steps']),
+        'Slot time (s)': stage['slot_ms'] / 1000,
+        'Share': stage['slot_ms'] / (plan['total_slot_ms'] or 1),
+        'Records read': stage['records_read'],
+        'Records written': stage['records_written'],
+        'Shuffled': format_bytes(stage['shuffle_output_bytes']),
+        'Skew': f"{stage['skew']:g}x" + (" ⚠️" if stage['skewed'] else "")
+                if stage['skew'] else "",
+    } for stage in plan['stages']])
+    st.dataframe(stages, use_container_width=True, hide_index=True, column_config={
+        'Slot time (s)': st.column_config.NumberColumn(format="%.1f"),
+        'Share': st.column_config.ProgressColumn(min_value=0, max_value=1, format="percent"),
+    })
+
+    if len(plan['timeline']) > 1:
+        timeline = pd.DataFrame(plan['timeline'])
+        timeline['seconds'] = timeline['elapsed_ms'] / 1000
+        timeline = timeline.melt(id_vars='seconds', value_vars=['active_units', 'pending_units'],
+                                 var_name='units', value_name='count')
+        timeline['units'] = timeline['units'].str.replace('_units', '')
+        chart = alt.Chart(timeline).mark_area(opacity=0.6).encode(
+            x=alt.X('seconds:Q', title='Elapsed (s)'),
+            y=alt.Y('count:Q', title='Work units', stack=None),
+            color=alt.Color('units:N', scale=alt.Scale(range=COLOR_PALETTE), title=None),
+        ).properties(height=180)
+        st.altair_chart(chart, use_container_width=True)
+
+
+def render_results(query_id: str, query_info: dict, df, execution_time: float,
+                   collected_params: dict):
+    """Render headline, metrics, chart/table, downloads and TIP panel for a result."""
+    estimate = get_runtime_estimate(query_id, query_info, collected_params)
+    # A job that scanned the tables is compared with the first-run estimate
+    ran_job = df.attrs.get('bigquery_cache_hit') is False and not df.attrs.get('cache_tier')
+    estimated_seconds = estimate['first_run' if ran_job else 'cached']['seconds'] or 1
 
-                else:
-                    # Default mode
-                    chart = render_chart(df, query_info)
-                    if chart:
-                        st.altair_chart(chart, use_container_width=True)
-
-                    if len(df) <= 5 and len(df.columns) == 2:
-                        render_metrics(df, query_info)
-
-                    with st.expander("View Data Table", expanded=False):
-                        st.dataframe(df, use_container_width=True, height=400)
-
-                st.divider()
-
-                col1, col2 = st.columns(2)
-                timestamp = time.strftime("%Y%m%d")
-                base_filename = f"{query_id}_{query_info['title'].lower().replace(' ', '_').replace('-', '_')}"
-
-                with col1:
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Download Data (CSV)",
-                        data=csv,
-                        file_name=f"{base_filename}_{timestamp}.csv",
-                        mime="text/csv",
-                        key="download_csv"
-                    )
+    if df.empty:
+        st.warning("No results found for your query.")
+        st.info("**Suggestions:** Try broadening the year range or selecting different jurisdictions.")
+        return
 
-                with col2:
-                    if chart:
-                        chart_html = chart.to_html()
-                        st.download_button(
-                            label="📊 Download Chart (HTML)",
-                            data=chart_html,
-                            file_name=f"{base_filename}_{timestamp}_chart.html",
-                            mime="text/html",
-                            key="download_chart"
-                        )
-
-                st.divider()
-                if "tip" in query_info.get("platforms", ["bigquery", "tip"]):
-                    render_tip_panel(query_info, collected_params)
+    headline = generate_insight_headline(df, query_info)
+    if headline:
+        st.markdown(headline)
+        ''
 
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Results", f"{df.attrs.get('total_rows', len(df)):,} rows")
+    with col2:
+        st.metric("Execution", format_time(execution_time))
+        if df.attrs.get('cache_tier'):
+            st.caption(f"Served from result cache ({df.attrs['cache_tier']})")
+        elif df.attrs.get('snapshot'):
+            st.caption(f"Served from the PATSTAT edition snapshot ({df.attrs['snapshot'][:10]})")
+        elif df.attrs.get('shared_job'):
+            st.caption("Joined an identical query already running")
+        elif df.attrs.get('refined_from'):
+            st.caption("Filtered locally from a cached result with broader parameters")
+        elif df.attrs.get('incremental', {}).get('cached_years'):
+            inc = df.attrs['incremental']
+            st.caption(f"Reused {inc['cached_years']} cached years, "
+                       f"queried {inc['queried_years']}")
+    with col3:
+        if estimated_seconds > 0:
+            diff = execution_time - estimated_seconds
+            delta_str = f"{'+' if diff > 0 else ''}{format_time(abs(diff))}"
+            st.metric("vs. Est.", delta_str,
+                     delta=f"{'slower' if diff > 0 else 'faster'}",
+                     delta_color="inverse")
+
+    telemetry = get_query_telemetry(get_bigquery_client(), query_id)
+    if telemetry:
+        st.caption(f"BigQuery jobs of this query: {telemetry['jobs']:,}, "
+                   f"{format_bytes(int(telemetry['bytes_billed']))} billed, "
+                   f"{telemetry['cache_hit_rate']:.0%} BigQuery cache hits, "
+                   f"~{format_time(telemetry['mean_queue_ms'] / 1000)} queued")
+    cache_stats = get_cache_stats()
+    st.caption(f"Result cache: {cache_stats['memory_hits']:,} memory and "
+               f"{cache_stats['disk_hits']:,} disk hits, {cache_stats['misses']:,} misses | "
+               f"{cache_stats['joined']:,} requests joined an identical running job "
+               f"({cache_stats['flights']:,} BigQuery jobs run)")
+
+    ''
+
+    display_mode = query_info.get('display_mode', 'default')
+    chart = None  # Initialize chart variable for all display modes
+
+    if display_mode == 'metrics_grid':
+        # Special mode: Display results as metric cards in a grid
+        # Works with 2-column dataframes (metric, value)
+        if len(df.columns) == 2:
+            metric_col = df.columns[0]
+            value_col = df.columns[1]
+
+            # Display metrics in rows of 4
+            rows = [df.iloc[i:i+4] for i in range(0, len(df), 4)]
+            for row_df in rows:
+                cols = st.columns(4)
+                for idx, (_, row) in enumerate(row_df.iterrows()):
+                    with cols[idx]:
+                        label = str(row[metric_col])
+                        value = row[value_col]
+                        # Format large numbers with commas
+                        if isinstance(value, (int, float)):
+                            st.metric(label=label, value=f"{value:,.0f}")
+                        elif str(value).replace(',', '').isdigit():
+                            st.metric(label=label, value=f"{int(str(value).replace(',', '')):,}")
+                        else:
+                            st.metric(label=label, value=str(value))
+
+            ''
+
+        # Optional chart (only if visualization config exists and not disabled)
+        if query_info.get('visualization', {}).get('type'):
+            chart = render_chart(df, query_info)
+            if chart:
+                st.altair_chart(chart, use_container_width=True)
+
+        # Data table in expander (same as default)
+        with st.expander("View Data Table", expanded=False):
+            render_data_table(query_id, df, use_container_width=True, height=400)
+
+    elif display_mode == 'chart_and_table':
+        # Chart + visible table (no expander)
+        chart = render_chart(df, query_info)
+        if chart:
+            st.altair_chart(chart, use_container_width=True)
+
+        st.markdown("### Data")
+        render_data_table(query_id, df, use_container_width=True, hide_index=True)
+
+    else:
+        # Default mode
+        chart = render_chart(df, query_info)
+        if chart:
+            st.altair_chart(chart, use_container_width=True)
+
+        if len(df) <= 5 and len(df.columns) == 2:
+            render_metrics(df, query_info)
+
+        with st.expander("View Data Table", expanded=False):
+            render_data_table(query_id, df, use_container_width=True, height=400)
+
+    st.divider()
+
+    col1, col2 = st.columns(2)
+    timestamp = time.strftime("%Y%m%d")
+    base_filename = f"{query_id}_{query_info['title'].lower().replace(' ', '_').replace('-', '_')}"
+
+    with col1:
+        full_df = df
+        if df.attrs.get('destination'):
+            # Paginated: only the displayed page is local, fetch the rest on request
+            export = st.session_state.get('full_export')
+            if export and export['destination'] == df.attrs['destination']:
+                full_df = export['df']
+            elif st.button(f"📥 Prepare Full Export ({df.attrs['total_rows']:,} rows)",
+                           key="prepare_export"):
+                with st.spinner("Downloading all rows..."):
+                    full_df = download_full_result(get_bigquery_client(), df, query_id=query_id)
+                st.session_state['full_export'] = {'destination': df.attrs['destination'],
+                                                   'df': full_df}
+            else:
+                full_df = None
+
+        if full_df is not None:
+            csv = full_df.to_csv(index=False)
+            st.download_button(
+                label="📥 Download Data (CSV)",
+                data=csv,
+                file_name=f"{base_filename}_{timestamp}.csv",
+                mime="text/csv",
+                key="download_csv"
+            )
+
+    with col2:
+        if chart:
+            chart_html = chart.to_html()
+            st.download_button(
+                label="📊 Download Chart (HTML)",
+                data=chart_html,
+                file_name=f"{base_filename}_{timestamp}_chart.html",
+                mime="text/html",
+                key="download_chart"
+            )
+
+    st.divider()
+    if "tip" in query_info.get("platforms", ["bigquery", "tip"]):
+        render_tip_panel(query_info, collected_params)
+
+
+def render_data_table(query_id: str, df, **kwargs):
+    """Show a result table; paginated results get a page selector.
+
+    Pages other than the first are read from the job's destination table
+    when selected. ``kwargs`` are passed to st.dataframe.
+    """
+    if not df.attrs.get('destination'):
+        st.dataframe(df, **kwargs)
+        return
+
+    total_rows, page_rows = df.attrs['total_rows'], df.attrs['page_rows']
+    num_pages = -(-total_rows // page_rows)
+    page = st.number_input(f"Page (of {num_pages:,})", min_value=1, max_value=num_pages,
+                           value=1, key=f"result_page_{query_id}")
+    start = (page - 1) * page_rows
+
+    page_df = df
+    if page > 1:
+        try:
+            page_df = fetch_result_page(get_bigquery_client(), df.attrs['destination'],
+                                        start, page_rows, query_id=query_id)
+        except Exception as e:
+            st.warning(f"Could not load page {page} (results may have expired, run the query again): {e}")
+            return
+
+    st.caption(f"Rows {start + 1:,}-{start + len(page_df):,} of {total_rows:,}")
+    st.dataframe(page_df, **kwargs)
 
 
 def render_tip_panel(query_info: dict, collected_params: dict):
@@ -898,6 +1364,254 @@ df'''
         st.link_button("🎓 Open TIP Platform", TIP_PLATFORM_URL)
 
 
+def render_trends_page():
+    """Render the Technology Trend Analysis (DQ01) panel.
+
+    Every parameter combination is answered from the in-memory trend cube,
+    so changes apply instantly without a BigQuery job.
+    """
+    query_info = DYNAMIC_QUERIES['DQ01']
+    params_config = query_info['parameters']
+
+    if st.button("← Back to Questions"):
+        go_to_landing()
+
+    st.header(query_info['title'])
+    st.caption(query_info['description'])
+
+    client = get_bigquery_client()
+    try:
+        cube = get_trend_cube(client)
+    except (QueryBudgetError, AdmissionError) as e:
+        st.warning(str(e))
+        return
+    except Exception as e:
+        st.error(f"Could not build the trend cube: {e}")
+        return
+
+    with st.container(border=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            config = params_config['jurisdictions']
+            jurisdictions = st.multiselect(config['label'], JURISDICTIONS,
+                                           default=config['default'], key="trend_jurisdictions")
+        with col2:
+            config = params_config['tech_field']
+            fields = list(TECH_FIELDS)
+            tech_field = st.selectbox(config['label'], fields, index=fields.index(config['default']),
+                                      format_func=lambda x: f"{x}: {TECH_FIELDS[x][0]}",
+                                      key="trend_tech_field")
+        with col3:
+            config = params_config['year_range']
+            year_start, year_end = st.slider(config['label'], config['min'], config['max'],
+                                             value=tuple(config['default']), key="trend_years")
+
+    start_time = time.perf_counter()
+    df = cube.query(jurisdictions, tech_field, year_start, year_end)
+    totals = cube.application_totals(jurisdictions, tech_field, year_start, year_end)
+    elapsed = time.perf_counter() - start_time
+
+    if df.empty:
+        st.warning("No applications for this selection.")
+        return
+
+    cols = st.columns(min(len(totals), 4))
+    for i, (jurisdiction, total) in enumerate(totals.items()):
+        with cols[i % len(cols)]:
+            st.metric(f"{jurisdiction} applications {year_start}-{year_end}", f"{total:,}")
+    st.caption(f"Answered locally in {format_time(elapsed)} "
+               f"(PATSTAT edition {get_patstat_edition(client)[:10]})")
+
+    chart = alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X('year:O', title='Filing Year'),
+        y=alt.Y('application_count:Q', title='Applications'),
+        color=alt.Color('jurisdiction:N', scale=alt.Scale(range=COLOR_PALETTE)),
+        tooltip=['jurisdiction', 'year', 'application_count', 'invention_count']
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+    with st.expander("View Data Table", expanded=False):
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+    render_family_counts(client, jurisdictions, tech_field, year_start, year_end)
+
+
+def render_family_counts(client, jurisdictions: list, tech_field: int, year_start: int, year_end: int):
+    """Render distinct inventions (DOCDB families) over the selected years.
+
+    Family counts do not add up across years, so the cube cannot answer
+    them; they are merged from the family sketches, or counted over the
+    base tables when the user asks for exact counts.
+    """
+    st.subheader(f"Distinct inventions {year_start}-{year_end}")
+    exact = st.toggle("Exact counts", key="trend_exact_families",
+                      help="Count distinct families over the PATSTAT tables instead of "
+                           "merging precomputed sketches. Slower and billed as a full scan.")
+    try:
+        with st.spinner("Counting families..."):
+            result = get_family_counts(client, jurisdictions, tech_field, year_start, year_end,
+                                       exact=exact)
+    except (QueryBudgetError, AdmissionError) as e:
+        st.warning(str(e))
+        return
+    except Exception as e:
+        if exact:
+            st.error(f"Could not count families: {e}")
+        else:
+            st.info(f"Family sketches are unavailable ({e}). Build them with "
+                    "`python scripts/build_family_sketches.py`, or switch on exact counts.")
+        return
+
+    items = list(result['counts'].items()) + [("All selected", result['total'])]
+    cols = st.columns(min(len(items), 4))
+    for i, (jurisdiction, count) in enumerate(items):
+        with cols[i % len(cols)]:
+            st.metric(f"{jurisdiction} inventions", f"{count:,}")
+    if result['exact']:
+        st.caption("Exact distinct family counts. Families filed in several jurisdictions "
+                   "count once in the total.")
+    else:
+        error = result['relative_error']
+        st.caption(f"Estimated from HyperLogLog sketches: typically within ±{error:.1%}, "
+                   f"95% of estimates within ±{2 * error:.1%}. Families filed in several "
+                   "jurisdictions count once in the total.")
+
+
+def render_dashboard_page():
+    """Render several catalog queries side by side for shared parameters.
+
+    All queries are submitted at once (submit_batch) and each panel is
+    drawn as soon as its query finishes.
+    """
+    all_queries = get_all_queries()
+
+    if st.button("← Back to Questions", key="dashboard_back"):
+        go_to_landing()
+
+    st.header("Dashboard")
+    st.caption("Run several questions with the same years and offices. All queries run at once; "
+               "panels appear as their results arrive.")
+
+    with st.container(border=True):
+        query_ids = st.multiselect(
+            "Questions", list(all_queries), default=DASHBOARD_QUERIES,
+            max_selections=DASHBOARD_MAX_PANELS, key="dashboard_queries",
+            format_func=lambda qid: f"{qid}: {all_queries[qid]['title']}"
+        )
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            year_start, year_end = st.slider("Filing Year Range", YEAR_MIN, YEAR_MAX,
+                                             value=(DEFAULT_YEAR_START, DEFAULT_YEAR_END),
+                                             key="dashboard_years")
+        with col2:
+            jurisdictions = st.multiselect("Jurisdictions", JURISDICTIONS,
+                                           default=DEFAULT_JURISDICTIONS, key="dashboard_jurisdictions")
+        with col3:
+            st.write("")
+            run_clicked = st.button("Run Dashboard", type="primary", use_container_width=True,
+                                    disabled=not query_ids)
+
+    if run_clicked:
+        client = get_bigquery_client()
+        if client is None:
+            st.error("Could not connect to BigQuery.")
+            return
+        shared = {'year_start': year_start, 'year_end': year_end, 'jurisdictions': jurisdictions}
+        requests = []
+        for query_id in query_ids:
+            query_info = all_queries[query_id]
+            params_config = query_info.get('parameters', {})
+            if "sql_template" in query_info:
+                values = default_parameter_values(params_config)
+                values.update({name: value for name, value in shared.items() if name in values})
+                requests.append((query_id, query_info["sql_template"],
+                                 build_query_params(params_config, values)))
+            else:
+                requests.append((query_id, query_info["sql"], {}))
+
+        cancel_dashboard()
+        try:
+            runs = submit_batch(client, requests)
+        except AdmissionError as e:
+            st.warning(str(e))
+            return
+        st.session_state['dashboard'] = list(zip(query_ids, runs))
+
+    panels = st.session_state.get('dashboard')
+    if not panels:
+        return
+    if all(run.done() for _, run in panels):
+        render_dashboard_panels(panels)
+    else:
+        _dashboard_progress_fragment()
+
+
+@st.fragment(run_every=1.0)
+def _dashboard_progress_fragment():
+    """Redraw the dashboard every second until all of its queries finished."""
+    panels = st.session_state.get('dashboard')
+    if not panels:
+        return
+    reap_abandoned_runs()
+    render_dashboard_panels(panels)
+    if all(run.done() for _, run in panels):
+        st.rerun()
+
+
+def render_dashboard_panels(panels: list):
+    """Render (query_id, QueryRun) panels in a two-column grid."""
+    all_queries = get_all_queries()
+    cols = st.columns(2)
+    for i, (query_id, run) in enumerate(panels):
+        with cols[i % 2], st.container(border=True):
+            render_dashboard_panel(query_id, all_queries[query_id], run)
+
+
+def render_dashboard_panel(query_id: str, query_info: dict, run):
+    """Render one dashboard panel: progress while running, then chart and metrics."""
+    st.markdown(f"**{query_id}: {query_info['title']}**")
+
+    if not run.done():
+        progress = run.progress()
+        st.caption(f"{get_contextual_spinner_message(query_info)} {format_time(progress['elapsed'])} "
+                   f"| {progress['state'].title()}")
+        return
+    if run.cancelled():
+        st.caption("Cancelled")
+        return
+    try:
+        df, execution_time = run.result()
+    except QueryBudgetError as e:
+        st.warning(str(e))
+        return
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return
+
+    if df.empty:
+        st.info("No results for these parameters.")
+    else:
+        chart = render_chart(df, query_info)
+        if chart:
+            st.altair_chart(chart.properties(height=300), use_container_width=True)
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True, height=300)
+        render_metrics(df, query_info)
+
+    source = "result cache" if df.attrs.get('cache_tier') else "snapshot" if df.attrs.get('snapshot') else None
+    st.caption(f"{df.attrs.get('total_rows', len(df)):,} rows in {format_time(execution_time)}"
+               + (f" (from {source})" if source else ""))
+    if st.button("Open", key=f"dashboard_open_{query_id}"):
+        go_to_detail(query_id)
+
+
+def cancel_dashboard():
+    """Cancel the session's unfinished dashboard queries, if any."""
+    for _, run in st.session_state.pop('dashboard', None) or []:
+        if not run.done():
+            cancel_run(run)
+
+
 def render_footer():
     """Render app footer with GitHub and TIP links (Story 5.3)."""
     st.markdown("---")
@@ -1033,7 +1747,7 @@ def render_contribute_page():
                         test_sql = contrib['sql']
                         if 'LIMIT' not in test_sql.upper():
                             test_sql = test_sql.rstrip().rstrip(';') + ' LIMIT 100'
-                        df, exec_time = run_query(client, test_sql)
+                        df, exec_time = run_query(client, test_sql, page="contribution")
                         st.success(f"Query executed successfully in {format_time(exec_time)} - {len(df)} rows")
                         with st.expander("View Results"):
                             st.dataframe(df.head(20))
@@ -1179,7 +1893,7 @@ def render_ai_builder_page():
                         test_sql = generation['sql']
                         if 'LIMIT' not in test_sql.upper():
                             test_sql = test_sql.rstrip().rstrip(';') + ' LIMIT 100'
-                        df, exec_time = run_query(client, test_sql)
+                        df, exec_time = run_query(client, test_sql, page="ai_builder")
 
                         st.divider()
                         st.success(f"Executed in {format_time(exec_time)} - {len(df)} rows")
@@ -1194,7 +1908,7 @@ def render_ai_builder_page():
                             st.altair_chart(chart, use_container_width=True)
 
                         with st.expander("View Data"):
-                            st.dataframe(df, use_container_width=True)
+                            render_data_table("ai", df, use_container_width=True)
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
 
@@ -3,6 +3,9 @@
 
 import re
 
+import numpy as np
+import pandas as pd
+
 
 def format_time(seconds: float) -> str:
     """Format seconds into human-readable string."""
@@ -16,12 +19,163 @@ def format_time(seconds: float) -> str:
         return f"{minutes}m {secs:.0f}s"
 
 
+def format_bytes(num_bytes: float) -> str:
+    """Format a byte count into human-readable string."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(num_bytes) < 1024 or unit == "TB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def compact_frame(df: pd.DataFrame, column_hints: dict = None,
+                  category_max_ratio: float = 0.5) -> pd.DataFrame:
+    """Return ``df`` with memory-efficient dtypes.
+
+    Columns named in ``column_hints`` are cast to the given dtype (e.g.
+    "category", "Int16"). Other columns are detected automatically:
+    - String columns become categorical when at most ``category_max_ratio``
+      of their values are distinct, else pyarrow-backed strings
+    - Integer columns that fit are downcast to 32 bits (nullable integers
+      stay nullable); narrower types overflow in arithmetic on the frame
+      (a sum of int8 counts wraps around), so only a hint narrows further
+
+    Columns holding other objects (lists, dates) and floats are left as is.
+    """
+    column_hints = column_hints or {}
+    out = df.copy(deep=False)
+
+    for col in df.columns:
+        series = df[col]
+        if col in column_hints:
+            out[col] = series.astype(column_hints[col])
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            out[col] = _downcast_integers(series)
+        elif _is_string_column(series):
+            distinct = series.nunique(dropna=True)
+            if len(series) and distinct <= category_max_ratio * len(series):
+                out[col] = series.astype("category")
+            elif series.dtype == object:
+                out[col] = series.astype("string[pyarrow]")
+
+    return out
+
+
+def _downcast_integers(series: pd.Series) -> pd.Series:
+    nullable = isinstance(series.dtype, pd.api.extensions.ExtensionDtype)
+    lo, hi = series.min(), series.max()
+    if pd.isna(lo):
+        return series  # All null
+    info = np.iinfo("int32")
+    if info.min <= lo and hi <= info.max and series.dtype.itemsize > 4:
+        return series.astype("Int32" if nullable else "int32")
+    return series
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if series.dtype != object:
+        return pd.api.types.is_string_dtype(series.dtype)
+    return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+
+
 def detect_sql_parameters(sql: str) -> list:
     """Extract @parameter names from SQL (Story 3.2)."""
     pattern = r'@(\w+)'
     return list(set(re.findall(pattern, sql)))
 
 
+def canonicalize_sql(sql: str) -> str:
+    """Return SQL with comments removed and whitespace collapsed.
+
+    Quoted literals and identifiers are left untouched, so the result is
+    equivalent to the input. Identical canonical text lets BigQuery's own
+    result cache match queries that differ only in formatting.
+    """
+    out = []
+    i, n = 0, len(sql)
+    pending_space = False
+
+    while i < n:
+        ch = sql[i]
+
+        if ch in "'\"`":
+            # Copy quoted literal / identifier verbatim, honouring backslash escapes
+            j = i + 1
+            while j < n and sql[j] != ch:
+                j += 2 if sql[j] == "\\" else 1
+            token = sql[i:j + 1]
+            i = j + 1
+        elif sql.startswith("--", i) or ch == "#":
+            i = sql.find("\n", i)
+            i = n if i == -1 else i
+            pending_space = True
+            continue
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            pending_space = True
+            continue
+        elif ch.isspace():
+            pending_space = True
+            i += 1
+            continue
+        else:
+            token = ch
+            i += 1
+
+        if pending_space and out:
+            out.append(" ")
+        pending_space = False
+        out.append(token)
+
+    return "".join(out).rstrip(";").rstrip()
+
+
+def canonicalize_params(params: dict, params_config: dict, sql: str) -> dict:
+    """Normalize a parameter dict so equivalent requests compare equal.
+
+    Uses the query's ``parameters`` schema and the placeholders found in
+    ``sql``:
+    - Parameters the SQL never references are dropped
+    - Multiselect (list) values are de-duplicated and sorted
+    - Text parameters map None to '' and apply the schema's
+      ``case_insensitive`` / ``ignore_spaces`` flags
+
+    Args:
+        params: Parameter values as collected from the UI
+        params_config: The query's ``parameters`` schema (may be empty)
+        sql: SQL template with @param placeholders
+
+    Returns:
+        New dict with canonical values, keys in sorted order
+    """
+    referenced = set(detect_sql_parameters(sql))
+    params_config = params_config or {}
+
+    canonical = {}
+    for name in sorted(params):
+        if name not in referenced:
+            continue
+        value = params[name]
+        config = params_config.get(name, {})
+        param_type = config.get('type')
+
+        if isinstance(value, (list, tuple, set)):
+            value = sorted({str(v).lower() if config.get('case_insensitive') else v
+                            for v in value})
+        elif param_type == 'text' or isinstance(value, str):
+            value = value or ''
+            if config.get('ignore_spaces'):
+                value = value.replace(' ', '')
+            if config.get('case_insensitive'):
+                value = value.lower()
+
+        canonical[name] = value
+
+    return canonical
+
+
 def format_sql_for_tip(sql: str, params: dict) -> str:
     """Format SQL for use in TIP by substituting actual parameter values.
 
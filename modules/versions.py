@@ -0,0 +1,87 @@
+# PATSTAT Explorer - Table Versions
+# Which tables a query reads, and the last seen version (modified time and
+# row count) of each, so cached results are invalidated per table when
+# PATSTAT is reloaded instead of after a fixed TTL.
+
+import functools
+import re
+import threading
+import time
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_LINE_COMMENT = re.compile(r"--[^\n]*|#[^\n]*")
+# FROM inside EXTRACT(part FROM expr) is not a table reference
+_EXTRACT = re.compile(r"\bEXTRACT\s*\(\s*\w+\s+FROM\b", re.IGNORECASE)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(`[^`]+`|[A-Za-z_][\w.-]*)", re.IGNORECASE)
+_CTE = re.compile(r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*([A-Za-z_]\w*)\s+AS\s*\(", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def referenced_tables(sql: str) -> tuple:
+    """Return the tables a query reads, as written in the SQL (without backticks).
+
+    Common table expressions and UNNEST are not tables and are left out.
+    """
+    sql = _LINE_COMMENT.sub(" ", _STRING_LITERAL.sub("''", sql))
+    sql = _EXTRACT.sub("EXTRACT(", sql)
+    ctes = {name.lower() for name in _CTE.findall(sql)}
+    tables = {match.strip("`") for match in _TABLE_REF.findall(sql)}
+    return tuple(sorted(t for t in tables if t.lower() not in ctes and t.upper() != "UNNEST"))
+
+
+class TableVersions:
+    """Last seen version of each table, re-read at most every ``refresh_seconds``.
+
+    Versions are opaque strings (see :meth:`refresh`); a table whose
+    version differs from the one a cached result was stored with has been
+    modified since.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions = {}  # table -> (version or None if never read, checked_at)
+        self._lock = threading.Lock()
+
+    def refresh(self, tables, fetch):
+        """Return the current versions of ``tables``.
+
+        Tables not checked within ``refresh_seconds`` are re-read with
+        ``fetch(table)``, which returns the table's version string. Tables
+        that cannot be read keep their last seen version (or are left out)
+        and are not retried before ``refresh_seconds`` have passed.
+
+        Returns:
+            tuple: (dict table -> version, dict of tables seen for the first
+            time or whose version changed, table -> new version)
+        """
+        now = time.time()
+        with self._lock:
+            due = [t for t in tables
+                   if t not in self._versions or now - self._versions[t][1] > self.refresh_seconds]
+
+        fetched, failed = {}, []
+        for table in due:
+            try:
+                fetched[table] = fetch(table)
+            except Exception as e:
+                print(f"Could not read version of {table}: {e}")
+                failed.append(table)
+
+        changed = {}
+        with self._lock:
+            for table, version in fetched.items():
+                previous = self._versions.get(table)
+                if previous is None or previous[0] != version:
+                    changed[table] = version
+                self._versions[table] = (version, now)
+            for table in failed:
+                previous = self._versions.get(table)
+                self._versions[table] = (previous[0] if previous else None, now)
+            versions = {t: self._versions[t][0] for t in tables
+                        if t in self._versions and self._versions[t][0] is not None}
+        return versions, changed
+
+    def snapshot(self) -> dict:
+        """Return the last seen version of every table, table -> version."""
+        with self._lock:
+            return {t: v for t, (v, _) in self._versions.items() if v is not None}
@@ -22,10 +22,58 @@ Parameter Schema:
             "defaults": [...] | value,
             "default_start": int,  # for year_range only
             "default_end": int,    # for year_range only
-            "required": True | False
+            "required": True | False,
+            "case_insensitive": True,  # optional, SQL compares the value case-insensitively
+            "ignore_spaces": True      # optional, SQL strips spaces from the value
         }
     }
 
+Optional "max_bytes_billed" (int, bytes) overrides the global per-job budget
+(modules.config.MAX_BYTES_BILLED_DEFAULT). Jobs whose dry-run estimate exceeds it
+are rejected before running, with a narrower year range suggested.
+
+Optional "column_hints" maps result columns to compact dtypes ("category",
+"Int16", ...) applied after download (modules.utils.compact_frame); columns
+without a hint are downcast automatically (integers to 32 bits at most).
+
+Optional "display_rows" (int) pages results larger than that: the detail page
+downloads one page at a time from the job's destination table and fetches
+all rows only for export. Results above modules.config.PAGINATE_MIN_ROWS are
+paged regardless.
+
+Optional "incremental_years" marks queries whose result rows each belong to one
+filing year (the year is an output column). Per-year results are cached and a
+new year range only queries the years not cached yet:
+    "incremental_years": {
+        "year_column": "filing_year",      # output column holding the year
+        "sort_by": ["filing_year"],        # the query's ORDER BY, for the merge
+        "ascending": True | [True, False]  # optional, default True
+    }
+
+Optional "param_columns" maps parameters to the result columns they filter
+("year_range" covers year_start/year_end). A cached result of the same query
+with a wider year range or more jurisdictions then answers narrower requests
+by local filtering (modules.refine). Only declare it when every row of the
+result belongs to one value of each mapped column and no LIMIT or HAVING
+depends on the other rows:
+    "param_columns": {"year_range": "filing_year", "jurisdictions": "office_code"}
+
+Optional "aggregate" lets the data layer answer the query from a summary table
+(modules.summaries). It names the summary dimensions the query groups or filters
+on, the additive measures it reads, and an equivalent SQL against {source}; the
+smallest summary table of the current PATSTAT edition holding them is used, and
+the base-table SQL otherwise:
+    "aggregate": {
+        "dimensions": ["appln_auth", "appln_filing_year"],
+        "measures": ["applications"],
+        "sql": "SELECT ... SUM(applications) ... FROM {source} WHERE ..."
+    }
+
+Parameter values are canonicalized before execution (modules.utils.canonicalize_params):
+multiselect values are de-duplicated and sorted, missing text values become '',
+and parameters the template does not reference are dropped. The two optional
+flags above let equivalent inputs ("a61b 6" / "A61B6") share cached results.
+
 Available Parameter Types:
 - year_range: Year slider with default_start and default_end
 - multiselect: Multiple selection dropdown (options can be list or "jurisdictions"/"wipo_fields")
@@ -85,6 +133,7 @@ Essential for understanding the scope and coverage of the database.""",
         ],
         "estimated_seconds_first_run": 15,
         "estimated_seconds_cached": 5,
+        "max_bytes_billed": 500 * 1024 ** 3,  # joins every large table; above the global default
         "display_mode": "metrics_grid",
         "sql": """
             SELECT 'Total Applications' AS metric, CAST(COUNT(*) AS STRING) AS value FROM `tls201_appln`
@@ -182,6 +231,22 @@ EP = European Patent Office, US = USPTO, CN = CNIPA, etc.""",
             "y": "application_count",
             "type": "bar"
         },
+        "aggregate": {
+            "dimensions": ["appln_auth", "appln_filing_year"],
+            "measures": ["applications"],
+            "sql": """
+                SELECT
+                    appln_auth AS filing_authority,
+                    SUM(applications) AS application_count,
+                    ROUND(SUM(applications) * 100.0 / SUM(SUM(applications)) OVER (), 2) AS percentage
+                FROM {source}
+                WHERE appln_auth IS NOT NULL
+                  AND appln_filing_year BETWEEN @year_start AND @year_end
+                GROUP BY appln_auth
+                ORDER BY application_count DESC
+                LIMIT 30
+            """
+        },
         "sql": """
             SELECT
                 appln_auth AS filing_authority,
@@ -242,6 +307,8 @@ Note: Recent years may show lower grant rates due to:
         ],
         "estimated_seconds_first_run": 3,
         "estimated_seconds_cached": 1,
+        "param_columns": {"year_range": "filing_year"},
+        "incremental_years": {"year_column": "filing_year", "sort_by": ["filing_year"]},
         "visualization": {
             "x": "filing_year",
             "y": "count",
@@ -249,6 +316,23 @@ Note: Recent years may show lower grant rates due to:
             "type": "stacked_bar",
             "stacked_columns": ["granted", "not_granted"]
         },
+        "aggregate": {
+            "dimensions": ["appln_auth", "appln_filing_year"],
+            "measures": ["applications", "granted_applications"],
+            "sql": """
+                SELECT
+                    appln_filing_year AS filing_year,
+                    SUM(applications) AS applications,
+                    SUM(granted_applications) AS granted,
+                    SUM(applications) - SUM(granted_applications) AS not_granted,
+                    ROUND(SUM(granted_applications) * 100.0 / NULLIF(SUM(applications), 0), 1) AS grant_rate_pct
+                FROM {source}
+                WHERE appln_filing_year BETWEEN @year_start AND @year_end
+                  AND appln_auth IN UNNEST(@jurisdictions)
+                GROUP BY appln_filing_year
+                ORDER BY appln_filing_year ASC
+            """
+        },
         "sql": """
             SELECT
                 appln_filing_year AS filing_year,
@@ -316,6 +400,22 @@ IPC classes indicate the technology area of a patent:
         ],
         "estimated_seconds_first_run": 8,
         "estimated_seconds_cached": 1,
+        "aggregate": {
+            "dimensions": ["appln_auth", "appln_filing_year", "ipc_subclass"],
+            "measures": ["ipc_assignments", "ipc_applications"],
+            "sql": """
+                SELECT
+                    ipc_subclass AS ipc_class,
+                    SUM(ipc_assignments) AS assignment_count,
+                    SUM(ipc_applications) AS unique_applications
+                FROM {source}
+                WHERE appln_filing_year BETWEEN @year_start AND @year_end
+                  AND appln_auth IN UNNEST(@jurisdictions)
+                GROUP BY ipc_subclass
+                ORDER BY assignment_count DESC
+                LIMIT 25
+            """
+        },
         "sql": """
             SELECT
                 SUBSTR(ipc_class_symbol, 1, 4) AS ipc_class,
@@ -368,6 +468,7 @@ No parameters needed - this shows recent sample data.""",
         ],
         "estimated_seconds_first_run": 1,
         "estimated_seconds_cached": 1,
+        "column_hints": {"appln_auth": "category", "granted": "category", "appln_filing_year": "Int16"},
         "sql": """
             SELECT
                 appln_id,
@@ -441,6 +542,7 @@ Minimum threshold of 100 patents ensures statistical relevance.""",
         ],
         "estimated_seconds_first_run": 5,
         "estimated_seconds_cached": 1,
+        "column_hints": {"person_ctry_code": "category"},
         "visualization": {
             "x": "person_ctry_code",
             "y": "patent_count",
@@ -520,6 +622,12 @@ Tracks both total applications and the proportion dedicated to green tech.""",
         ],
         "estimated_seconds_first_run": 5,
         "estimated_seconds_cached": 1,
+        "param_columns": {"year_range": "appln_filing_year", "jurisdictions": "ctry_code"},
+        "incremental_years": {
+            "year_column": "appln_filing_year",
+            "sort_by": ["appln_filing_year", "green_tech_percentage"],
+            "ascending": [True, False],
+        },
         "sql": """
             SELECT
                 a.appln_filing_year,
@@ -613,6 +721,28 @@ breadth (patent importance), while citation counts measure technical influence."
             "color": "techn_sector",
             "type": "bar"
         },
+        "aggregate": {
+            "dimensions": ["appln_auth", "appln_filing_year", "techn_field_nr"],
+            "measures": ["field_applications", "family_size_sum", "family_size_count",
+                         "citing_families_sum", "citing_families_count"],
+            "sql": """
+                SELECT
+                    tf.techn_field,
+                    tf.techn_sector,
+                    SUM(s.field_applications) AS application_count,
+                    ROUND(SUM(s.family_size_sum) / NULLIF(SUM(s.family_size_count), 0), 2) AS avg_family_size,
+                    ROUND(SUM(s.citing_families_sum) / NULLIF(SUM(s.citing_families_count), 0), 2) AS avg_citations
+                FROM {source} s
+                JOIN (SELECT DISTINCT techn_field_nr, techn_field, techn_sector
+                      FROM tls901_techn_field_ipc) tf ON s.techn_field_nr = tf.techn_field_nr
+                WHERE s.appln_filing_year BETWEEN @year_start AND @year_end
+                  AND s.appln_auth IN UNNEST(@jurisdictions)
+                  AND (@tech_sector = 'All Sectors' OR tf.techn_sector = @tech_sector)
+                GROUP BY tf.techn_field, tf.techn_sector
+                ORDER BY application_count DESC
+                LIMIT 15
+            """
+        },
         "sql": """
             SELECT
                 tf.techn_field,
@@ -829,6 +959,7 @@ established players in this field.""",
         ],
         "estimated_seconds_first_run": 25,
         "estimated_seconds_cached": 9,
+        "display_rows": 500,
         "visualization": {
             "x": "company_name",
             "y": "patent_count",
@@ -991,6 +1122,7 @@ established players in this field.""",
                 "label": "Applicant Name Filter",
                 "defaults": "",
                 "placeholder": "e.g., Samsung, Siemens (leave empty for all)",
+                "case_insensitive": True,
                 "required": False
             }
         },
@@ -1079,6 +1211,7 @@ Minimum threshold of 50 patents ensures focus on significant players.""",
                 "label": "Competitors to Analyze",
                 "options": "medtech_competitors",
                 "defaults": ["Medtronic", "Johnson & Johnson", "Abbott", "Boston Scientific", "Stryker"],
+                "case_insensitive": True,
                 "required": True
             }
         },
@@ -1095,6 +1228,7 @@ Stryker, Zimmer, Smith & Nephew, Edwards, Baxter, Fresenius, and B. Braun.""",
         ],
         "estimated_seconds_first_run": 4,
         "estimated_seconds_cached": 1,
+        "column_hints": {"applicant_name": "category", "filing_authority": "category", "authority_description": "category"},
         "sql": """
             WITH medical_tech_applications AS (
                 SELECT DISTINCT
@@ -1309,6 +1443,7 @@ Minimum threshold of 10 citations ensures significance.""",
                 "label": "IPC Class",
                 "defaults": "A61B 6",
                 "placeholder": "e.g., A61B 6, G06N, H01L",
+                "ignore_spaces": True,
                 "required": True
             }
         },
@@ -1325,6 +1460,7 @@ Helps inform international filing strategy by showing office-specific grant succ
         ],
         "estimated_seconds_first_run": 2,
         "estimated_seconds_cached": 1,
+        "param_columns": {"jurisdictions": "office_code"},
         "sql": """
             WITH diagnostic_imaging_patents AS (
                 SELECT DISTINCT
@@ -1408,6 +1544,7 @@ Helps inform international filing strategy by showing office-specific grant succ
                 "label": "IPC Main Class",
                 "defaults": "A61B",
                 "placeholder": "e.g., A61B, G06F, H01L",
+                "ignore_spaces": True,
                 "required": True
             }
         },
@@ -1493,6 +1630,7 @@ Uses main class A61B% - covers all medical diagnosis/surgery subclasses.""",
                 "label": "IPC Main Class",
                 "defaults": "A61B",
                 "placeholder": "e.g., A61B, G06F, H01L",
+                "ignore_spaces": True,
                 "required": True
             }
         },
@@ -1874,6 +2012,7 @@ The person_name field contains the inventor's name as filed.""",
         "methodology": "Counts distinct applications per inventor from tls207_pers_appln",
         "estimated_seconds_first_run": 10,
         "estimated_seconds_cached": 2,
+        "column_hints": {"country": "category", "first_filing_year": "Int16", "last_filing_year": "Int16"},
         "visualization": {
             "x": "inventor_name",
             "y": "application_count",
@@ -3046,6 +3185,7 @@ This ratio helps understand innovation vs. globalization strategies.""",
         "methodology": "Based on EPO PATSTAT sample query 2.5 concept - adapted for BigQuery",
         "estimated_seconds_first_run": 5,
         "estimated_seconds_cached": 1,
+        "param_columns": {"year_range": "appln_filing_year"},
         "sql": """
             SELECT
                 appln_filing_year,
@@ -3113,6 +3253,7 @@ Uses EXISTS subqueries to find applications with both specified IPC classes.""",
         "methodology": "Based on EPO PATSTAT sample query 2.7 - adapted for BigQuery",
         "estimated_seconds_first_run": 8,
         "estimated_seconds_cached": 2,
+        "param_columns": {"year_range": "appln_filing_year", "jurisdictions": "authority"},
         "sql": """
             WITH cross_classified AS (
                 SELECT
@@ -3577,6 +3718,7 @@ Useful for understanding examination rigor and success rates across offices.""",
         "methodology": "Derived from EPO training concepts - grant analysis",
         "estimated_seconds_first_run": 4,
         "estimated_seconds_cached": 1,
+        "param_columns": {"year_range": "appln_filing_year", "jurisdictions": "authority"},
         "sql": """
             SELECT
                 appln_filing_year,
@@ -3708,6 +3850,7 @@ The citation rate comparison indicates research vs. commercial focus.""",
         "methodology": "Derived from EPO training concepts - sector analysis",
         "estimated_seconds_first_run": 10,
         "estimated_seconds_cached": 2,
+        "param_columns": {"year_range": "appln_filing_year"},
         "sql": """
             SELECT
                 p.psn_sector AS sector,
@@ -3849,6 +3992,8 @@ is calculated as percentage change from base year to recent year.""",
                 "label": "Classification Symbol (e.g. A61B, G06N10/00, Y02E)",
                 "defaults": "A61B",
                 "placeholder": "e.g., A61B, H04L29/06, Y02E",
+                "case_insensitive": True,
+                "ignore_spaces": True,
                 "required": True
             },
             "system": {
@@ -3931,6 +4076,7 @@ not on EPO TIP.""",
                 "label": "Technology Keyword (e.g. laser, battery, robot)",
                 "defaults": "laser",
                 "placeholder": "e.g., laser, battery, robot, pharmaceutical",
+                "case_insensitive": True,
                 "required": True
             }
         },
@@ -4023,6 +4169,7 @@ not on EPO TIP.""",
         ],
         "estimated_seconds_first_run": 2,
         "estimated_seconds_cached": 1,
+        "display_rows": 500,
         "sql": """
             SELECT
                 con.modification,
@@ -4183,6 +4330,7 @@ not on EPO TIP.""",
                 "label": "Parent Symbol (e.g. A61B, H04L, Y02E)",
                 "defaults": "A61B",
                 "placeholder": "e.g., A61B, H04L, Y02E",
+                "case_insensitive": True,
                 "required": True
             },
             "system": {
@@ -4315,6 +4463,8 @@ Use this to identify technology trends, compare jurisdictions, or track sector g
         ],
         "estimated_seconds_first_run": 8,
         "estimated_seconds_cached": 2,
+        "param_columns": {"year_range": "year", "jurisdictions": "jurisdiction"},
+        "incremental_years": {"year_column": "year", "sort_by": ["jurisdiction", "year"]},
         "parameters": {
             "jurisdictions": {
                 "type": "multiselect",
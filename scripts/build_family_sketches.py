@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Build the family sketch table.
+
+Precomputes HLL_COUNT.INIT sketches of docdb_family_id per (filing year,
+authority, WIPO field) into the sketch table (see modules/config.py, FAMILY
+SKETCHES) and saves a Parquet copy tagged with the PATSTAT edition, so the
+table can be restored without rescanning PATSTAT. Rerun after every new
+PATSTAT edition.
+
+Usage:
+    python scripts/build_family_sketches.py
+    python scripts/build_family_sketches.py --dry-run
+    python scripts/build_family_sketches.py --restore .cache/sketches/family_sketches_<edition>.parquet
+
+Prerequisites:
+    Credentials as for the app (.env with GOOGLE_APPLICATION_CREDENTIALS_JSON,
+    or gcloud auth application-default login) with write access to the
+    sketch dataset.
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+from google.cloud import bigquery
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.config import SKETCH_PRECISION, SKETCH_DIR
+from modules.data import get_bigquery_client, get_patstat_edition, sketch_table_id, _job_config
+from modules.telemetry import job_labels
+from modules.sketches import build_sql, local_path, relative_error
+from modules.utils import format_bytes
+
+
+def build(client, precision: int, dry_run: bool = False):
+    """Create the sketch table and save its local copy."""
+    table = sketch_table_id()
+    sql = build_sql(table, precision)
+    labels = job_labels("family_sketches", page="script")
+    job = client.query(sql, job_config=_job_config([], dry_run=dry_run, labels=labels))
+    if dry_run:
+        print(sql)
+        print(f"Would scan {format_bytes(job.total_bytes_processed or 0)}")
+        return
+
+    print(f"Building {table} (precision {precision}, "
+          f"~{relative_error(precision):.2%} standard error)...")
+    job.result()
+    print(f"  Scanned {format_bytes(job.total_bytes_processed or 0)}")
+
+    edition = get_patstat_edition(client)
+    path = local_path(os.getenv("SKETCH_DIR", SKETCH_DIR), edition)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = client.list_rows(table).to_dataframe(create_bqstorage_client=False)
+    df.to_parquet(path, index=False)
+    print(f"  Saved {len(df):,} sketches for edition {edition} to {path}")
+
+
+def restore(client, path: str):
+    """Upload a saved local copy as the sketch table."""
+    import pandas as pd
+
+    table = sketch_table_id()
+    df = pd.read_parquet(path)
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        clustering_fields=["authority", "tech_field"],
+    )
+    client.load_table_from_dataframe(df, table, job_config=job_config).result()
+    print(f"Restored {len(df):,} sketches from {path} to {table}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the HLL_COUNT family sketch table")
+    parser.add_argument("--precision", type=int,
+                        default=int(os.getenv("SKETCH_PRECISION", SKETCH_PRECISION)),
+                        help="HLL_COUNT precision, 10-24 (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the statement and its scan size")
+    parser.add_argument("--restore", metavar="PARQUET", help="Upload a saved copy instead of building")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = get_bigquery_client()
+    if args.restore:
+        restore(client, args.restore)
+    else:
+        build(client, args.precision, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Build the edition snapshot.
+
+Runs every QUERIES entry with the defaults of its parameter controls, plus
+the extra profiles in modules/config.py (SNAPSHOT_PROFILES), and writes the
+results to a Parquet bundle tagged with the PATSTAT edition. The app serves
+requests with matching parameters from the bundle of the loaded edition.
+Rerun after every new PATSTAT edition, and after editing catalog SQL.
+
+Usage:
+    python scripts/build_snapshot.py
+    python scripts/build_snapshot.py Q01 Q03
+    python scripts/build_snapshot.py --output /srv/patstat/snapshots
+
+Prerequisites:
+    Credentials as for the app (.env with GOOGLE_APPLICATION_CREDENTIALS_JSON,
+    or gcloud auth application-default login).
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules.config import SNAPSHOT_DIR, SNAPSHOT_PROFILES
+from modules.cache import make_cache_key
+from modules.data import (
+    get_bigquery_client, get_patstat_edition, default_parameter_values, route_to_summary,
+    download_full_result, _prepare, _execute
+)
+from modules.logic import build_query_params
+from modules.snapshot import SnapshotBundle, bundle_dir
+
+
+def profiles(query_info: dict, query_id: str) -> list:
+    """Return the parameter values to snapshot a query with, defaults first."""
+    params_config = query_info.get('parameters', {})
+    defaults = default_parameter_values(params_config)
+    return [defaults] + [{**defaults, **extra} for extra in SNAPSHOT_PROFILES.get(query_id, [])]
+
+
+def snapshot_query(client, bundle: SnapshotBundle, query_id: str, query_info: dict):
+    """Run one catalog query for each of its profiles and add the results."""
+    params_config = query_info.get('parameters', {})
+    for values in profiles(query_info, query_id):
+        if "sql_template" in query_info:
+            sql, params = _prepare(query_info['sql_template'],
+                                   build_query_params(params_config, values), query_id)
+        else:
+            sql, params = _prepare(query_info['sql'], {}, query_id, params_config={})
+
+        df, seconds = _execute(client, route_to_summary(client, sql, query_id), params,
+                               query_id=query_id, fallback_sql=sql, page="snapshot")
+        df = download_full_result(client, df, query_id=query_id)
+        bundle.add(make_cache_key(sql, params), df, query_id, params)
+        print(f"  {query_id} {params or ''}: {len(df):,} rows in {seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the edition snapshot bundle")
+    parser.add_argument("query_ids", nargs="*", help="Queries to snapshot (default: all)")
+    parser.add_argument("--output", default=os.getenv("SNAPSHOT_DIR", SNAPSHOT_DIR),
+                        help="Snapshot directory (default: %(default)s)")
+    args = parser.parse_args()
+    unknown = sorted(set(args.query_ids) - set(QUERIES))
+    if unknown:
+        parser.error(f"unknown queries: {', '.join(unknown)}")
+
+    load_dotenv()
+    client = get_bigquery_client()
+    edition = get_patstat_edition(client)
+
+    # Extend an existing bundle of this edition when snapshotting single queries
+    bundle = SnapshotBundle.load(args.output, edition) if args.query_ids else None
+    if bundle is None:
+        bundle = SnapshotBundle(bundle_dir(args.output, edition), edition)
+    print(f"Snapshot of PATSTAT edition {edition} -> {bundle.path}")
+
+    failed = []
+    for query_id in args.query_ids or QUERIES:
+        try:
+            snapshot_query(client, bundle, query_id, QUERIES[query_id])
+        except Exception as e:
+            print(f"  {query_id} failed: {e}")
+            failed.append(query_id)
+
+    bundle.save()
+    print(f"Saved {len(bundle.entries)} results" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
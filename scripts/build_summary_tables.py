@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Build the summary tables.
+
+Creates the aggregate tables defined in modules/summaries.py, labelled with
+the PATSTAT edition they were built from. Catalog queries with an
+"aggregate" entry are answered from them while the label matches the loaded
+edition; rerun after every new PATSTAT edition.
+
+Usage:
+    python scripts/build_summary_tables.py
+    python scripts/build_summary_tables.py appln_auth_year
+    python scripts/build_summary_tables.py --dry-run
+
+Prerequisites:
+    Credentials as for the app (.env with GOOGLE_APPLICATION_CREDENTIALS_JSON,
+    or gcloud auth application-default login) with write access to the
+    summary dataset.
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data import get_bigquery_client, get_patstat_edition, summary_table_id, _job_config
+from modules.telemetry import job_labels
+from modules.summaries import SUMMARY_TABLES, build_sql
+from modules.utils import format_bytes
+
+
+def build(client, name: str, edition: str, dry_run: bool = False):
+    """Create one summary table."""
+    table = summary_table_id(name)
+    sql = build_sql(name, table, edition)
+    labels = job_labels(f"summary_{name}", page="script")
+    job = client.query(sql, job_config=_job_config([], dry_run=dry_run, labels=labels))
+    if dry_run:
+        print(f"{table}: would scan {format_bytes(job.total_bytes_processed or 0)}")
+        return
+
+    print(f"Building {table} ({SUMMARY_TABLES[name]['description']})...")
+    job.result()
+    rows = client.get_table(table).num_rows
+    print(f"  {rows:,} rows, scanned {format_bytes(job.total_bytes_processed or 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the summary tables")
+    parser.add_argument("names", nargs="*",
+                        help=f"Summary tables to build (default: all of {', '.join(SUMMARY_TABLES)})")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the scan size of each build")
+    args = parser.parse_args()
+    unknown = sorted(set(args.names) - set(SUMMARY_TABLES))
+    if unknown:
+        parser.error(f"unknown summary tables: {', '.join(unknown)}")
+
+    load_dotenv()
+    client = get_bigquery_client()
+    edition = get_patstat_edition(client)
+    print(f"PATSTAT edition {edition}")
+    for name in args.names or SUMMARY_TABLES:
+        build(client, name, edition, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Shared fixtures for tests that go through the data layer."""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data
+from modules.cache import ResultCache
+from modules.estimates import RuntimeEstimator
+from modules.execution import SingleFlight, FairExecutor, AdmissionController
+from modules.prewarm import RequestLog
+from modules.versions import TableVersions
+
+
+@pytest.fixture
+def data_state(monkeypatch, tmp_path):
+    """Give the test its own instance of every process-wide object of modules.data.
+
+    An empty memory-only result cache, a single-flight registry, a table
+    version tracker, an executor with admission control, request and
+    execution logs under tmp_path, no snapshot and no summary tables. The
+    getters read the returned namespace on every call, so a test swaps an
+    instance by assigning it (e.g. ``data_state.session_id = "s1"``).
+    """
+    data._dry_run.clear()
+    executor = FairExecutor(max_workers=4, max_per_owner=2)
+    state = SimpleNamespace(
+        cache=ResultCache(max_memory_bytes=10 * 1024 ** 2),
+        flights=SingleFlight(),
+        versions=TableVersions(refresh_seconds=60),
+        executor=executor,
+        admission=AdmissionController(executor, max_per_session=4, max_wait=600),
+        request_log=RequestLog(str(tmp_path / "requests.jsonl")),
+        estimator=RuntimeEstimator(RequestLog(str(tmp_path / "executions.jsonl"))),
+        snapshot=None,
+        session_id=None,
+    )
+    monkeypatch.setattr(data, "get_result_cache", lambda: state.cache)
+    monkeypatch.setattr(data, "get_single_flight", lambda: state.flights)
+    monkeypatch.setattr(data, "get_table_versions", lambda: state.versions)
+    monkeypatch.setattr(data, "get_executor", lambda: state.executor)
+    monkeypatch.setattr(data, "get_admission_controller", lambda: state.admission)
+    monkeypatch.setattr(data, "get_request_log", lambda: state.request_log)
+    monkeypatch.setattr(data, "get_runtime_estimator", lambda: state.estimator)
+    monkeypatch.setattr(data, "get_snapshot", lambda client: state.snapshot)
+    monkeypatch.setattr(data, "get_session_id", lambda: state.session_id)
+    monkeypatch.setattr(data, "get_summary_tables", MagicMock(return_value={}))
+    return state
+
+
+def _query_parameters(job_config) -> dict:
+    return {p.name: p.value if hasattr(p, "value") else p.values
+            for p in job_config.query_parameters}
+
+
+def make_fake_client(result=None, bytes_processed=0, fail=None, job_attrs: dict = None):
+    """Return a fake BigQuery client and the list of jobs it ran.
+
+    Args:
+        result: DataFrame every job returns, or callable(params) -> DataFrame
+            of the job's query parameters (name -> value); one row by default
+        bytes_processed: Bytes every dry run and job reports, or
+            callable(params) -> bytes
+        fail: Optional callable(sql) returning an exception to raise
+            instead of running (dry runs included), or None
+        job_attrs: Extra attributes of every job (e.g. its query_plan)
+
+    Returns:
+        tuple: (client, jobs), jobs being a {'sql', 'params', 'labels'} dict
+        per executed (not dry-run) job; every table reads as version
+        '2025-04-01T00:00:00|100' (see client.get_table.return_value)
+    """
+    jobs = []
+
+    def query(sql, job_config=None):
+        error = fail(sql) if fail else None
+        if error is not None:
+            raise error
+        params = _query_parameters(job_config)
+        job = MagicMock(**(job_attrs or {}))
+        job.total_bytes_processed = bytes_processed(params) if callable(bytes_processed) else bytes_processed
+        job.cache_hit = False
+        job.referenced_tables = []
+        job.destination = None
+        if job_config.dry_run:
+            return job
+        jobs.append({"sql": sql, "params": params, "labels": job_config.labels})
+        df = result(params) if callable(result) else result
+        df = pd.DataFrame({"n": [1]}) if df is None else df
+        rows = MagicMock()
+        rows.total_rows = len(df)
+        rows.to_dataframe.return_value = df
+        job.result.return_value = rows
+        return job
+
+    client = MagicMock()
+    client.query.side_effect = query
+    client.get_table.return_value.modified.isoformat.return_value = "2025-04-01T00:00:00"
+    client.get_table.return_value.num_rows = 100
+    return client, jobs
+
+
+@pytest.fixture
+def fake_client():
+    """Factory of fake BigQuery clients; see make_fake_client."""
+    return make_fake_client
@@ -0,0 +1,134 @@
+"""Tests for per-session concurrency limits and admission control."""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.execution import FairExecutor, AdmissionController, AdmissionError, QueryRun
+
+
+class TestPerOwnerLimit:
+    """Tests for FairExecutor's max_per_owner."""
+
+    def test_owner_running_limit(self):
+        """One owner never runs more than max_per_owner tasks at once."""
+        executor = FairExecutor(max_workers=4, max_per_owner=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def task():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        futures = [executor.submit(task, owner="a") for _ in range(6)]
+        for f in futures:
+            f.result(timeout=5)
+        assert peak[0] == 2
+
+    def test_other_owner_uses_free_workers(self):
+        """A saturated owner does not block another owner's tasks."""
+        executor = FairExecutor(max_workers=2, max_per_owner=1)
+        release = threading.Event()
+        executor.submit(release.wait, 5, owner="a")
+        queued = executor.submit(lambda: "a2", owner="a")
+
+        assert executor.submit(lambda: "b", owner="b").result(timeout=5) == "b"
+        assert not queued.done()
+        release.set()
+        assert queued.result(timeout=5) == "a2"
+
+    def test_task_raises_owner_limit(self):
+        """Tasks submitted with max_running run that many at once."""
+        executor = FairExecutor(max_workers=4, max_per_owner=1)
+        barrier = threading.Barrier(3, timeout=5)
+        futures = [executor.submit(barrier.wait, owner="a", max_running=3) for _ in range(3)]
+        for f in futures:
+            f.result(timeout=5)  # BrokenBarrierError unless all three ran together
+
+    def test_owner_load_ignores_cancelled(self):
+        """Cancelled queued tasks no longer count against the owner."""
+        executor = FairExecutor(max_workers=1, max_per_owner=1)
+        release = threading.Event()
+        executor.submit(release.wait, 5, owner="a")
+        queued = executor.submit(lambda: None, owner="a")
+        assert executor.owner_load("a") == 2
+
+        queued.cancel()
+        assert executor.owner_load("a") == 1
+        release.set()
+
+
+class TestAdmissionController:
+    """Tests for AdmissionController."""
+
+    def test_admits_within_quota(self):
+        """An idle executor admits any session."""
+        controller = AdmissionController(FairExecutor(max_workers=1), max_per_session=2, max_wait=10)
+        controller.admit("s1")
+        assert controller.stats()["rejected"] == 0
+
+    def test_rejects_over_session_quota(self):
+        """A session with max_per_session queries pending is rejected."""
+        executor = FairExecutor(max_workers=1)
+        release = threading.Event()
+        controller = AdmissionController(executor, max_per_session=2, max_wait=600)
+        executor.submit(release.wait, 5, owner="s1")
+        executor.submit(lambda: None, owner="s1")
+
+        with pytest.raises(AdmissionError, match="already have 2"):
+            controller.admit("s1")
+        controller.admit("s2")  # Other sessions are unaffected
+        assert controller.stats()["rejected"] == 1
+        release.set()
+
+    def test_batch_admitted_as_a_whole(self):
+        """A batch that does not fit the session quota is rejected entirely."""
+        executor = FairExecutor(max_workers=1)
+        release = threading.Event()
+        controller = AdmissionController(executor, max_per_session=4, max_wait=600)
+        executor.submit(release.wait, 5, owner="s1")
+
+        controller.admit("s1", count=3)
+        with pytest.raises(AdmissionError, match="These 4 queries"):
+            controller.admit("s1", count=4)
+        release.set()
+
+    def test_rejects_when_wait_exceeds_deadline(self):
+        """Queries are rejected when the estimated queue wait is too long."""
+        executor = FairExecutor(max_workers=1)
+        executor.submit(time.sleep, 0.05).result(timeout=5)  # Seed run-time history
+
+        release = threading.Event()
+        executor.submit(release.wait, 5, owner="a")
+        for owner in "bcd":
+            executor.submit(lambda: None, owner=owner)
+        assert executor.estimated_wait() > 0.1
+
+        controller = AdmissionController(executor, max_per_session=10, max_wait=0.1)
+        with pytest.raises(AdmissionError, match="busy"):
+            controller.admit("e")
+        release.set()
+
+    def test_no_history_no_deadline_rejection(self):
+        """Without run-time history the wait estimate is zero."""
+        assert FairExecutor(max_workers=1).estimated_wait() == 0.0
+
+
+class TestResolvedRun:
+    """Tests for QueryRun.resolve."""
+
+    def test_resolve_finishes_without_executing(self):
+        """A resolved run is done and returns the given result."""
+        run = QueryRun(label="Q01").resolve(("df", 0.0))
+        assert run.done()
+        assert run.result(timeout=1) == ("df", 0.0)
+        assert run.task is None
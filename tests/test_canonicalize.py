@@ -0,0 +1,113 @@
+"""Tests for SQL and parameter canonicalization."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.utils import canonicalize_sql, canonicalize_params
+from modules.cache import make_cache_key
+from queries_bq import QUERIES
+
+
+class TestCanonicalizeSql:
+    """Tests for SQL text canonicalization."""
+
+    def test_collapses_whitespace(self):
+        """Runs of whitespace and newlines become single spaces."""
+        assert canonicalize_sql("SELECT  a,\n\t b\nFROM t") == "SELECT a, b FROM t"
+
+    def test_strips_comments(self):
+        """Line and block comments are removed."""
+        sql = "SELECT a -- note\nFROM t /* block */ WHERE x = 1"
+        assert canonicalize_sql(sql) == "SELECT a FROM t WHERE x = 1"
+
+    def test_preserves_literals(self):
+        """Whitespace and comment markers inside literals are kept."""
+        sql = "SELECT 'a  -- b' FROM `my  table`"
+        assert canonicalize_sql(sql) == sql
+
+    def test_strips_trailing_semicolon(self):
+        """Trailing semicolons do not change the canonical text."""
+        assert canonicalize_sql("SELECT 1;\n") == "SELECT 1"
+
+    def test_formatting_variants_match(self):
+        """Differently formatted templates share a canonical form."""
+        a = "SELECT x\n  FROM t\n  WHERE y BETWEEN @year_start AND @year_end"
+        b = "  SELECT x FROM t WHERE y BETWEEN @year_start AND @year_end  "
+        assert canonicalize_sql(a) == canonicalize_sql(b)
+
+
+class TestCanonicalizeParams:
+    """Tests for parameter canonicalization."""
+
+    SQL = "SELECT 1 FROM t WHERE a IN UNNEST(@jurisdictions) AND b = @year_start AND c = @applicant_name"
+
+    def test_jurisdiction_order_ignored(self):
+        """Multiselect values are sorted and de-duplicated."""
+        a = canonicalize_params({'jurisdictions': ['US', 'EP', 'US']}, {}, self.SQL)
+        b = canonicalize_params({'jurisdictions': ['EP', 'US']}, {}, self.SQL)
+        assert a == b == {'jurisdictions': ['EP', 'US']}
+
+    def test_unreferenced_params_dropped(self):
+        """Parameters without a placeholder are removed."""
+        result = canonicalize_params({'year_start': 2014, 'tech_field': 3}, {}, self.SQL)
+        assert result == {'year_start': 2014}
+
+    def test_none_text_becomes_empty_string(self):
+        """None and '' are equivalent for text parameters."""
+        config = {'applicant_name': {'type': 'text'}}
+        a = canonicalize_params({'applicant_name': None}, config, self.SQL)
+        b = canonicalize_params({'applicant_name': ''}, config, self.SQL)
+        assert a == b == {'applicant_name': ''}
+
+    def test_case_insensitive_flag(self):
+        """Flagged text parameters are lower-cased."""
+        config = {'applicant_name': {'type': 'text', 'case_insensitive': True}}
+        result = canonicalize_params({'applicant_name': 'Siemens'}, config, self.SQL)
+        assert result == {'applicant_name': 'siemens'}
+
+    def test_case_kept_without_flag(self):
+        """Unflagged text parameters keep their case."""
+        config = {'applicant_name': {'type': 'text'}}
+        result = canonicalize_params({'applicant_name': 'Siemens'}, config, self.SQL)
+        assert result == {'applicant_name': 'Siemens'}
+
+    def test_equivalent_requests_share_cache_key(self):
+        """Equivalent Q11 requests produce the same fingerprint."""
+        query = QUERIES['Q11']
+        sql = canonicalize_sql(query['sql_template'])
+        a = canonicalize_params({'jurisdictions': ['US', 'EP'], 'applicant_name': 'SIEMENS',
+                                 'year_start': 2014, 'year_end': 2023, 'unused': 1},
+                                query['parameters'], sql)
+        b = canonicalize_params({'year_end': 2023, 'year_start': 2014,
+                                 'applicant_name': 'siemens', 'jurisdictions': ['EP', 'US']},
+                                query['parameters'], sql)
+        assert make_cache_key(sql, a) == make_cache_key(sql, b)
+
+    def test_ipc_class_spaces_ignored(self):
+        """Q14's ipc_class ignores spaces like its SQL does."""
+        query = QUERIES['Q14']
+        a = canonicalize_params({'ipc_class': 'A61B 6'}, query['parameters'], query['sql_template'])
+        b = canonicalize_params({'ipc_class': 'A61B6'}, query['parameters'], query['sql_template'])
+        assert a == b
+
+
+class TestBuildQueryParams:
+    """Tests for building run parameters from UI values."""
+
+    def test_only_declared_params_included(self):
+        """Parameters outside the schema are not passed on."""
+        from modules.logic import build_query_params
+        params = build_query_params(QUERIES['Q03']['parameters'],
+                                    {'year_start': 2010, 'year_end': 2020,
+                                     'jurisdictions': ['EP'], 'applicant_name': 'x'})
+        assert params == {'year_start': 2010, 'year_end': 2020, 'jurisdictions': ['EP']}
+
+    def test_empty_jurisdictions_become_none(self):
+        """An empty jurisdiction selection is passed as None."""
+        from modules.logic import build_query_params
+        params = build_query_params(QUERIES['Q03']['parameters'], {'jurisdictions': []})
+        assert params['jurisdictions'] is None
@@ -0,0 +1,76 @@
+"""Tests for result frame dtype compaction."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.utils import compact_frame
+from modules.cache import frame_nbytes
+from queries_bq import QUERIES
+
+
+class TestCompactFrame:
+    """Tests for compact_frame."""
+
+    def test_low_cardinality_strings_become_categories(self):
+        """Repeated codes like appln_auth are stored as categories."""
+        df = pd.DataFrame({"appln_auth": ["EP", "US", "DE", "EP"] * 250,
+                           "name": [f"applicant {i}" for i in range(1000)]})
+        compact = compact_frame(df)
+
+        assert isinstance(compact["appln_auth"].dtype, pd.CategoricalDtype)
+        assert not isinstance(compact["name"].dtype, pd.CategoricalDtype)
+        assert frame_nbytes(compact) < frame_nbytes(df)
+        pd.testing.assert_frame_equal(compact.astype(object), df.astype(object))
+
+    def test_integers_are_downcast(self):
+        """Integers shrink to 32 bits at most; nullable stays nullable."""
+        df = pd.DataFrame({
+            "year": [2014, 2023],
+            "count": pd.array([70000, None], dtype="Int64"),
+            "big": [0, 2 ** 40],
+        })
+        compact = compact_frame(df)
+
+        assert compact["year"].dtype == "int32"
+        assert compact["count"].dtype == "Int32"
+        assert compact["count"].isna().iloc[1]
+        assert compact["big"].dtype == "int64"
+
+    def test_small_integers_do_not_overflow(self):
+        """Small counts are not narrowed below 32 bits, so arithmetic does not wrap."""
+        df = pd.DataFrame({"count": [100, 100]})
+        compact = compact_frame(df)
+
+        assert compact["count"].dtype == "int32"
+        assert (compact["count"] * 2).tolist() == [200, 200]
+        assert compact_frame(df, {"count": "Int16"})["count"].dtype == "Int16"
+
+    def test_hints_override_detection(self):
+        """Column hints win over automatic detection."""
+        df = pd.DataFrame({"country": ["DE", "FR"], "year": [2014, 2015]})
+        compact = compact_frame(df, {"country": "category", "year": "Int32"})
+
+        assert isinstance(compact["country"].dtype, pd.CategoricalDtype)
+        assert compact["year"].dtype == "Int32"
+
+    def test_other_objects_untouched(self):
+        """List columns and floats keep their dtype; attrs are preserved."""
+        df = pd.DataFrame({"codes": [["A61B"], ["G06F"]], "share": [0.5, 0.25]})
+        df.attrs["cache_tier"] = "memory"
+        compact = compact_frame(df)
+
+        assert compact["codes"].dtype == object
+        assert compact["share"].dtype == "float64"
+        assert compact.attrs["cache_tier"] == "memory"
+
+    def test_query_hints_are_valid_dtypes(self):
+        """Every column_hints entry in QUERIES names a dtype pandas understands."""
+        for qid, query in QUERIES.items():
+            for col, dtype in query.get("column_hints", {}).items():
+                pd.Series([], dtype=object).astype(dtype)
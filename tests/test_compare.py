@@ -0,0 +1,103 @@
+"""Tests for parameter set comparison."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.compare import covering_params, split_sets, combine_sets, set_label
+
+COLUMNS = {"year_range": "appln_filing_year", "jurisdictions": "authority"}
+
+
+def make_result() -> pd.DataFrame:
+    return pd.DataFrame({
+        "appln_filing_year": [2018, 2019, 2020, 2018, 2019, 2020],
+        "authority": ["DE", "DE", "DE", "EP", "EP", "EP"],
+        "applications": [1, 2, 3, 4, 5, 6],
+    })
+
+
+class TestCoveringParams:
+    """Tests for covering_params."""
+
+    def test_union_of_mapped_parameters(self):
+        sets = [
+            {"year_start": 2018, "year_end": 2019, "jurisdictions": ["DE"]},
+            {"year_start": 2019, "year_end": 2020, "jurisdictions": ["EP", "DE"]},
+        ]
+        assert covering_params(sets, COLUMNS) == {
+            "year_start": 2018, "year_end": 2020, "jurisdictions": ["DE", "EP"]
+        }
+
+    def test_unmapped_parameters_must_match(self):
+        """Sets differing in a parameter that no column maps cannot share a job."""
+        sets = [{"ipc_class": "A61B", "jurisdictions": ["DE"]},
+                {"ipc_class": "H01M", "jurisdictions": ["EP"]}]
+        with pytest.raises(ValueError, match="ipc_class"):
+            covering_params(sets, {"jurisdictions": "office_code"})
+
+    def test_no_sets(self):
+        with pytest.raises(ValueError):
+            covering_params([], COLUMNS)
+
+
+class TestSplitSets:
+    """Tests for split_sets, combine_sets and set_label."""
+
+    def test_overlapping_sets_share_rows(self):
+        sets = [{"year_start": 2018, "year_end": 2019, "jurisdictions": ["DE"]},
+                {"year_start": 2019, "year_end": 2020, "jurisdictions": ["DE", "EP"]}]
+        first, second = split_sets(make_result(), sets, COLUMNS)
+
+        assert first["applications"].tolist() == [1, 2]
+        assert second["applications"].tolist() == [2, 3, 5, 6]
+        assert second.attrs["parameter_set"] == 1
+
+    def test_combined_frame_is_tagged(self):
+        frames = [make_result().head(1), make_result().tail(2)]
+        combined = combine_sets(frames, ["A", "B"])
+        assert combined.columns[0] == "parameter_set"
+        assert combined["parameter_set"].tolist() == ["A", "B", "B"]
+
+    def test_label(self):
+        params = {"year_start": 2015, "year_end": 2020, "jurisdictions": ["DE", "FR"]}
+        assert set_label(params, COLUMNS) == "2015-2020 | DE, FR"
+
+
+class TestRunComparison:
+    """Tests for run_comparison."""
+
+    SETS = [{"year_start": 2018, "year_end": 2019, "jurisdictions": ["DE"]},
+            {"year_start": 2019, "year_end": 2020, "jurisdictions": ["EP"]}]
+
+    def test_one_job_for_all_sets(self, data_state, fake_client):
+        client, jobs = fake_client(make_result())
+        frames, _ = data.run_comparison(client, QUERIES["Q34"]["sql_template"], self.SETS,
+                                        query_id="Q34")
+
+        assert [job["params"] for job in jobs] == [
+            {"year_start": 2018, "year_end": 2020, "jurisdictions": ["DE", "EP"]}
+        ]
+        assert [f["applications"].tolist() for f in frames] == [[1, 2], [5, 6]]
+
+    def test_single_runs_reuse_the_comparison(self, data_state, fake_client):
+        """Each compared set is afterwards answered from the covering result."""
+        client, jobs = fake_client(make_result())
+        data.run_comparison(client, QUERIES["Q34"]["sql_template"], self.SETS, query_id="Q34")
+        df, _ = data.run_parameterized_query(client, QUERIES["Q34"]["sql_template"],
+                                             self.SETS[1], query_id="Q34")
+
+        assert len(jobs) == 1
+        assert df["applications"].tolist() == [5, 6]
+
+    def test_query_without_param_columns(self, data_state, fake_client):
+        client, _ = fake_client(make_result())
+        with pytest.raises(ValueError, match="param_columns"):
+            data.run_comparison(client, QUERIES["Q08"]["sql_template"], self.SETS, query_id="Q08")
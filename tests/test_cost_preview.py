@@ -0,0 +1,94 @@
+"""Tests for dry-run cost estimates."""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.utils import format_bytes
+
+
+class TestFormatBytes:
+    """Tests for byte formatting."""
+
+    def test_bytes(self):
+        assert format_bytes(512) == "512 B"
+
+    def test_megabytes(self):
+        assert format_bytes(5 * 1024 ** 2) == "5.0 MB"
+
+    def test_terabytes(self):
+        assert format_bytes(3 * 1024 ** 4) == "3.0 TB"
+
+
+class TestDryRunQuery:
+    """Tests for dry_run_query."""
+
+    def test_dry_run_reports_bytes_tables_and_cost(self):
+        """The dry run result is turned into bytes, tables and cost."""
+        from modules import data
+
+        table = MagicMock()
+        table.table_id = "tls201_appln"
+        job = MagicMock()
+        job.total_bytes_processed = 2 ** 40
+        job.cache_hit = False
+        job.referenced_tables = [table, table]
+        client = MagicMock()
+        client.query.return_value = job
+
+        estimate = data.dry_run_query(client, "SELECT 1 FROM tls201_appln WHERE y >= @year_start",
+                                      {'year_start': 2001, 'unused': 1})
+
+        assert estimate['bytes_processed'] == 2 ** 40
+        assert estimate['tables'] == ["tls201_appln"]
+        assert estimate['estimated_cost_usd'] == pytest.approx(data.BIGQUERY_PRICE_PER_TIB_USD)
+        job_config = client.query.call_args.kwargs['job_config']
+        assert job_config.dry_run is True
+        assert [p.name for p in job_config.query_parameters] == ['year_start']
+
+
+# Dry runs are memoized; each test gets an empty memo and its own fake client
+@pytest.mark.usefixtures("data_state")
+class TestBudgetGuardrails:
+    """Tests for maximum_bytes_billed guardrails."""
+
+    SQL = "SELECT 1 FROM t WHERE y BETWEEN @year_start AND @year_end"
+
+    def test_query_budget_from_queries_entry(self):
+        """QUERIES entries can override the global budget."""
+        from modules import data
+        from queries_bq import QUERIES
+        assert data.get_query_budget('Q01') == QUERIES['Q01']['max_bytes_billed']
+        assert data.get_query_budget('Q03') == data.MAX_BYTES_BILLED_DEFAULT
+        assert data.get_query_budget(None) == data.MAX_BYTES_BILLED_DEFAULT
+
+    def test_suggests_widest_fitting_year_range(self, fake_client):
+        """The suggestion is the widest range ending at year_end within budget."""
+        from modules import data
+        client, _ = fake_client(bytes_processed=lambda p: (p['year_end'] - p['year_start'] + 1) * 100)
+        suggestion = data.suggest_narrower_params(
+            client, self.SQL, {'year_start': 1900, 'year_end': 2023}, 1000)
+        assert suggestion['year_start'] == 2014
+        assert suggestion['year_end'] == 2023
+        assert suggestion['bytes_processed'] == 1000
+
+    def test_no_suggestion_without_year_range(self, fake_client):
+        """Queries without a year range get no suggestion."""
+        from modules import data
+        client, _ = fake_client(bytes_processed=lambda p: 10 ** 12)
+        assert data.suggest_narrower_params(client, "SELECT 2", {}, 1000) is None
+
+    def test_over_budget_query_rejected_before_running(self, fake_client):
+        """A job over budget raises QueryBudgetError and is never submitted."""
+        from modules import data
+        client, _ = fake_client(bytes_processed=lambda p: (p['year_end'] - p['year_start'] + 1) * 10 ** 11)
+        with pytest.raises(data.QueryBudgetError) as exc:
+            data._check_budget(client, self.SQL, {'year_start': 1782, 'year_end': 2024},
+                               10 ** 12)
+        assert exc.value.suggestion['year_start'] == 2015
+        assert "2015-2024" in str(exc.value)
+        assert all(c.kwargs['job_config'].dry_run for c in client.query.call_args_list)
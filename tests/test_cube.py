@@ -0,0 +1,60 @@
+"""Tests for the Technology Trend (DQ01) cube."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.cube import TrendCube
+
+
+@pytest.fixture
+def cube_frame():
+    """Long-format cube scan result, as CUBE_SQL returns it."""
+    rows = [
+        ("EP", 13, 2015, 100, 80), ("EP", 13, 2016, 120, 90), ("EP", 13, 2018, 90, 70),
+        ("US", 13, 2016, 300, 250), ("US", 6, 2016, 500, 400), ("CN", 13, 2017, 50, 40),
+        ("XX", 13, 2016, 7, 7),  # Jurisdiction outside the cube is ignored
+    ]
+    return pd.DataFrame(rows, columns=["jurisdiction", "tech_field", "year",
+                                       "application_count", "invention_count"])
+
+
+@pytest.fixture
+def cube(cube_frame):
+    return TrendCube.from_frame(cube_frame, ["CN", "EP", "US"], [6, 13], 2014, 2020)
+
+
+class TestTrendCube:
+    """Tests for TrendCube."""
+
+    def test_query_matches_dq01_shape(self, cube):
+        """Rows per jurisdiction and year, ordered, without empty cells."""
+        df = cube.query(["US", "EP"], 13, 2015, 2017)
+
+        assert df.columns.tolist() == ["jurisdiction", "year", "application_count", "invention_count"]
+        assert df.values.tolist() == [["EP", 2015, 100, 80], ["EP", 2016, 120, 90],
+                                      ["US", 2016, 300, 250]]
+
+    def test_query_equals_filtering_the_scan(self, cube, cube_frame):
+        """The cube answers exactly what filtering the raw scan would."""
+        expected = cube_frame[(cube_frame["jurisdiction"].isin(["CN", "EP"]))
+                              & (cube_frame["tech_field"] == 13)
+                              & cube_frame["year"].between(2014, 2020)]
+        df = cube.query(["CN", "EP"], 13, 2014, 2020)
+        assert sorted(df["application_count"]) == sorted(expected["application_count"])
+
+    def test_application_totals_use_year_cumsum(self, cube):
+        assert cube.application_totals(["EP", "US"], 13, 2016, 2018) == {"EP": 210, "US": 300}
+
+    def test_years_clipped_to_cube(self, cube):
+        """Ranges beyond the cube's years are clipped rather than failing."""
+        assert cube.application_totals(["EP"], 13, 1990, 2030) == {"EP": 310}
+
+    def test_unknown_field_or_jurisdiction(self, cube):
+        assert cube.query(["EP"], 99, 2014, 2020).empty
+        assert cube.query(["JP"], 13, 2014, 2020).empty
@@ -0,0 +1,78 @@
+"""Tests for running a dashboard's queries as one concurrent batch."""
+
+import pytest
+import sys
+import os
+import time
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.execution import FairExecutor, AdmissionController, AdmissionError
+from modules.logic import build_query_params
+
+JOB_SECONDS = 0.3
+
+
+def slow_result(params) -> pd.DataFrame:
+    """Result of a fake job that takes JOB_SECONDS."""
+    time.sleep(JOB_SECONDS)
+    return pd.DataFrame({"n": [1]})
+
+
+@pytest.fixture
+def batch_state(data_state):
+    """A fresh executor limiting session s1 to 1 running query."""
+    data_state.executor = FairExecutor(max_workers=8, max_per_owner=1)
+    data_state.admission = AdmissionController(data_state.executor, max_per_session=4, max_wait=600)
+    data_state.session_id = "s1"
+    return data_state
+
+
+def dashboard_requests(query_ids):
+    requests = []
+    for query_id in query_ids:
+        params_config = QUERIES[query_id]["parameters"]
+        values = data.default_parameter_values(params_config)
+        requests.append((query_id, QUERIES[query_id]["sql_template"],
+                         build_query_params(params_config, values)))
+    return requests
+
+
+class TestSubmitBatch:
+    """Tests for submit_batch."""
+
+    def test_queries_run_concurrently(self, batch_state, fake_client):
+        """The batch takes about as long as one query, not the sum."""
+        client, _ = fake_client(slow_result)
+        start = time.time()
+        runs = data.submit_batch(client, dashboard_requests(["Q06", "Q11", "Q33", "Q34"]))
+        for run in runs:
+            run.result(timeout=10)
+
+        assert time.time() - start < 3 * JOB_SECONDS
+        assert [run.label for run in runs] == ["Q06", "Q11", "Q33", "Q34"]
+
+    def test_cached_queries_need_no_admission(self, batch_state, fake_client):
+        """Panels answered from the cache resolve at once and do not count against the quota."""
+        client, _ = fake_client(slow_result)
+        for run in data.submit_batch(client, dashboard_requests(["Q06", "Q11"])):
+            run.result(timeout=10)
+
+        runs = data.submit_batch(client, dashboard_requests(["Q06", "Q11", "Q33", "Q34"]))
+        assert runs[0].done() and runs[1].done() and runs[0].task is None
+        for run in runs:
+            run.result(timeout=10)
+
+    def test_rejected_batch_starts_nothing(self, batch_state, fake_client):
+        client, jobs = fake_client(slow_result)
+        batch_state.admission = AdmissionController(FairExecutor(max_workers=1), max_per_session=1,
+                                                    max_wait=600)
+
+        with pytest.raises(AdmissionError):
+            data.submit_batch(client, dashboard_requests(["Q06", "Q11"]))
+        assert jobs == []
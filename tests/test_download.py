@@ -0,0 +1,167 @@
+"""Tests for result downloads: REST vs Storage Read API, and pagination."""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pyarrow as pa
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data
+
+
+def make_job(total_rows, batches=(), table_bytes=0):
+    """Finished job whose result has ``total_rows`` rows."""
+    rows = MagicMock()
+    rows.total_rows = total_rows
+    rows.to_dataframe.return_value = pd.DataFrame({"n": range(min(total_rows, 5))})
+    rows.to_arrow_iterable.return_value = iter(batches)
+    job = MagicMock()
+    job.result.return_value = rows
+    client = MagicMock()
+    client.get_table.return_value.num_bytes = table_bytes
+    client.list_rows.return_value = rows
+    return client, job, rows
+
+
+def paged_frame(total_rows):
+    """First page of a paginated result, as _download returns it."""
+    df = pd.DataFrame({"n": [1]})
+    df.attrs.update(total_rows=total_rows, page_rows=1, destination="p.d.anon")
+    return df
+
+
+@pytest.fixture
+def storage_client(monkeypatch):
+    """Pretend the Storage Read API is available."""
+    bqstorage = MagicMock()
+    monkeypatch.setattr(data, "get_bqstorage_client", lambda client: bqstorage)
+    return bqstorage
+
+
+class TestDownload:
+    """Tests for _download."""
+
+    def test_small_result_uses_rest(self, storage_client):
+        """Results under the thresholds are fetched over REST."""
+        client, job, rows = make_job(total_rows=5)
+        progress = []
+
+        df = data._download(client, job, on_progress=lambda *a: progress.append(a))
+
+        assert len(df) == 5
+        rows.to_dataframe.assert_called_once_with(create_bqstorage_client=False)
+        rows.to_arrow_iterable.assert_not_called()
+        client.get_table.assert_not_called()
+        assert progress == [(5, 5)]
+
+    def test_large_result_streams_arrow(self, storage_client):
+        """Results above the row threshold stream record batches with progress."""
+        batch = pa.RecordBatch.from_pydict({"n": list(range(3)), "auth": ["EP", "US", "EP"]})
+        client, job, rows = make_job(total_rows=data.STORAGE_API_MIN_ROWS, batches=[batch, batch])
+        progress = []
+
+        df = data._rows_to_dataframe(client, rows, "p.d.anon",
+                                     on_progress=lambda *a: progress.append(a))
+
+        rows.to_arrow_iterable.assert_called_once_with(bqstorage_client=storage_client)
+        rows.to_dataframe.assert_not_called()
+        assert progress == [(3, data.STORAGE_API_MIN_ROWS), (6, data.STORAGE_API_MIN_ROWS)]
+        assert len(df) == 6
+        assert str(df["n"].dtype) == "Int64"  # Same dtype as to_dataframe()
+
+    def test_full_export_uses_storage(self, storage_client):
+        """Exporting a paginated result reads the whole destination table."""
+        batch = pa.RecordBatch.from_pydict({"n": [1, 2]})
+        client, _, rows = make_job(total_rows=data.STORAGE_API_MIN_ROWS, batches=[batch])
+
+        full = data.download_full_result(client, paged_frame(data.STORAGE_API_MIN_ROWS))
+
+        client.list_rows.assert_called_once_with("p.d.anon")
+        rows.to_arrow_iterable.assert_called_once_with(bqstorage_client=storage_client)
+        assert len(full) == 2
+
+    def test_wide_result_uses_storage_by_bytes(self, storage_client):
+        """Fewer rows than the threshold but many bytes still use the Storage API."""
+        batch = pa.RecordBatch.from_pydict({"n": [1]})
+        client, job, rows = make_job(total_rows=5000, batches=[batch],
+                                     table_bytes=data.STORAGE_API_MIN_BYTES)
+
+        data._download(client, job)
+
+        client.get_table.assert_called_once_with(job.destination)
+        rows.to_arrow_iterable.assert_called_once()
+
+    def test_falls_back_to_rest_without_storage_client(self, monkeypatch):
+        """Without the optional Storage client large results use REST."""
+        monkeypatch.setattr(data, "get_bqstorage_client", lambda client: None)
+        client, job, rows = make_job(total_rows=data.STORAGE_API_MIN_ROWS)
+
+        data.download_full_result(client, paged_frame(data.STORAGE_API_MIN_ROWS))
+
+        rows.to_dataframe.assert_called_once_with(create_bqstorage_client=False)
+        rows.to_arrow_iterable.assert_not_called()
+
+
+class TestPagination:
+    """Tests for keeping large results in the destination table."""
+
+    def test_large_result_downloads_first_page(self, storage_client):
+        """Above PAGINATE_MIN_ROWS only the first page is downloaded."""
+        client, job, rows = make_job(total_rows=data.PAGINATE_MIN_ROWS + 1)
+
+        df = data._download(client, job)
+
+        client.list_rows.assert_called_once_with(
+            job.destination, start_index=0, max_results=data.RESULT_PAGE_ROWS)
+        assert df.attrs["total_rows"] == data.PAGINATE_MIN_ROWS + 1
+        assert df.attrs["page_rows"] == data.RESULT_PAGE_ROWS
+        assert df.attrs["destination"]
+        rows.to_arrow_iterable.assert_not_called()
+
+    def test_display_rows_hint(self, storage_client):
+        """A query's display_rows pages results smaller than the global threshold."""
+        client, job, rows = make_job(total_rows=600)
+
+        df = data._download(client, job, display_rows=500)
+
+        client.list_rows.assert_called_once_with(job.destination, start_index=0, max_results=500)
+        assert df.attrs["page_rows"] == 500
+
+    def test_results_within_display_rows_are_complete(self, storage_client):
+        """Results that fit in display_rows are downloaded whole, without page attrs."""
+        client, job, rows = make_job(total_rows=5)
+
+        df = data._download(client, job, display_rows=500)
+
+        client.list_rows.assert_not_called()
+        assert "destination" not in df.attrs
+
+    def test_fetch_result_page(self):
+        """Later pages are read with start_index/max_results."""
+        data.fetch_result_page.clear()
+        client, _, rows = make_job(total_rows=5)
+
+        page = data.fetch_result_page(client, "p.d.anon", 1000, 1000)
+
+        client.list_rows.assert_called_once_with("p.d.anon", start_index=1000, max_results=1000)
+        assert len(page) == 5
+
+    def test_dynamic_query_hints(self, storage_client, monkeypatch):
+        """Pages of DYNAMIC_QUERIES results get the query's column_hints too."""
+        monkeypatch.setitem(data.DYNAMIC_QUERIES["DQ01"], "column_hints", {"n": "Int16"})
+        data.fetch_result_page.clear()
+        client, _, _ = make_job(total_rows=5)
+
+        page = data.fetch_result_page(client, "p.d.anon", 0, 5, query_id="DQ01")
+
+        assert page["n"].dtype == "Int16"
+
+    def test_complete_frame_is_its_own_export(self):
+        """download_full_result returns unpaginated frames unchanged."""
+        df = pd.DataFrame({"n": [1]})
+        assert data.download_full_result(MagicMock(), df) is df
@@ -0,0 +1,106 @@
+"""Tests for learned runtime estimates."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.estimates import RuntimeEstimator, features
+from modules.prewarm import RequestLog
+
+
+def params(year_span: int, jurisdictions: int = 3, tech_field: int = None) -> dict:
+    return {"year_start": 2024 - year_span, "year_end": 2023,
+            "jurisdictions": ["EP", "US", "DE", "JP", "CN"][:jurisdictions],
+            "tech_field": tech_field}
+
+
+@pytest.fixture
+def estimator(tmp_path):
+    return RuntimeEstimator(RequestLog(str(tmp_path / "executions.jsonl")), min_samples=3)
+
+
+class TestFeatures:
+    """Tests for features."""
+
+    def test_features(self):
+        assert features(params(10, 2, tech_field=12)) == {
+            "year_span": 10, "jurisdictions": 2, "tech_field": 1
+        }
+
+    def test_missing_parameters(self):
+        assert features({}) == {"year_span": 0, "jurisdictions": 0, "tech_field": 0}
+
+
+class TestRuntimeEstimator:
+    """Tests for RuntimeEstimator."""
+
+    def test_no_history(self, estimator):
+        assert estimator.estimate("Q06", params(10)) is None
+
+    def test_learns_year_span_scaling(self, estimator):
+        """Runtime and bytes grow with the year span; predictions follow."""
+        for span in (2, 4, 8, 16) * 2:
+            estimator.record("Q06", params(span), seconds=0.5 * span,
+                             bytes_processed=span * 10 ** 9, cache_hit=False)
+
+        estimate = estimator.estimate("Q06", params(8))
+        assert estimate["seconds"] == pytest.approx(4.0, rel=0.01)
+        assert estimate["bytes_processed"] == pytest.approx(8 * 10 ** 9, rel=0.01)
+        assert estimate["seconds_low"] <= estimate["seconds"] <= estimate["seconds_high"]
+        assert estimate["samples"] == 8
+        assert estimator.estimate("Q06", params(12))["seconds"] > estimate["seconds"]
+
+    def test_cache_hits_are_modelled_separately(self, estimator):
+        for _ in range(3):
+            estimator.record("Q06", params(10), 8.0, 10 ** 9, cache_hit=False)
+            estimator.record("Q06", params(10), 0.5, 0, cache_hit=True)
+
+        assert estimator.estimate("Q06", params(10))["seconds"] == pytest.approx(8.0)
+        cached = estimator.estimate("Q06", params(10), cached=True)
+        assert cached["seconds"] == pytest.approx(0.5)
+        assert cached["bytes_processed"] is None
+
+    def test_confidence_grows_with_consistent_history(self, estimator):
+        estimator.record("Q06", params(10), 4.0, 10 ** 9, cache_hit=False)
+        estimator.record("Q06", params(10), 9.0, 10 ** 9, cache_hit=False)
+        estimator.record("Q06", params(10), 2.0, 10 ** 9, cache_hit=False)
+        assert estimator.estimate("Q06", params(10))["confidence"] == "low"
+
+        for _ in range(30):
+            estimator.record("Q06", params(10), 5.0, 10 ** 9, cache_hit=False)
+        assert estimator.estimate("Q06", params(10))["confidence"] in ("medium", "high")
+
+    def test_history_survives_restart(self, estimator):
+        for _ in range(3):
+            estimator.record("Q06", params(10), 6.0, 10 ** 9, cache_hit=False)
+        restarted = RuntimeEstimator(RequestLog(estimator.log.path), min_samples=3)
+        assert restarted.estimate("Q06", params(10))["seconds"] == pytest.approx(6.0)
+
+
+class TestEstimateRuntime:
+    """Tests for estimate_runtime."""
+
+    @pytest.fixture(autouse=True)
+    def use_estimator(self, monkeypatch, estimator):
+        monkeypatch.setattr(data, "get_runtime_estimator", lambda: estimator)
+
+    def test_static_fallback(self):
+        estimate = data.estimate_runtime("Q06")
+        assert estimate["cached"]["source"] == "static"
+        assert estimate["cached"]["seconds"] == QUERIES["Q06"]["estimated_seconds_cached"]
+        assert estimate["first_run"]["seconds"] == QUERIES["Q06"]["estimated_seconds_first_run"]
+
+    def test_learned_first_run(self, estimator):
+        for _ in range(3):
+            estimator.record("Q06", params(10), 42.0, 10 ** 9, cache_hit=False)
+        estimate = data.estimate_runtime("Q06", params(10))
+
+        assert estimate["first_run"]["source"] == "history"
+        assert estimate["first_run"]["seconds"] == pytest.approx(42.0)
+        assert estimate["bytes_processed"] == pytest.approx(10 ** 9, rel=0.01)
+        assert estimate["cached"]["source"] == "static"
@@ -0,0 +1,92 @@
+"""Tests for the shared bounded executor."""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.execution import FairExecutor
+
+
+def blocked_executor(max_workers=1):
+    """Executor whose workers are all busy until the returned event is set."""
+    executor = FairExecutor(max_workers=max_workers)
+    release = threading.Event()
+    started = threading.Barrier(max_workers + 1)
+
+    def block():
+        started.wait(5)
+        release.wait(5)
+
+    for _ in range(max_workers):
+        executor.submit(block, owner="blocker")
+    started.wait(5)
+    return executor, release
+
+
+class TestFairExecutor:
+    """Tests for FairExecutor."""
+
+    def test_returns_results(self):
+        """Submitted callables run and resolve their futures."""
+        executor = FairExecutor(max_workers=2)
+        assert executor.submit(lambda x: x * 2, 21).result(timeout=5) == 42
+
+    def test_worker_count_is_bounded(self):
+        """No more than max_workers tasks run at once."""
+        executor = FairExecutor(max_workers=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def task():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        futures = [executor.submit(task, owner=str(i)) for i in range(6)]
+        for f in futures:
+            f.result(timeout=5)
+        assert peak[0] == 2
+
+    def test_round_robin_between_owners(self):
+        """A session with many queued tasks does not starve another session."""
+        executor, release = blocked_executor()
+        order = []
+        for i in range(3):
+            executor.submit(order.append, f"a{i}", owner="a")
+        last = executor.submit(order.append, "b0", owner="b")
+        release.set()
+        last.result(timeout=5)
+        assert order.index("b0") == 1
+
+    def test_queue_stats_and_position(self):
+        """Queue depth and positions are reported while tasks wait."""
+        executor, release = blocked_executor()
+        first = executor.submit(lambda: None, owner="a")
+        second = executor.submit(lambda: None, owner="b")
+        stats = executor.stats()
+        assert stats["queued"] == 2
+        assert stats["queued_by_owner"] == {"a": 1, "b": 1}
+        assert executor.position(first) == 0
+        assert executor.position(second) == 1
+        release.set()
+        second.result(timeout=5)
+        assert executor.position(second) is None
+        assert executor.stats()["max_wait"] > 0
+
+    def test_cancelled_tasks_are_skipped(self):
+        """Tasks cancelled while queued never run."""
+        executor, release = blocked_executor()
+        ran = []
+        future = executor.submit(ran.append, 1, owner="a")
+        assert future.cancel()
+        release.set()
+        executor.submit(lambda: None).result(timeout=5)
+        assert ran == []
@@ -0,0 +1,110 @@
+"""Tests for the per-year incremental result cache."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import DYNAMIC_QUERIES
+from modules import data
+
+# Each test gets an empty cache and its own single-flight registry
+pytestmark = pytest.mark.usefixtures("data_state")
+
+SQL = "SELECT filing_year FROM t WHERE y BETWEEN @year_start AND @year_end AND a IN UNNEST(@jurisdictions)"
+
+
+def by_year(year_column="filing_year"):
+    """Fake job result with one row per filing year in the queried range."""
+    def result(params):
+        years = list(range(params["year_start"], params["year_end"] + 1))
+        return pd.DataFrame({"jurisdiction": "EP", year_column: years,
+                             "applications": [y - 2000 for y in years]})
+    return result
+
+
+def year_ranges(jobs) -> list:
+    return [(job["params"]["year_start"], job["params"]["year_end"]) for job in jobs]
+
+
+def run(client, year_start, year_end):
+    params = {'year_start': year_start, 'year_end': year_end, 'jurisdictions': ['EP']}
+    df, _ = data._execute(client, SQL, params, query_id="Q03")
+    return df
+
+
+class TestIncrementalYears:
+    """Tests for _execute_incremental."""
+
+    def test_widening_range_queries_only_new_years(self, fake_client):
+        """Moving year_start back only scans the added years."""
+        client, jobs = fake_client(by_year())
+        run(client, 2014, 2023)
+        df = run(client, 2012, 2023)
+
+        assert year_ranges(jobs) == [(2014, 2023), (2012, 2013)]
+        assert df["filing_year"].tolist() == list(range(2012, 2024))
+        assert df.attrs["incremental"] == {"cached_years": 10, "queried_years": 2}
+
+    def test_narrowing_range_needs_no_query(self, fake_client):
+        """A sub-range of cached years is answered locally."""
+        client, jobs = fake_client(by_year())
+        run(client, 2014, 2023)
+        df = run(client, 2016, 2018)
+
+        assert year_ranges(jobs) == [(2014, 2023)]
+        assert df["applications"].tolist() == [16, 17, 18]
+
+    def test_gaps_are_queried_as_contiguous_ranges(self, fake_client):
+        """Missing years on both sides are fetched in one query per gap."""
+        client, jobs = fake_client(by_year())
+        run(client, 2015, 2016)
+        run(client, 2013, 2018)
+
+        assert year_ranges(jobs) == [(2015, 2016), (2013, 2014), (2017, 2018)]
+
+    def test_other_params_do_not_share_partials(self, fake_client):
+        """Per-year partials are keyed on all other parameters too."""
+        client, jobs = fake_client(by_year())
+        run(client, 2014, 2015)
+        data._execute(client, SQL, {'year_start': 2014, 'year_end': 2015, 'jurisdictions': ['US']},
+                      query_id="Q03")
+
+        assert year_ranges(jobs) == [(2014, 2015), (2014, 2015)]
+
+    def test_dynamic_query(self, fake_client):
+        """DQ01 declares its incremental_years in DYNAMIC_QUERIES."""
+        client, jobs = fake_client(by_year(year_column="year"))
+        sql = DYNAMIC_QUERIES["DQ01"]["sql_template"]
+        params = {'jurisdictions': ['EP'], 'tech_field': 13}
+        data._execute(client, sql, {**params, 'year_start': 2014, 'year_end': 2023}, query_id="DQ01")
+        df, _ = data._execute(client, sql, {**params, 'year_start': 2012, 'year_end': 2023},
+                              query_id="DQ01")
+
+        assert year_ranges(jobs) == [(2014, 2023), (2012, 2013)]
+        assert df["year"].tolist() == list(range(2012, 2024))
+
+    def test_queries_without_metadata_run_whole(self, fake_client):
+        """Queries without incremental_years run as a single job."""
+        client, jobs = fake_client(by_year())
+        data._execute(client, SQL, {'year_start': 2014, 'year_end': 2023, 'jurisdictions': ['EP']},
+                      query_id="Q06")
+        data._execute(client, SQL, {'year_start': 2012, 'year_end': 2023, 'jurisdictions': ['EP']},
+                      query_id="Q06")
+
+        assert year_ranges(jobs) == [(2014, 2023), (2012, 2023)]
+
+
+class TestContiguousRanges:
+    """Tests for _contiguous_ranges."""
+
+    def test_groups_consecutive_years(self):
+        assert data._contiguous_ranges([2010, 2011, 2013, 2015, 2016]) == [
+            (2010, 2011), (2013, 2013), (2015, 2016)]
+
+    def test_empty(self):
+        assert data._contiguous_ranges([]) == []
@@ -0,0 +1,106 @@
+"""Tests for query plan capture."""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pandas as pd
+from google.cloud.bigquery.job import QueryPlanEntry, TimelineEntry
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.plans import summarize_plan, stage_kind
+
+
+def make_stage(stage_id: int, name: str, slot_ms: int, records_read: int = 0,
+               shuffle_bytes: int = 0, spilled: int = 0, compute_avg: int = 100,
+               compute_max: int = 150) -> QueryPlanEntry:
+    return QueryPlanEntry.from_api_repr({
+        "id": str(stage_id), "name": name, "status": "COMPLETE", "slotMs": str(slot_ms),
+        "recordsRead": str(records_read), "recordsWritten": "10",
+        "shuffleOutputBytes": str(shuffle_bytes), "shuffleOutputBytesSpilled": str(spilled),
+        "computeMsAvg": str(compute_avg), "computeMsMax": str(compute_max),
+        "steps": [{"kind": "READ", "substeps": ["$1"]}, {"kind": "WRITE", "substeps": ["$2"]}],
+    })
+
+
+def plan_attrs(stages: list) -> dict:
+    """Attributes of a finished job that ran ``stages``."""
+    return {
+        "job_id": "job_1",
+        "query_plan": stages,
+        "timeline": [TimelineEntry.from_api_repr({"elapsedMs": "500", "activeUnits": "8",
+                                                  "pendingUnits": "20", "completedUnits": "2"}),
+                     TimelineEntry.from_api_repr({"elapsedMs": "1500", "activeUnits": "4",
+                                                  "pendingUnits": "0", "completedUnits": "30"})],
+        "slot_millis": sum(stage.slot_ms for stage in stages),
+    }
+
+
+def make_job(stages: list) -> MagicMock:
+    job = MagicMock(**plan_attrs(stages))
+    job.cache_hit = False
+    return job
+
+
+class TestSummarizePlan:
+    """Tests for summarize_plan."""
+
+    def test_stages_and_timeline(self):
+        plan = summarize_plan(make_job([make_stage(0, "S00: Input", 6000, records_read=10 ** 8),
+                                        make_stage(1, "S01: Aggregate+", 2000)]))
+
+        assert plan["total_slot_ms"] == 8000
+        assert [s["kind"] for s in plan["stages"]] == ["input", "aggregate"]
+        assert plan["stages"][0]["steps"] == ["READ", "WRITE"]
+        assert plan["timeline"][1] == {"elapsed_ms": 1500, "active_units": 4, "pending_units": 0,
+                                       "completed_units": 30, "slot_millis": 0}
+        assert not any(f["warning"] for f in plan["findings"])
+        assert plan["findings"][0]["text"].startswith("S00: Input used 75% of the slot time")
+
+    def test_skew_is_flagged(self):
+        plan = summarize_plan(make_job([
+            make_stage(0, "S00: Input", 1000),
+            make_stage(1, "S01: Join+", 9000, compute_avg=400, compute_max=8000),
+            make_stage(2, "S02: Output", 10, compute_avg=100, compute_max=900),
+        ]), skew_ratio=5.0, skew_min_ms=1000)
+
+        assert [s["skewed"] for s in plan["stages"]] == [False, True, False]
+        assert plan["stages"][1]["skew"] == 20.0
+        warnings = [f["text"] for f in plan["findings"] if f["warning"]]
+        assert len(warnings) == 1 and warnings[0].startswith("S01: Join+ is skewed")
+
+    def test_repartition_and_spill(self):
+        plan = summarize_plan(make_job([
+            make_stage(0, "S00: Input", 1000, shuffle_bytes=5 * 1024 ** 3, spilled=1024 ** 3),
+            make_stage(1, "S01: Repartition", 500),
+        ]))
+
+        assert plan["stages"][1]["repartition"]
+        warnings = [f["text"] for f in plan["findings"] if f["warning"]]
+        assert any("spilled to disk" in text for text in warnings)
+        assert any(text.startswith("S01: Repartition repartitioned") for text in warnings)
+
+    def test_job_without_plan(self):
+        assert summarize_plan(make_job([])) is None
+
+    def test_stage_kind(self):
+        assert stage_kind("S03: Join+") == "join"
+        assert stage_kind("") == "stage"
+
+
+class TestPlanStoredWithResult:
+    """The data layer stores the plan of each job with its result."""
+
+    def test_plan_in_attrs(self, data_state, fake_client):
+        stages = [make_stage(0, "S00: Input", 100), make_stage(1, "S01: Output", 10)]
+        client, _ = fake_client(job_attrs=plan_attrs(stages))
+        params = {"year_start": 2018, "year_end": 2020, "jurisdictions": ["DE"]}
+        df, _ = data.run_parameterized_query(client, QUERIES["Q06"]["sql_template"], params,
+                                             query_id="Q06")
+
+        assert [s["name"] for s in df.attrs["query_plan"]["stages"]] == ["S00: Input", "S01: Output"]
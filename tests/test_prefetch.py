@@ -0,0 +1,81 @@
+"""Tests for speculative prefetch of detail-page results."""
+
+import pytest
+import sys
+import os
+import threading
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.logic import build_query_params
+
+
+@pytest.fixture
+def executor(data_state):
+    """Empty cache and a fresh executor for session s1."""
+    data_state.session_id = "s1"
+    return data_state.executor
+
+
+def default_params(query_id: str) -> dict:
+    params_config = QUERIES[query_id]["parameters"]
+    return build_query_params(params_config, data.default_parameter_values(params_config))
+
+
+class TestPrefetch:
+    """Tests for prefetch_parameterized_query."""
+
+    def test_run_analysis_reuses_prefetched_result(self, executor, fake_client):
+        client, jobs = fake_client(bytes_processed=10 ** 9)
+        template, params = QUERIES["Q06"]["sql_template"], default_params("Q06")
+
+        run, bytes_processed = data.prefetch_parameterized_query(client, template, params, query_id="Q06")
+        run.result(timeout=5)
+        df, _ = data.run_parameterized_query(client, template, params, query_id="Q06")
+
+        assert len(jobs) == 1 and bytes_processed == 10 ** 9
+        assert df.attrs.get("cache_tier") == "memory"
+
+    def test_available_results_start_nothing(self, executor, fake_client):
+        client, jobs = fake_client(bytes_processed=10 ** 9)
+        template, params = QUERIES["Q06"]["sql_template"], default_params("Q06")
+        data.run_parameterized_query(client, template, params, query_id="Q06")
+
+        assert data.prefetch_parameterized_query(client, template, params, query_id="Q06") == (None, 0)
+        assert len(jobs) == 1
+
+    def test_busy_session_is_not_prefetched_for(self, executor, fake_client):
+        """Speculation only uses a session's idle capacity."""
+        client, jobs = fake_client(bytes_processed=10 ** 9)
+        release = threading.Event()
+        executor.submit(release.wait, 5, owner="s1")
+
+        run, _ = data.prefetch_parameterized_query(client, QUERIES["Q06"]["sql_template"],
+                                                   default_params("Q06"), query_id="Q06")
+        release.set()
+        assert run is None and jobs == []
+
+    def test_over_budget_is_not_prefetched(self, executor, fake_client):
+        client, jobs = fake_client(bytes_processed=5 * 10 ** 9)
+        run, _ = data.prefetch_parameterized_query(client, QUERIES["Q06"]["sql_template"],
+                                                   default_params("Q06"), query_id="Q06",
+                                                   max_bytes=10 ** 9)
+        assert run is None and jobs == []
+
+
+class TestSpeculationSettings:
+    """Tests for speculation_settings."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("SPECULATIVE_PREFETCH", raising=False)
+        assert data.speculation_settings()["enabled"] is False
+
+    def test_enabled_from_environment(self, monkeypatch):
+        monkeypatch.setenv("SPECULATIVE_PREFETCH", "1")
+        monkeypatch.setenv("SPECULATIVE_SESSION_BYTES", "1024")
+        assert data.speculation_settings() == {"enabled": True, "session_bytes": 1024}
@@ -0,0 +1,146 @@
+"""Tests for the request log and cache prewarming."""
+
+import pytest
+import sys
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.config import COMMON_QUESTIONS
+from modules.prewarm import RequestLog, Prewarmer
+
+Q03_PARAMS = {"year_start": 2014, "year_end": 2023, "jurisdictions": ["DE", "EP", "US"]}
+
+
+class TestRequestLog:
+    """Tests for RequestLog."""
+
+    def test_most_frequent_first(self, tmp_path):
+        log = RequestLog(str(tmp_path / "requests.jsonl"))
+        for _ in range(2):
+            log.record("Q01", {})
+        for _ in range(3):
+            log.record("Q03", Q03_PARAMS)
+        log.record("Q03", {**Q03_PARAMS, "year_start": 2000})
+
+        assert log.top(2) == [("Q03", Q03_PARAMS), ("Q01", {})]
+
+    def test_old_requests_do_not_count(self, tmp_path):
+        log = RequestLog(str(tmp_path / "requests.jsonl"))
+        log.record("Q01", {})
+        assert log.top(5, since=9e12) == []
+
+    def test_compacts_to_newest_entries(self, tmp_path):
+        path = tmp_path / "requests.jsonl"
+        log = RequestLog(str(path), max_entries=5)
+        for i in range(10):
+            log.record(f"Q{i:02d}", {})
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 5
+        assert json.loads(lines[-1])["query_id"] == "Q09"
+
+
+def make_prewarmer(estimates: dict, max_bytes: int = 100, ready_file: str = None):
+    """Prewarmer over fixed targets whose estimates come from ``estimates``."""
+    executed = []
+    pool = ThreadPoolExecutor(max_workers=2)
+    prewarmer = Prewarmer(
+        targets=lambda: [(query_id, {}) for query_id in estimates],
+        estimate=lambda target: estimates[target[0]],
+        execute=lambda target: executed.append(target[0]),
+        submit=pool.submit,
+        max_bytes=max_bytes,
+        interval_seconds=3600,
+        ready_file=ready_file,
+    )
+    return prewarmer, executed
+
+
+class TestPrewarmer:
+    """Tests for Prewarmer."""
+
+    def test_cycle_warms_within_budget(self):
+        """Cached targets are skipped and the byte budget caps what runs."""
+        prewarmer, executed = make_prewarmer({"Q01": 60, "Q02": None, "Q03": 60, "Q04": 30})
+        counts = prewarmer.run_cycle()
+
+        assert sorted(executed) == ["Q01", "Q04"]
+        assert counts["cached"] == 1 and counts["skipped"] == 1 and counts["warmed"] == 2
+        assert counts["bytes_processed"] == 90
+
+    def test_failures_are_counted(self):
+        prewarmer, _ = make_prewarmer({"Q01": 10})
+        prewarmer.execute = MagicMock(side_effect=RuntimeError("boom"))
+        assert prewarmer.run_cycle()["failed"] == 1
+
+    def test_ready_signal(self, tmp_path):
+        """The ready event and file are set once the first cycle completed."""
+        ready_file = tmp_path / "prewarm.ready"
+        ready_file.write_text("{}")  # Left by a previous process
+        prewarmer, _ = make_prewarmer({"Q01": 10}, ready_file=str(ready_file))
+        block = threading.Event()
+        prewarmer.execute = lambda target: block.wait(5)
+
+        prewarmer.start()
+        assert not ready_file.exists()
+        block.set()
+
+        assert prewarmer.ready.wait(5)
+        prewarmer.stop()
+        assert json.loads(ready_file.read_text())["warmed"] == 1
+        assert prewarmer.status()["state"] == "ready"
+
+
+@pytest.fixture
+def request_log(data_state):
+    """Empty cache and request log."""
+    return data_state.request_log
+
+
+class TestPrewarmTargets:
+    """Tests for prewarm_targets and the warm-up of one target."""
+
+    def test_logged_requests_then_common_questions(self, request_log):
+        request_log.record("Q01", {})
+        request_log.record("AI-1", {})  # Not a catalog query
+        targets = data.prewarm_targets()
+
+        assert targets[0] == ("Q01", {})
+        assert [query_id for query_id, _ in targets[1:]] == COMMON_QUESTIONS
+
+    def test_detail_page_requests_are_logged(self, request_log, fake_client):
+        run = data.submit_query(fake_client()[0], QUERIES["Q01"]["sql"], query_id="Q01")
+        run.result(timeout=5)
+        assert request_log.top(1) == [("Q01", {})]
+
+    def test_warmed_target_is_then_cached(self, request_log, fake_client):
+        """A prewarmed default-parameter request is a cache hit for the detail page."""
+        client, _ = fake_client(bytes_processed=10 ** 9)
+        target = next(t for t in data.prewarm_targets() if t[0] == "Q06")
+
+        assert data._prewarm_estimate(client, target) == 10 ** 9
+        data._prewarm_execute(client, target)
+        assert data._prewarm_estimate(client, target) is None
+
+
+class TestStartPrewarming:
+    """Prewarming is off unless PREWARM_ENABLED turns it on."""
+
+    def test_off_by_default(self, monkeypatch):
+        monkeypatch.delenv("PREWARM_ENABLED", raising=False)
+        monkeypatch.setattr(data, "get_prewarmer", MagicMock())
+        assert data.start_prewarming(MagicMock()) is None
+        data.get_prewarmer.assert_not_called()
+
+    def test_enabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("PREWARM_ENABLED", "1")
+        monkeypatch.setattr(data, "get_prewarmer", MagicMock(return_value="prewarmer"))
+        assert data.start_prewarming(MagicMock()) == "prewarmer"
@@ -0,0 +1,152 @@
+"""Tests for background query runs: progress polling and cancellation."""
+
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.execution import QueryRun
+
+
+def make_job(state="RUNNING", stages=((True, 100), (False, 50))):
+    job = MagicMock()
+    job.state = state
+    job.done.return_value = state == "DONE"
+    job.total_bytes_processed = None
+    plan = []
+    for complete, records in stages:
+        stage = MagicMock()
+        stage.status = "COMPLETE" if complete else "RUNNING"
+        stage.records_read = records
+        plan.append(stage)
+    job.query_plan = plan
+    return job
+
+
+class TestQueryRun:
+    """Tests for the QueryRun handle."""
+
+    def test_result_available_when_done(self):
+        """The worker's return value becomes the run's result."""
+        run = QueryRun(label="Q03").start(lambda: ("df", 1.5))
+        assert run.result(timeout=5) == ("df", 1.5)
+        assert run.done()
+
+    def test_worker_errors_are_raised_by_result(self):
+        """Exceptions in the worker surface through result()."""
+        def fail():
+            raise RuntimeError("boom")
+        run = QueryRun().start(fail)
+        with pytest.raises(RuntimeError):
+            run.result(timeout=5)
+
+    def test_progress_before_job_submitted(self):
+        """A run without a job reports PENDING."""
+        run = QueryRun()
+        assert run.progress()["state"] == "PENDING"
+
+    def test_progress_summarizes_query_plan(self):
+        """Progress counts completed stages and records read."""
+        run = QueryRun()
+        run.attach_job(make_job())
+        progress = run.progress()
+        assert progress["state"] == "RUNNING"
+        assert progress["stages_done"] == 1
+        assert progress["stages_total"] == 2
+        assert progress["records_read"] == 150
+
+    def test_cancel_cancels_job(self):
+        """Cancelling a run cancels its BigQuery job."""
+        run = QueryRun()
+        job = make_job()
+        run.attach_job(job)
+        run.cancel()
+        assert run.cancelled() and run.done()
+        job.cancel.assert_called_once()
+
+    def test_cancel_without_job_cancel(self):
+        """Shared jobs are left running when cancel_job is False."""
+        run = QueryRun()
+        job = make_job()
+        run.attach_job(job)
+        run.cancel(cancel_job=False)
+        job.cancel.assert_not_called()
+
+    def test_job_attached_after_cancel_is_cancelled(self):
+        """A job submitted after the user cancelled is cancelled immediately."""
+        run = QueryRun()
+        run.cancel()
+        job = make_job()
+        run.attach_job(job)
+        job.cancel.assert_called_once()
+
+
+class TestReapAbandonedRuns:
+    """Tests for cancelling runs nobody polls any more."""
+
+    def test_idle_runs_are_cancelled(self):
+        """Runs not polled within max_idle are cancelled."""
+        from modules import data
+        release = threading.Event()
+        run = QueryRun(key="k").start(lambda: release.wait(5))
+        job = make_job()
+        run.attach_job(job)
+        run.last_polled = time.time() - 60
+        with data._RUNS_LOCK:
+            data._RUNS.append(run)
+
+        data.reap_abandoned_runs(max_idle=30)
+
+        assert run.cancelled()
+        job.cancel.assert_called_once()
+        release.set()
+
+    def test_polled_runs_survive(self):
+        """Runs polled recently are kept."""
+        from modules import data
+        release = threading.Event()
+        run = QueryRun(key="k2").start(lambda: release.wait(5))
+        with data._RUNS_LOCK:
+            data._RUNS.append(run)
+
+        data.reap_abandoned_runs(max_idle=30)
+
+        assert not run.cancelled()
+        release.set()
+
+
+class TestCancelRun:
+    """Tests for cancel_run and jobs shared with other sessions."""
+
+    def start_flight(self, flights, key, waiters):
+        """Lead a flight for ``key`` that ``waiters`` callers join; returns its release event."""
+        release = threading.Event()
+        threading.Thread(target=flights.do, args=(key, lambda: release.wait(5)), daemon=True).start()
+        while key not in flights._inflight:
+            time.sleep(0.01)
+        for _ in range(waiters):
+            threading.Thread(target=flights.do, args=(key, lambda: None), daemon=True).start()
+        deadline = time.time() + 5
+        while flights.waiters(key) < waiters and time.time() < deadline:
+            time.sleep(0.01)
+        return release
+
+    @pytest.mark.parametrize("waiters", [0, 1])
+    def test_checks_the_flights_the_run_leads(self, data_state, waiters):
+        """A sub-range job joined by another session is left running."""
+        from modules import data
+        release = self.start_flight(data_state.flights, "year-2020", waiters)
+        run = QueryRun(key="years-2014-2023")
+        job = make_job()
+        run.attach_job(job, "year-2020")
+
+        data.cancel_run(run)
+
+        assert run.cancelled()
+        assert job.cancel.call_count == (0 if waiters else 1)
+        release.set()
@@ -0,0 +1,105 @@
+"""Tests for answering narrower requests from cached results."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import DYNAMIC_QUERIES
+from modules import data
+from modules.refine import covers, refine
+
+COLUMNS = {"year_range": "appln_filing_year", "jurisdictions": "authority"}
+
+
+def params(year_start=2014, year_end=2023, jurisdictions=("DE", "EP", "US")):
+    return {"jurisdictions": sorted(jurisdictions), "year_end": year_end, "year_start": year_start}
+
+
+class TestCovers:
+    """Tests for covers."""
+
+    def test_narrower_range_and_subset(self):
+        """Fewer years and fewer jurisdictions are covered."""
+        assert covers(params(), params(2016, 2020, ["EP"]), COLUMNS)
+
+    def test_wider_range_not_covered(self):
+        assert not covers(params(), params(2012, 2023), COLUMNS)
+
+    def test_extra_jurisdiction_not_covered(self):
+        assert not covers(params(), params(jurisdictions=["EP", "CN"]), COLUMNS)
+
+    def test_unmapped_params_must_match(self):
+        """Parameters without a result column must be identical."""
+        held = {**params(), "ipc_class": "A61B"}
+        assert covers(held, dict(held), COLUMNS)
+        assert not covers(held, {**params(), "ipc_class": "G06F"}, COLUMNS)
+
+    def test_unmapped_list_must_match(self):
+        """A subset of an unmapped list parameter is not covered."""
+        assert not covers(params(), params(2016, 2020, ["EP"]), {"year_range": "appln_filing_year"})
+
+
+class TestRefine:
+    """Tests for refine."""
+
+    def test_filters_rows_and_keeps_order(self):
+        df = pd.DataFrame({"authority": ["US", "EP", "EP", "DE"],
+                           "appln_filing_year": [2015, 2016, 2021, 2016],
+                           "n": [1, 2, 3, 4]})
+        refined = refine(df, params(2016, 2020, ["EP", "DE"]), COLUMNS)
+        assert refined["n"].tolist() == [2, 4]
+
+
+def grid(columns=("authority", "appln_filing_year")):
+    """Fake job result with one row per (jurisdiction, year) of the request."""
+    def result(p):
+        rows = [(a, y) for a in p["jurisdictions"] for y in range(p["year_start"], p["year_end"] + 1)]
+        return pd.DataFrame(rows, columns=list(columns))
+    return result
+
+
+# Each test gets an empty cache and its own single-flight registry
+pytestmark = pytest.mark.usefixtures("data_state")
+
+
+class TestLocalRefinement:
+    """Tests for refinement through _execute."""
+
+    SQL = ("SELECT 1 FROM t WHERE y BETWEEN @year_start AND @year_end "
+           "AND a IN UNNEST(@jurisdictions)")
+
+    def test_subset_answered_without_query(self, fake_client):
+        """A narrower request after a broad one needs no warehouse call."""
+        client, jobs = fake_client(grid())
+        data._execute(client, self.SQL, params(), query_id="Q39")
+        df, _ = data._execute(client, self.SQL, params(2016, 2020, ["EP"]), query_id="Q39")
+
+        assert len(jobs) == 1
+        assert df["authority"].astype(str).unique().tolist() == ["EP"]
+        assert df["appln_filing_year"].tolist() == list(range(2016, 2021))
+        assert df.attrs["refined_from"] == params()
+
+    def test_dynamic_query(self, fake_client):
+        """DQ01 declares its param_columns in DYNAMIC_QUERIES."""
+        client, jobs = fake_client(grid(columns=("jurisdiction", "year")))
+        sql = DYNAMIC_QUERIES["DQ01"]["sql_template"]
+        data._execute(client, sql, {**params(), "tech_field": 13}, query_id="DQ01")
+        df, _ = data._execute(client, sql, {**params(2016, 2020, ["EP"]), "tech_field": 13},
+                              query_id="DQ01")
+
+        assert len(jobs) == 1
+        assert df["jurisdiction"].astype(str).unique().tolist() == ["EP"]
+        assert df["year"].tolist() == list(range(2016, 2021))
+
+    def test_queries_without_mapping_are_not_refined(self, fake_client):
+        """Without param_columns a narrower request still runs."""
+        client, jobs = fake_client(grid())
+        data._execute(client, self.SQL, params(), query_id="Q06")
+        data._execute(client, self.SQL, params(2016, 2020, ["EP"]), query_id="Q06")
+
+        assert len(jobs) == 2
@@ -0,0 +1,165 @@
+"""Tests for the two-tier result cache."""
+
+import pytest
+import sys
+import os
+import time
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.cache import ResultCache, make_cache_key, sql_hash, frame_nbytes
+
+
+def make_df(rows: int = 10) -> pd.DataFrame:
+    return pd.DataFrame({"year": range(rows), "count": range(rows)})
+
+
+class TestMakeCacheKey:
+    """Tests for cache key construction."""
+
+    def test_same_sql_and_params_share_key(self):
+        """Identical SQL and parameters produce the same key."""
+        assert make_cache_key("SELECT 1", {"a": 1}) == make_cache_key("SELECT 1", {"a": 1})
+
+    def test_param_order_does_not_matter(self):
+        """Dict insertion order does not change the key."""
+        key1 = make_cache_key("SELECT 1", {"a": 1, "b": 2})
+        key2 = make_cache_key("SELECT 1", {"b": 2, "a": 1})
+        assert key1 == key2
+
+    def test_none_params_are_dropped(self):
+        """None-valued parameters are ignored."""
+        assert make_cache_key("SELECT 1", {"a": 1, "b": None}) == make_cache_key("SELECT 1", {"a": 1})
+
+    def test_different_sql_changes_key(self):
+        """A different SQL text produces a different key."""
+        assert make_cache_key("SELECT 1", {}) != make_cache_key("SELECT 2", {})
+
+
+class TestMemoryTier:
+    """Tests for the in-process LRU tier."""
+
+    def test_get_returns_stored_frame(self):
+        """Stored frames are returned and tagged with the memory tier."""
+        cache = ResultCache(max_memory_bytes=10**6)
+        cache.put("k", make_df())
+        result = cache.get("k")
+        assert result is not None
+        assert len(result) == 10
+        assert result.attrs["cache_tier"] == "memory"
+
+    def test_miss_returns_none(self):
+        """Unknown keys return None."""
+        cache = ResultCache(max_memory_bytes=10**6)
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_by_bytes(self):
+        """Least recently used entries are evicted once the byte budget is exceeded."""
+        size = frame_nbytes(make_df())
+        cache = ResultCache(max_memory_bytes=size * 2)
+        cache.put("a", make_df())
+        cache.put("b", make_df())
+        cache.get("a")  # 'b' is now least recently used
+        cache.put("c", make_df())
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["memory_bytes"] <= size * 2
+
+    def test_oversized_frame_not_kept_in_memory(self):
+        """Frames larger than the whole budget skip the memory tier."""
+        cache = ResultCache(max_memory_bytes=10)
+        cache.put("big", make_df(1000))
+        assert cache.stats()["memory_entries"] == 0
+
+
+class TestDiskTier:
+    """Tests for the Parquet tier."""
+
+    def test_disk_hit_after_memory_eviction(self, tmp_path):
+        """Entries evicted from memory are still served from disk."""
+        cache = ResultCache(max_memory_bytes=10, cache_dir=str(tmp_path))
+        cache.put("k", make_df())
+        result = cache.get("k")
+        assert result is not None
+        assert result.attrs["cache_tier"] == "disk"
+        assert list(result["count"]) == list(range(10))
+
+    def test_disk_survives_new_instance(self, tmp_path):
+        """A fresh cache instance reads entries written by a previous one."""
+        ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path)).put("k", make_df())
+        cache = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path))
+        assert cache.get("k") is not None
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Entries older than the TTL are not served."""
+        cache = ResultCache(max_memory_bytes=10, cache_dir=str(tmp_path), ttl_seconds=0.01)
+        cache.put("k", make_df())
+        time.sleep(0.05)
+        assert cache.get("k") is None
+        assert not os.listdir(tmp_path)
+
+
+class TestInvalidation:
+    """Tests for invalidation when a query's SQL changes."""
+
+    def test_new_sql_drops_old_entries(self, tmp_path):
+        """Storing a result for edited SQL removes the old SQL's entries."""
+        cache = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path))
+        cache.put("old", make_df(), query_id="Q03", sql_digest=sql_hash("SELECT 1"))
+        cache.put("new", make_df(), query_id="Q03", sql_digest=sql_hash("SELECT 2"))
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+
+    def test_other_queries_unaffected(self):
+        """Invalidation is limited to the edited query."""
+        cache = ResultCache(max_memory_bytes=10**6)
+        cache.put("q06", make_df(), query_id="Q06", sql_digest=sql_hash("SELECT 6"))
+        cache.put("old", make_df(), query_id="Q03", sql_digest=sql_hash("SELECT 1"))
+        cache.put("new", make_df(), query_id="Q03", sql_digest=sql_hash("SELECT 2"))
+        assert cache.get("q06") is not None
+
+    def test_purge_stale_on_startup(self, tmp_path):
+        """Disk entries for edited queries are removed by purge_stale."""
+        ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path)).put(
+            "k", make_df(), query_id="Q03", sql_digest=sql_hash("SELECT 1"))
+        cache = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path))
+        cache.purge_stale({"Q03": sql_hash("SELECT 2")})
+        assert cache.get("k") is None
+
+    def test_disk_tier_is_capped(self, tmp_path):
+        """The oldest disk entries are removed once the tier exceeds max_disk_bytes."""
+        writer = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path))
+        for i, key in enumerate(("a", "b", "c")):
+            writer.put(key, make_df(), tables={"t1": "v1"})
+            os.utime(tmp_path / f"{key}.parquet", (1000 + i, 1000 + i))
+        newest_two = sum(os.path.getsize(tmp_path / f"{key}.{ext}")
+                         for key in ("b", "c") for ext in ("parquet", "json"))
+
+        cache = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path),
+                            max_disk_bytes=newest_two)
+        cache.purge_stale({})
+        assert cache.get("a") is None
+        assert cache.get("b") is not None and cache.get("c") is not None
+
+        cache.put("d", make_df(), tables={"t1": "v1"})
+        assert not (tmp_path / "b.parquet").exists()
+        assert (tmp_path / "d.parquet").exists()
+
+    def test_disk_size_is_tracked_without_rescanning(self, tmp_path, monkeypatch):
+        """Stores below the cap keep a running total instead of scanning the directory."""
+        cache = ResultCache(max_memory_bytes=10**6, cache_dir=str(tmp_path), max_disk_bytes=10**7)
+        cache.put("a", make_df(), tables={"t1": "v1"})
+        scans = []
+        monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or iter(()))
+        cache.put("b", make_df(20), tables={"t1": "v1"})
+        cache.put("a", make_df(30), tables={"t1": "v1"})
+        assert cache._disk_bytes == sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+        cache.invalidate_tables({"t1": "v2"})
+
+        assert scans == []
+        assert cache._disk_bytes == 0
@@ -0,0 +1,80 @@
+"""Tests for single-flight deduplication of concurrent queries."""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.execution import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight registry."""
+
+    def test_single_caller_runs_function(self):
+        """A lone caller runs the function and is not marked shared."""
+        flight = SingleFlight()
+        result, shared = flight.do("k", lambda: 42)
+        assert result == 42
+        assert shared is False
+
+    def test_concurrent_callers_share_one_call(self):
+        """Concurrent callers with the same key trigger a single call."""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "df"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", slow, label="Q06")))
+        leader.start()
+        started.wait(5)
+
+        followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+                     for _ in range(3)]
+        for t in followers:
+            t.start()
+        deadline = time.time() + 5
+        while flight._inflight["k"].waiters < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in [leader] + followers:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert [r for r, _ in results] == ["df"] * 4
+        assert sum(1 for _, shared in results if shared) == 3
+
+        stats = flight.stats()
+        assert stats["flights"] == 1
+        assert stats["joined"] == 3
+        assert stats["shared_flights"][0]["label"] == "Q06"
+
+    def test_errors_propagate_to_waiters(self):
+        """An exception in the leader is raised for every caller."""
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do("k", fail)
+        assert flight.in_flight() == 0
+
+    def test_different_keys_run_separately(self):
+        """Calls with different keys are not deduplicated."""
+        flight = SingleFlight()
+        flight.do("a", lambda: 1)
+        flight.do("b", lambda: 2)
+        assert flight.stats()["flights"] == 2
+        assert flight.stats()["joined"] == 0
@@ -0,0 +1,92 @@
+"""Tests for the family count sketch store."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data
+from modules.sketches import build_sql, merge_sql, exact_sql, split_total, relative_error, local_path
+
+
+def rollup_frame():
+    """Merge result as GROUP BY ROLLUP returns it: the total has no jurisdiction."""
+    return pd.DataFrame({"jurisdiction": ["US", None, "EP"],
+                         "family_count": [300, 380, 120]})
+
+
+class TestSketchSql:
+    """Tests for the sketch SQL builders."""
+
+    def test_build_uses_precision_and_table(self):
+        sql = build_sql("p.d.family_sketches", 14)
+        assert "CREATE OR REPLACE TABLE `p.d.family_sketches`" in sql
+        assert "HLL_COUNT.INIT(a.docdb_family_id, 14)" in sql
+
+    def test_build_rejects_invalid_precision(self):
+        """HLL_COUNT.INIT only accepts precisions 10 to 24."""
+        with pytest.raises(ValueError):
+            build_sql("p.d.t", 30)
+
+    def test_merge_filters_field_or_all_fields(self):
+        """Without a field, the all-fields sketches (tech_field NULL) are merged."""
+        assert "tech_field = @tech_field" in merge_sql("p.d.t", 13)
+        assert "tech_field IS NULL" in merge_sql("p.d.t", None)
+
+    def test_exact_joins_fields_only_when_needed(self):
+        assert "tls230_appln_techn_field" in exact_sql(13)
+        assert "tls230_appln_techn_field" not in exact_sql(None)
+
+    def test_relative_error(self):
+        """Precision 14 gives the documented ~0.81% standard error."""
+        assert relative_error(14) == pytest.approx(0.0081, abs=1e-4)
+
+    def test_local_path_is_filesystem_safe(self):
+        path = local_path("/tmp/sketches", "2025-10-01T00:00:00+00:00")
+        assert os.path.basename(path) == "family_sketches_2025-10-01T00-00-00-00-00.parquet"
+
+
+class TestSplitTotal:
+    """Tests for split_total."""
+
+    def test_splits_rollup_row(self):
+        counts, total = split_total(rollup_frame())
+        assert counts == {"EP": 120, "US": 300}
+        assert total == 380
+
+
+class TestGetFamilyCounts:
+    """Tests for get_family_counts."""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        calls = []
+
+        def submit(client, sql, params, query_id=None, page=None):
+            calls.append((sql, params))
+            return rollup_frame(), 0.1
+
+        monkeypatch.setattr(data, "_submit_and_wait", submit)
+        return calls
+
+    def test_sketch_merge_by_default(self, calls):
+        """Estimates come from the sketch table and carry their error bound."""
+        result = data.get_family_counts(None, ["US", "EP"], 13, 2015, 2020)
+
+        sql, params = calls[0]
+        assert "HLL_COUNT.MERGE" in sql and data.sketch_table_id() in sql
+        assert params == {"jurisdictions": ["EP", "US"], "tech_field": 13,
+                          "year_start": 2015, "year_end": 2020}
+        assert result["total"] == 380
+        assert not result["exact"] and result["relative_error"] > 0
+
+    def test_exact_toggle_counts_base_tables(self, calls):
+        result = data.get_family_counts(None, ["US", "EP"], None, 2015, 2020, exact=True)
+
+        sql, _ = calls[0]
+        assert "COUNT(DISTINCT a.docdb_family_id)" in sql
+        assert result["exact"] and result["relative_error"] == 0.0
@@ -0,0 +1,104 @@
+"""Tests for edition snapshot bundles."""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.cache import make_cache_key
+from modules.logic import build_query_params
+from modules.snapshot import SnapshotBundle, bundle_dir
+
+EDITION = "2025-10-01T08:00:00+00:00"
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return SnapshotBundle(bundle_dir(str(tmp_path), EDITION), EDITION)
+
+
+class TestSnapshotBundle:
+    """Tests for SnapshotBundle."""
+
+    def test_round_trip(self, bundle, tmp_path):
+        """Saved results load back under their key, tagged with the edition."""
+        df = pd.DataFrame({"filing_year": [2020, 2021], "applications": [5, 7]})
+        bundle.add("k1", df, "Q03", {"year_start": 2020, "year_end": 2021})
+        bundle.save()
+
+        loaded = SnapshotBundle.load(str(tmp_path), EDITION)
+        result = loaded.get("k1")
+        pd.testing.assert_frame_equal(result, df)
+        assert result.attrs == {"snapshot": EDITION}
+        assert loaded.entries["k1"]["query_id"] == "Q03"
+        assert loaded.get("other") is None
+
+    def test_other_edition_has_no_bundle(self, bundle, tmp_path):
+        bundle.save()
+        assert SnapshotBundle.load(str(tmp_path), "2026-04-01T08:00:00+00:00") is None
+
+    def test_unsaved_bundle_is_invisible(self, bundle, tmp_path):
+        """Results only become visible once the manifest is written."""
+        bundle.add("k1", pd.DataFrame({"a": [1]}), "Q01", {})
+        assert SnapshotBundle.load(str(tmp_path), EDITION) is None
+
+
+class TestDefaultParameterValues:
+    """Tests for default_parameter_values."""
+
+    def test_matches_detail_page_defaults(self):
+        config = QUERIES["Q08"]["parameters"]
+        assert data.default_parameter_values(config) == {
+            "year_start": 2014, "year_end": 2023,
+            "jurisdictions": ["EP", "US", "DE"], "tech_sector": "All Sectors",
+        }
+
+    def test_no_parameters(self):
+        assert data.default_parameter_values({}) == {}
+
+
+@pytest.fixture
+def serving(data_state, bundle):
+    """Empty cache, the bundle as snapshot, and a client that must not be called."""
+    data_state.snapshot = bundle
+    client = MagicMock()
+    client.query.side_effect = AssertionError("snapshot hits must not query BigQuery")
+    return client
+
+
+class TestServing:
+    """Tests for serving catalog queries from the snapshot."""
+
+    def default_request(self, query_id):
+        query_info = QUERIES[query_id]
+        params_config = query_info["parameters"]
+        values = data.default_parameter_values(params_config)
+        return data._prepare(query_info["sql_template"], build_query_params(params_config, values),
+                             query_id)
+
+    def test_default_parameters_are_served(self, serving, bundle):
+        sql, params = self.default_request("Q08")
+        bundle.add(make_cache_key(sql, params), pd.DataFrame({"techn_field": ["Computer technology"]}),
+                   "Q08", params)
+
+        run = data.submit_parameterized_query(serving, QUERIES["Q08"]["sql_template"],
+                                              {**params}, query_id="Q08")
+        df, _ = run.result()
+        assert df.attrs["snapshot"] == EDITION
+
+    def test_routed_queries_use_catalog_key(self, serving, bundle, monkeypatch):
+        """Snapshots stay valid when the query is routed to a summary table."""
+        monkeypatch.setattr(data, "route_to_summary", lambda client, sql, query_id: "SELECT 1")
+        sql, params = self.default_request("Q02")
+        bundle.add(make_cache_key(sql, params), pd.DataFrame({"filing_authority": ["EP"]}), "Q02", params)
+
+        df, _ = data.run_parameterized_query(serving, QUERIES["Q02"]["sql_template"], params,
+                                             query_id="Q02")
+        assert df["filing_authority"].tolist() == ["EP"]
@@ -0,0 +1,152 @@
+"""Tests for summary tables and routing catalog queries to them."""
+
+import pytest
+import sys
+import os
+
+import pandas as pd
+from google.api_core.exceptions import NotFound
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.cache import ResultCache
+from modules.summaries import SUMMARY_TABLES, build_sql, edition_label, find_summary
+
+EDITION = "2025-10-01T08:00:00+00:00"
+
+
+class TestSummaryDefinitions:
+    """Tests for the declarative summary tables."""
+
+    def test_build_sql_groups_by_every_dimension(self):
+        sql = build_sql("appln_auth_year_field", "p.d.summary_appln_auth_year_field", EDITION)
+        assert "CREATE OR REPLACE TABLE `p.d.summary_appln_auth_year_field`" in sql
+        assert "GROUP BY 1, 2, 3" in sql
+        assert "WHERE atf.weight > 0.5" in sql
+        assert f'("patstat_edition", "{edition_label(EDITION)}")' in sql
+
+    def test_edition_label_is_valid(self):
+        """Label values allow only lowercase letters, digits, _ and -."""
+        assert edition_label(EDITION) == "2025-10-01t08-00-00-00-00"
+
+    def test_catalog_aggregates_have_a_summary(self):
+        """Every QUERIES aggregate entry can be answered by some summary table."""
+        everything = {name: 1 for name in SUMMARY_TABLES}
+        for query_id, query in QUERIES.items():
+            if 'aggregate' in query:
+                assert "{source}" in query['aggregate']['sql'], query_id
+                assert find_summary(query['aggregate'], everything), query_id
+
+
+class TestFindSummary:
+    """Tests for find_summary."""
+
+    AGGREGATE = {"dimensions": ["appln_auth", "appln_filing_year"], "measures": ["applications"]}
+
+    def test_only_built_tables_match(self):
+        assert find_summary(self.AGGREGATE, {}) is None
+        assert find_summary(self.AGGREGATE, {"appln_auth_year": 50_000}) == "appln_auth_year"
+
+    def test_missing_measure_does_not_match(self):
+        """Measures of another population (field_applications) are not interchangeable."""
+        assert find_summary(self.AGGREGATE, {"appln_auth_year_field": 900_000}) is None
+
+    def test_smallest_candidate_wins(self, monkeypatch):
+        monkeypatch.setitem(SUMMARY_TABLES, "appln_auth_year_small", dict(SUMMARY_TABLES["appln_auth_year"]))
+        available = {"appln_auth_year": 50_000, "appln_auth_year_small": 10}
+        assert find_summary(self.AGGREGATE, available) == "appln_auth_year_small"
+
+
+def counts(params):
+    """Fake job result of Q02."""
+    return pd.DataFrame({"filing_authority": ["EP"], "application_count": [10]})
+
+
+def missing_summaries(sql):
+    """Fake client failure of every job that reads a summary table."""
+    if "summary_" in sql:
+        return NotFound("Table summary_appln_auth_year was not found")
+    return None
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(data_state, monkeypatch):
+    """Empty cache, own single-flight registry, and appln_auth_year built."""
+    monkeypatch.setattr(data, "get_patstat_edition", lambda client: EDITION)
+    data.get_summary_tables.return_value = {"appln_auth_year": 50_000}
+    return data_state
+
+
+class TestRouting:
+    """Tests for route_to_summary and the base-table fallback."""
+
+    PARAMS = {"year_start": 2015, "year_end": 2020}
+
+    def test_catalog_query_reads_summary(self, fake_client):
+        client, jobs = fake_client(counts)
+        data.run_parameterized_query(client, QUERIES["Q02"]["sql_template"], self.PARAMS, query_id="Q02")
+
+        assert len(jobs) == 1
+        assert data.summary_table_id("appln_auth_year") in jobs[0]["sql"]
+        assert "tls201_appln" not in jobs[0]["sql"]
+
+    def test_edited_sql_is_not_routed(self, fake_client):
+        """Only the catalog's own template is rewritten."""
+        client, _ = fake_client(counts)
+        edited = QUERIES["Q02"]["sql_template"].replace("LIMIT 30", "LIMIT 10")
+        assert data.route_to_summary(client, edited, "Q02") == edited
+
+    def test_unbuilt_summary_keeps_base_tables(self, fake_client):
+        data.get_summary_tables.return_value = {}
+        client, jobs = fake_client(counts)
+        data.run_parameterized_query(client, QUERIES["Q02"]["sql_template"], self.PARAMS, query_id="Q02")
+
+        assert "tls201_appln" in jobs[0]["sql"]
+
+    def test_dropped_summary_falls_back(self, fake_client):
+        """A summary table that disappeared is bypassed for the base-table SQL."""
+        client, jobs = fake_client(counts, fail=missing_summaries)
+        df, _ = data.run_parameterized_query(client, QUERIES["Q02"]["sql_template"], self.PARAMS,
+                                             query_id="Q02")
+
+        assert len(jobs) == 1 and "tls201_appln" in jobs[0]["sql"]
+        assert df["application_count"].tolist() == [10]
+        data.get_summary_tables.clear.assert_called_once()
+
+
+class TestRoutedResultsCache:
+    """Summary-table and base-table results are cached as the catalog query's SQL."""
+
+    PARAMS = {"year_start": 2015, "year_end": 2020}
+
+    def run(self, client, cache, state):
+        state.cache = cache
+        return data.run_parameterized_query(client, QUERIES["Q02"]["sql_template"], self.PARAMS,
+                                            query_id="Q02")
+
+    def test_routed_result_survives_restart(self, fresh_state, fake_client, tmp_path):
+        client, jobs = fake_client(counts)
+        self.run(client, ResultCache(10 * 1024 ** 2, cache_dir=str(tmp_path)), fresh_state)
+
+        restarted = ResultCache(10 * 1024 ** 2, cache_dir=str(tmp_path))
+        restarted.purge_stale(data.catalog_sql_hashes())
+        df, _ = self.run(client, restarted, fresh_state)
+
+        assert len(jobs) == 1
+        assert df.attrs["cache_tier"] == "disk"
+
+    def test_fallback_result_keeps_routed_entries(self, fresh_state, fake_client):
+        """A base-table result of the same query does not invalidate the routed one."""
+        cache = ResultCache(10 * 1024 ** 2)
+        client, jobs = fake_client(counts)
+        self.run(client, cache, fresh_state)
+        missing, fallback_jobs = fake_client(counts, fail=missing_summaries)
+        data.run_parameterized_query(missing, QUERIES["Q02"]["sql_template"],
+                                     {"year_start": 2010, "year_end": 2020}, query_id="Q02")
+        assert "tls201_appln" in fallback_jobs[0]["sql"]
+
+        self.run(client, cache, fresh_state)
+        assert len(jobs) == 1
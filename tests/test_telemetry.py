@@ -0,0 +1,146 @@
+"""Tests for job labels and the job telemetry collector."""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries_bq import QUERIES
+from modules import data
+from modules.telemetry import JobTelemetry, job_labels, jobs_sql, label_value, params_fingerprint
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_job(job_id: str, minutes_ago: float, query_id: str = "q06", cache_hit: bool = False,
+             bytes_billed: int = 10 * 1024 ** 2) -> dict:
+    return {
+        "job_id": job_id, "creation_time": NOW - timedelta(minutes=minutes_ago), "state": "DONE",
+        "cache_hit": cache_hit, "total_bytes_processed": bytes_billed,
+        "total_bytes_billed": 0 if cache_hit else bytes_billed, "total_slot_ms": 500,
+        "duration_ms": 1200, "queue_ms": 300, "error_reason": None,
+        "query_id": query_id, "params": "abc", "page": "catalog",
+    }
+
+
+class TestJobLabels:
+    """Tests for job_labels."""
+
+    def test_catalog_job(self):
+        labels = job_labels("Q06", {"year_start": 2018, "year_end": 2020})
+        assert labels["app"] == "patstat-explorer"
+        assert labels["query_id"] == "q06"
+        assert labels["page"] == "catalog"
+        assert len(labels["params"]) == 16
+
+    def test_adhoc_job(self):
+        assert job_labels(page="AI Builder")["page"] == "ai_builder"
+        assert job_labels()["page"] == "adhoc"
+
+    def test_fingerprint_ignores_order_and_none(self):
+        assert params_fingerprint({"a": 1, "b": None, "c": [1, 2]}) == \
+            params_fingerprint({"c": [1, 2], "a": 1})
+        assert params_fingerprint({"a": 1}) != params_fingerprint({"a": 2})
+
+    def test_label_value_is_valid(self):
+        value = label_value("Tech Field: 12/" + "x" * 80)
+        assert len(value) == 63
+        assert value.startswith("tech_field__12_")
+
+    def test_region_is_validated(self):
+        assert "`region-eu`.INFORMATION_SCHEMA.JOBS_BY_PROJECT" in jobs_sql("EU")
+        with pytest.raises(ValueError):
+            jobs_sql("eu`; DROP")
+
+
+class TestJobTelemetry:
+    """Tests for JobTelemetry."""
+
+    def make_telemetry(self, tmp_path, batches):
+        calls = []
+
+        def fetch(since):
+            calls.append(since)
+            return pd.DataFrame(batches.pop(0)) if batches else pd.DataFrame()
+
+        telemetry = JobTelemetry(str(tmp_path / "jobs.parquet"), fetch, interval_seconds=60,
+                                 retention_days=30, overlap_seconds=3600)
+        return telemetry, calls
+
+    def test_incremental_collection(self, tmp_path):
+        """Later collections start an overlap before the newest stored job and dedupe."""
+        telemetry, calls = self.make_telemetry(tmp_path, [
+            [make_job("a", 30), make_job("b", 10)],
+            [make_job("b", 10), make_job("c", 1)],
+        ])
+        assert telemetry.collect(now=NOW) == 2
+        assert telemetry.collect(now=NOW) == 1
+
+        assert calls[0] == NOW - timedelta(days=30)
+        assert calls[1] == NOW - timedelta(minutes=10) - timedelta(hours=1)
+        assert telemetry.load()["job_id"].tolist() == ["a", "b", "c"]
+
+    def test_retention(self, tmp_path):
+        telemetry, _ = self.make_telemetry(tmp_path, [[make_job("old", 40 * 24 * 60),
+                                                       make_job("new", 5)]])
+        telemetry.collect(now=NOW)
+        assert telemetry.load()["job_id"].tolist() == ["new"]
+
+    def test_summary(self, tmp_path):
+        telemetry, _ = self.make_telemetry(tmp_path, [[
+            make_job("a", 30), make_job("b", 20, cache_hit=True), make_job("c", 10, query_id="q11"),
+        ]])
+        telemetry.collect(now=NOW)
+
+        summary = telemetry.summary("Q06").iloc[0]
+        assert summary["jobs"] == 2
+        assert summary["cache_hit_rate"] == 0.5
+        assert summary["bytes_billed"] == 10 * 1024 ** 2
+        assert summary["mean_queue_ms"] == 300
+        assert len(telemetry.summary()) == 2
+
+    def test_empty_store(self, tmp_path):
+        telemetry, _ = self.make_telemetry(tmp_path, [])
+        assert telemetry.collect(now=NOW) == 0
+        assert telemetry.summary("Q06").empty
+
+
+class TestLabeledJobs:
+    """Jobs submitted through the data layer carry their labels."""
+
+    def test_catalog_query(self, data_state, fake_client):
+        client, jobs = fake_client()
+        params = {"year_start": 2018, "year_end": 2020, "jurisdictions": ["DE"]}
+        data.run_parameterized_query(client, QUERIES["Q06"]["sql_template"], params,
+                                     query_id="Q06")
+
+        assert jobs[0]["labels"]["query_id"] == "q06"
+        assert jobs[0]["labels"]["page"] == "catalog"
+
+    def test_page_of_adhoc_query(self, data_state, fake_client):
+        client, jobs = fake_client()
+        data.run_query(client, "SELECT 1 AS value", page="ai_builder")
+        assert [job["labels"] for job in jobs] == [job_labels(None, {}, "ai_builder")]
+
+
+class TestStartTelemetry:
+    """Collection is off unless TELEMETRY_ENABLED turns it on."""
+
+    def test_off_by_default(self, monkeypatch):
+        monkeypatch.delenv("TELEMETRY_ENABLED", raising=False)
+        monkeypatch.setattr(data, "get_job_telemetry", MagicMock())
+        assert data.start_telemetry(MagicMock()) is None
+        assert data.get_query_telemetry(MagicMock(), "Q06") is None
+        data.get_job_telemetry.assert_not_called()
+
+    def test_enabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("TELEMETRY_ENABLED", "1")
+        monkeypatch.setattr(data, "get_job_telemetry", MagicMock())
+        telemetry = data.start_telemetry(MagicMock())
+        assert telemetry is data.get_job_telemetry.return_value.start.return_value
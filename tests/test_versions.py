@@ -0,0 +1,152 @@
+"""Tests for table-version-aware cache invalidation."""
+
+import pytest
+import sys
+import os
+import time
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import data
+from modules.cache import ResultCache
+from modules.versions import referenced_tables, TableVersions
+
+
+def make_df(rows: int = 3) -> pd.DataFrame:
+    return pd.DataFrame({"year": range(rows), "count": range(rows)})
+
+
+class TestReferencedTables:
+    """Tests for referenced_tables."""
+
+    def test_from_and_join_tables(self):
+        sql = ("SELECT * FROM `tls201_appln` a JOIN tls230_appln_techn_field tf ON a.appln_id = tf.appln_id "
+               "LEFT JOIN p.d.summary_x s ON TRUE")
+        assert referenced_tables(sql) == ("p.d.summary_x", "tls201_appln", "tls230_appln_techn_field")
+
+    def test_ctes_and_unnest_are_not_tables(self):
+        sql = ("WITH filtered AS (SELECT appln_id FROM tls201_appln), "
+               "ranked AS (SELECT * FROM filtered) "
+               "SELECT * FROM ranked JOIN UNNEST(@jurisdictions) j ON TRUE")
+        assert referenced_tables(sql) == ("tls201_appln",)
+
+    def test_extract_and_literals_are_ignored(self):
+        """FROM inside EXTRACT() or a string literal is not a table reference."""
+        sql = ("SELECT EXTRACT(YEAR FROM publn_date), 'from somewhere' AS note "
+               "FROM tls211_pat_publn")
+        assert referenced_tables(sql) == ("tls211_pat_publn",)
+
+
+class TestTableVersions:
+    """Tests for TableVersions."""
+
+    def test_first_sight_counts_as_change(self):
+        versions = TableVersions(refresh_seconds=60)
+        current, changed = versions.refresh(["t1"], lambda t: "v1")
+        assert current == {"t1": "v1"} and changed == {"t1": "v1"}
+
+    def test_not_reread_within_interval(self):
+        versions = TableVersions(refresh_seconds=60)
+        fetch = MagicMock(return_value="v1")
+        versions.refresh(["t1"], fetch)
+        current, changed = versions.refresh(["t1"], fetch)
+
+        assert fetch.call_count == 1
+        assert current == {"t1": "v1"} and changed == {}
+
+    def test_reports_changed_versions_only(self):
+        versions = TableVersions(refresh_seconds=0)
+        versions.refresh(["t1", "t2"], lambda t: "v1")
+        time.sleep(0.01)
+        _, changed = versions.refresh(["t1", "t2"], lambda t: "v2" if t == "t1" else "v1")
+        assert changed == {"t1": "v2"}
+
+    def test_unreadable_tables_are_left_out(self):
+        def fetch(table):
+            raise RuntimeError("permission denied")
+
+        current, changed = TableVersions(60).refresh(["t1"], fetch)
+        assert current == {} and changed == {}
+
+    def test_failures_not_retried_within_interval(self):
+        """A table that cannot be read is retried only after the refresh interval."""
+        versions = TableVersions(refresh_seconds=60)
+        versions.refresh(["t1"], lambda t: "v1")
+        versions._versions["t1"] = ("v1", 0)  # Due for a re-read
+        fetch = MagicMock(side_effect=RuntimeError("permission denied"))
+        versions.refresh(["t1"], fetch)
+        current, changed = versions.refresh(["t1"], fetch)
+
+        assert fetch.call_count == 1
+        assert current == {"t1": "v1"} and changed == {}
+
+
+class TestInvalidateTables:
+    """Tests for ResultCache.invalidate_tables and versioned expiry."""
+
+    def test_drops_entries_of_changed_tables(self, tmp_path):
+        cache = ResultCache(max_memory_bytes=10 * 1024 ** 2, cache_dir=str(tmp_path))
+        cache.put("a", make_df(), tables={"t1": "v1", "t2": "v1"})
+        cache.put("b", make_df(), tables={"t2": "v1"})
+
+        cache.invalidate_tables({"t1": "v2"})
+
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+        assert not os.path.exists(tmp_path / "a.parquet")
+
+    def test_versioned_entries_outlive_ttl(self, tmp_path):
+        """Disk entries with table versions are not aged out by the TTL."""
+        cache = ResultCache(max_memory_bytes=10, cache_dir=str(tmp_path), ttl_seconds=0.01)
+        cache.put("versioned", make_df(), tables={"t1": "v1"})
+        cache.put("plain", make_df())
+        time.sleep(0.05)
+
+        assert cache.get("versioned") is not None
+        assert cache.get("plain") is None
+
+    def test_explicit_expiry_applies_to_memory(self):
+        cache = ResultCache(max_memory_bytes=10 * 1024 ** 2)
+        cache.put("paged", make_df(), tables={"t1": "v1"}, ttl_seconds=0.01)
+        time.sleep(0.05)
+        assert cache.get("paged") is None
+
+
+@pytest.fixture
+def fresh_state(data_state):
+    """Empty cache and a tracker that re-reads versions on every call."""
+    data_state.versions = TableVersions(refresh_seconds=0)
+    return data_state.cache
+
+
+class TestDataLayer:
+    """Tests for invalidation through _execute."""
+
+    SQL = "SELECT year, COUNT(*) AS count FROM tls201_appln GROUP BY year"
+
+    def test_reload_invalidates_results(self, fresh_state, fake_client):
+        """Results are reused until a table they read changes."""
+        client, jobs = fake_client(make_df())
+        table = client.get_table.return_value
+        data._execute(client, self.SQL, {})
+        data._execute(client, self.SQL, {})
+        assert len(jobs) == 1
+
+        table.modified.isoformat.return_value = "2025-10-01T00:00:00"
+        data._execute(client, self.SQL, {})
+        assert len(jobs) == 2
+
+    def test_results_record_table_versions(self, fresh_state, fake_client):
+        client, _ = fake_client(make_df())
+        data._execute(client, self.SQL, {}, query_id="Q02")
+
+        _, _, meta = next(iter(fresh_state._memory.values()))
+        assert meta["tables"] == {data._table_id("tls201_appln"): "2025-04-01T00:00:00|100"}
+
+    def test_edition_from_tracked_version(self, fresh_state, fake_client):
+        client, _ = fake_client(make_df())
+        assert data.get_patstat_edition(client) == "2025-04-01T00:00:00"